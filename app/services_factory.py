@@ -1,17 +1,28 @@
+import logging
+from pathlib import Path
 import streamlit as st
 from langchain_huggingface import HuggingFaceEmbeddings
 from config.settings import settings
 from infrastructure.llm.groq_provider import GroqProvider
 from infrastructure.vector_store.faiss_repository import FAISSRepository
+from infrastructure.vector_store.query_embedding_cache import QueryEmbeddingCache
 from infrastructure.files.loader import DocumentLoader
 from infrastructure.ai.semantic_router import SemanticRouter
+from infrastructure.ai.cross_encoder_reranker import CrossEncoderReranker
+from infrastructure.ai.rerank_score_cache import CachedReranker
 from infrastructure.storage.session_manager import FileSessionRepository
 from infrastructure.storage.local_file_storage import LocalFileStorage
+from infrastructure.storage.ingestion_job_store import SQLiteIngestionJobStore
+from infrastructure.constants import FILE_INGEST_JOBS_DB
 from infrastructure.logging.feedback_logger import FeedbackLogger
 from core.services.chat_service import ChatService
 from core.services.document_service import DocumentService
+from core.services.federated_search_service import FederatedSearchService
+from core.services.ingestion_job_service import IngestionJobService
 from core.services.prompt_manager import PromptManager
 
+logger = logging.getLogger(__name__)
+
 class ServicesFactory:
     @staticmethod
     @st.cache_resource(show_spinner="Cargando modelos de IA...")
@@ -26,15 +37,34 @@ class ServicesFactory:
             encode_kwargs={'normalize_embeddings': False}
         )
 
+    @staticmethod
+    @st.cache_resource(show_spinner="Cargando modelo de reranking...")
+    def get_reranker():
+        """
+        Carga y cachea el reranker CrossEncoder, compartido por todas las sesiones,
+        con caché de scores si está habilitado.
+        Retorna None si no se puede cargar (se responde sin reranking).
+        """
+        try:
+            reranker = CrossEncoderReranker()
+            if settings.RERANK_CACHE_ENABLED:
+                reranker = CachedReranker(reranker, cache_dir=settings.RERANK_CACHE_DIR)
+            return reranker
+        except Exception as e:
+            logger.warning(f"Error cargando reranker: {e}")
+            return None
+
     @staticmethod
     @st.cache_resource(show_spinner="Iniciando servicios del sistema...")
     def create_services():
         """Creates and returns a dictionary of initialized services."""
         llm_provider = GroqProvider()
         
-        # Inyectar modelo cacheado
-        embeddings = ServicesFactory.get_embedding_model()
+        # Inyectar modelo cacheado, con caché de vectores de consulta compartido por
+        # las sesiones
+        embeddings = QueryEmbeddingCache(ServicesFactory.get_embedding_model())
         vector_repo = FAISSRepository(embeddings)
+        reranker = ServicesFactory.get_reranker()
         
         doc_loader = DocumentLoader()
         router_repo = SemanticRouter()
@@ -43,6 +73,17 @@ class ServicesFactory:
         feedback_logger = FeedbackLogger()
         doc_service = DocumentService(doc_loader, file_storage)
         prompt_manager = PromptManager()
+        federated_search = FederatedSearchService(session_repo, vector_repo, reranker)
+
+        # Cola de ingesta en segundo plano (una por proceso: create_services se
+        # cachea)
+        job_store = SQLiteIngestionJobStore(
+            Path(settings.INGEST_JOBS_DIR) / FILE_INGEST_JOBS_DB
+        )
+        ingestion_jobs = IngestionJobService(
+            job_store, doc_service, vector_repo, session_repo
+        )
+        ingestion_jobs.start()
         
         return {
             "llm_provider": llm_provider,
@@ -53,16 +94,27 @@ class ServicesFactory:
             "file_storage": file_storage,
             "feedback_logger": feedback_logger,
             "doc_service": doc_service,
-            "prompt_manager": prompt_manager
+            "prompt_manager": prompt_manager,
+            "reranker": reranker,
+            "federated_search": federated_search,
+            "ingestion_jobs": ingestion_jobs
         }
 
     @staticmethod
-    def create_chat_service(llm_provider, vector_repo, doc_loader, router_repo, prompt_manager):
+    def create_chat_service(
+        llm_provider,
+        vector_repo,
+        doc_loader,
+        router_repo,
+        prompt_manager,
+        reranker=None
+    ):
         """Creates a ChatService instance."""
         return ChatService(
             llm_provider=llm_provider,
             vector_store_repo=vector_repo,
             document_loader=doc_loader,
             router_repo=router_repo,
-            prompt_manager=prompt_manager
+            prompt_manager=prompt_manager,
+            reranker=reranker
         )
@@ -8,6 +8,7 @@ from typing import Any
 def render_dashboard(
     session_manager: Any, 
     chat_service: Any, 
+    vector_repo: Any,
     session_name: str, 
     session_path: str, 
     is_draft: bool
@@ -78,19 +79,10 @@ def render_dashboard(
                                     dirs_exist_ok=True
                                 )
                             
-                            if (Path(session_path) / "vector_store").exists():
-                                shutil.copytree(
-                                    Path(session_path) / "vector_store", 
-                                    Path(new_path) / "vector_store", 
-                                    dirs_exist_ok=True
-                                )
-                            if (Path(session_path) / "doc_store").exists():
-                                shutil.copytree(
-                                    Path(session_path) / "doc_store", 
-                                    Path(new_path) / "doc_store", 
-                                    dirs_exist_ok=True
-                                )
-                                
+                            # Índice completo: FAISS, docstore, BM25, manifiesto,
+                            # metadatos
+                            vector_repo.copy_index(session_path, new_path)
+
                             # Si hay archivos en el borrador, registrarlos en la nueva sesión
                             # Esto es importante para que aparezcan en los metadatos
                             if (Path(session_path) / "raw_files").exists():
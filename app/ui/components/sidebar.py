@@ -1,7 +1,56 @@
 import streamlit as st
 from typing import Any
+from config.settings import settings
 
-def render_sidebar(session_manager: Any, doc_service: Any, vector_repo: Any, session_path: str, is_draft: bool, chat_service: Any = None):
+def _progress_label(progress: Any) -> str:
+    """Texto de avance de la ingesta para la barra de progreso."""
+    if progress.stage == "parsing":
+        return (
+            f"Leyendo {progress.filename} "
+            f"({progress.files_done}/{progress.files_total})..."
+        )
+    if progress.stage == "embedding":
+        return f"Indexando fragmentos ({progress.chunks_indexed} listos)..."
+    return "Ingesta completada"
+
+def _job_label(job: Any) -> str:
+    """Texto de estado de un trabajo de ingesta en segundo plano."""
+    if job.status == "queued":
+        return f"En cola: {len(job.filenames)} archivo(s)"
+    if job.status == "parsing":
+        return f"Leyendo archivos ({job.files_done}/{len(job.filenames)})..."
+    return f"Indexando fragmentos ({job.chunks_indexed} listos)..."
+
+@st.fragment(run_every=settings.INGEST_JOB_POLL_SECONDS)
+def _poll_ingestion_jobs(ingestion_jobs: Any, session_id: str):
+    """
+    Muestra el avance de los trabajos de ingesta del proyecto, consultándolos
+    periódicamente sin re-ejecutar la página. Al terminar el último, recarga la
+    app para que el chat use el índice nuevo.
+    """
+    watched = st.session_state.setdefault("watched_ingestion_jobs", set())
+    jobs = ingestion_jobs.list_jobs(session_id, limit=5)
+    active = [job for job in jobs if job.is_active]
+    for job in active:
+        watched.add(job.id)
+        fraction = 0.9 * job.files_done / max(len(job.filenames), 1)
+        st.progress(fraction, text=_job_label(job))
+
+    if not active:
+        if any(job.id in watched and job.status == "done" for job in jobs):
+            st.session_state.ingestion_finished = True
+        watched.clear()
+        st.rerun()
+
+def render_sidebar(
+    session_manager: Any,
+    doc_service: Any,
+    vector_repo: Any,
+    session_path: str,
+    is_draft: bool,
+    chat_service: Any = None,
+    ingestion_jobs: Any = None
+):
     """
     Renderiza la barra lateral enfocada en el proyecto activo (Estilo NotebookLM).
     """
@@ -34,7 +83,6 @@ def render_sidebar(session_manager: Any, doc_service: Any, vector_repo: Any, ses
                     if st.button("✕", key=f"del_file_{file}", help="Eliminar fuente"):
                         if doc_service.delete_file(session_path, file, vector_repo):
                             session_manager.remove_file_from_session(st.session_state.session_id, file)
-                            st.session_state.force_refresh_retrievers = True
                             st.rerun()
 
         # Añadir Fuente (Expander)
@@ -43,20 +91,46 @@ def render_sidebar(session_manager: Any, doc_service: Any, vector_repo: Any, ses
                 "Subir archivos",
                 type=["pdf", "docx", "txt", "pptx", "xlsx"],
                 accept_multiple_files=True,
-                label_visibility="collapsed"
+                label_visibility="collapsed",
+                key=f"uploader_{st.session_state.get('uploader_nonce', 0)}"
             )
             
             if uploaded_files:
                 if st.button("Procesar", type="primary", use_container_width=True):
+                    if ingestion_jobs is not None:
+                        # Ingesta en segundo plano: la página sigue respondiendo y una
+                        # recarga del navegador no interrumpe el trabajo
+                        ingestion_jobs.submit(
+                            st.session_state.session_id, uploaded_files
+                        )
+                        nonce = st.session_state.get("uploader_nonce", 0)
+                        st.session_state.uploader_nonce = nonce + 1
+                        st.rerun()
+
                     with st.spinner("Procesando..."):
+                        progress_bar = st.progress(0.0, text="Preparando archivos...")
+
+                        def show_progress(progress: Any) -> None:
+                            # Carga e indexado se solapan: el avance sigue a los
+                            # archivos leídos
+                            fraction = 1.0 if progress.stage == "done" else (
+                                0.9 * progress.files_done / max(progress.files_total, 1)
+                            )
+                            progress_bar.progress(
+                                fraction, text=_progress_label(progress)
+                            )
+
                         try:
-                            new_retriever, new_bm25, num_chunks = doc_service.process_and_ingest_files(
-                                uploaded_files, session_path, vector_repo
+                            ingested = doc_service.process_and_ingest_files(
+                                uploaded_files,
+                                session_path,
+                                vector_repo,
+                                on_progress=show_progress
                             )
+                            new_retriever, new_bm25, num_chunks = ingested
                             if num_chunks > 0:
                                 filenames = [f.name for f in uploaded_files]
                                 session_manager.add_files_to_session(st.session_state.session_id, filenames)
-                                st.session_state.force_refresh_retrievers = True
                                 
                                 # Generar Resumen Automático si tenemos chat_service
                                 if chat_service and not is_draft:
@@ -75,6 +149,31 @@ def render_sidebar(session_manager: Any, doc_service: Any, vector_repo: Any, ses
                         except Exception as e:
                             st.error(f"Error: {e}")
 
+        # Trabajos de ingesta del proyecto
+        if ingestion_jobs is not None:
+            jobs = ingestion_jobs.list_jobs(st.session_state.session_id, limit=3)
+            if any(job.is_active for job in jobs):
+                _poll_ingestion_jobs(ingestion_jobs, st.session_state.session_id)
+            for job in jobs:
+                if job.status == "failed":
+                    st.caption(
+                        f"⚠️ Falló la ingesta de {', '.join(job.filenames)}: "
+                        f"{job.error}"
+                    )
+                elif job.status == "done" and job.failed_files:
+                    st.caption(
+                        f"⚠️ No se pudieron leer {', '.join(job.failed_files)}: "
+                        f"{job.error}"
+                    )
+
+            finished = st.session_state.pop("ingestion_finished", False)
+            if finished and chat_service and not is_draft:
+                with st.spinner("Generando resumen del proyecto..."):
+                    summary = chat_service.generate_context_summary()
+                    session_manager.update_session_summary(
+                        st.session_state.session_id, summary
+                    )
+
         st.divider()
 
         # --- SECCIÓN 2: NAVEGACIÓN DE VISTAS ---
@@ -1,10 +1,25 @@
 import streamlit as st
 import json
+from typing import List, Optional
 from core.services.chat_service import ChatService
 
-def render_quiz_view(chat_service: ChatService):
+SOURCE_ALL = "Toda la documentación"
+SOURCE_NOTES = "Sólo mis respuestas validadas"
+
+def _quiz_filters(source: str) -> Optional[dict]:
+    """Filtro de metadatos para la fuente elegida (None = toda la sesión)."""
+    if source == SOURCE_ALL:
+        return None
+    if source == SOURCE_NOTES:
+        return {"type": "qa_insight"}
+    return {"source_file": source}
+
+def render_quiz_view(
+    chat_service: ChatService, source_files: Optional[List[str]] = None
+):
     """
     Renderiza la vista del generador de cuestionarios.
+    `source_files` son los archivos de la sesión que se ofrecen como fuente única.
     """
     st.title("🎓 Generador de Evaluaciones ISO 9001")
     st.markdown("Genera exámenes automáticos basados en tu documentación para entrenamiento y auditoría.")
@@ -29,6 +44,14 @@ def render_quiz_view(chat_service: ChatService):
             
             with col2:
                 num_questions = st.slider("Cantidad de Preguntas", min_value=3, max_value=10, value=5)
+                source = st.selectbox(
+                    "Fuente del contenido",
+                    [SOURCE_ALL, SOURCE_NOTES] + list(source_files or []),
+                    help=(
+                        "Genera el examen sólo desde un procedimiento o desde tus "
+                        "respuestas validadas."
+                    )
+                )
             
             if st.button("🚀 Generar Examen", type="primary", use_container_width=True):
                 if not topic:
@@ -37,7 +60,12 @@ def render_quiz_view(chat_service: ChatService):
 
                 with st.spinner("Analizando documentación y generando preguntas..."):
                     try:
-                        json_response = chat_service.generate_quiz(topic, difficulty, num_questions)
+                        json_response = chat_service.generate_quiz(
+                            topic,
+                            difficulty,
+                            num_questions,
+                            filters=_quiz_filters(source)
+                        )
                         data = json.loads(json_response)
                         
                         if "questions" in data:
@@ -0,0 +1,99 @@
+"""
+Micro-benchmark: BM25 de rank_bm25 (implementación anterior) vs matriz CSR vectorizada.
+
+Uso:
+    python -m benchmarks.bm25_benchmark --docs 5000 --queries 200
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from rank_bm25 import BM25Okapi
+
+from infrastructure.vector_store.bm25_index import BM25InvertedIndex, tokenize
+from infrastructure.vector_store.sparse_bm25 import SparseBM25Matrix
+
+VOCABULARY = (
+    "auditoría interna procedimiento control documentos registros calidad "
+    "responsable aprobación revisión dirección proceso mejora continua riesgo "
+    "oportunidad no conformidad acción correctiva indicador objetivo alcance "
+    "cliente proveedor competencia formación equipo medición calibración "
+    "laboratorio ensayo muestra trazabilidad incertidumbre método validación "
+    "verificación informe resultado requisito norma cláusula evidencia hallazgo"
+).split()
+
+def build_corpus(num_docs: int, words_per_doc: int, seed: int):
+    rng = random.Random(seed)
+    # Vocabulario con cola larga para imitar manuales reales
+    extended = VOCABULARY + [f"termino{i}" for i in range(5000)]
+    weights = [50] * len(VOCABULARY) + [1] * 5000
+    return [
+        " ".join(rng.choices(extended, weights=weights, k=words_per_doc))
+        for _ in range(num_docs)
+    ]
+
+def build_queries(num_queries: int, seed: int):
+    rng = random.Random(seed + 1)
+    return [
+        " ".join(rng.sample(VOCABULARY, k=rng.randint(3, 7)))
+        for _ in range(num_queries)
+    ]
+
+def time_queries(search, queries):
+    start = time.perf_counter()
+    for query in queries:
+        search(query)
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument(
+        "--words", type=int, default=300, help="Palabras por documento padre"
+    )
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.docs, args.words, args.seed)
+    queries = build_queries(args.queries, args.seed)
+
+    start = time.perf_counter()
+    okapi = BM25Okapi([tokenize(text) for text in corpus])
+    okapi_build = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        index = BM25InvertedIndex(Path(tmp))
+        index.add_documents((str(i), text) for i, text in enumerate(corpus))
+        matrix = SparseBM25Matrix.from_index(index)
+        sparse_build = time.perf_counter() - start
+
+    def okapi_search(query):
+        # Mismo patrón que BM25Retriever: scores de todo el corpus + orden completo
+        scores = okapi.get_scores(tokenize(query))
+        ranking = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)
+        return ranking[:args.k]
+
+    def sparse_search(query):
+        return matrix.top_k(query, args.k)
+
+    okapi_ms = time_queries(okapi_search, queries)
+    sparse_ms = time_queries(sparse_search, queries)
+
+    print(
+        f"Corpus: {args.docs} documentos x {args.words} palabras, "
+        f"{args.queries} consultas, k={args.k}"
+    )
+    print(f"{'Motor':<22}{'Construcción (s)':>18}{'Consulta (ms)':>16}")
+    print(f"{'rank_bm25 (Okapi)':<22}{okapi_build:>18.3f}{okapi_ms:>16.3f}")
+    print(f"{'CSR vectorizado':<22}{sparse_build:>18.3f}{sparse_ms:>16.3f}")
+    print(f"Aceleración por consulta: x{okapi_ms / sparse_ms:.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Throughput de embedding de ingesta (chunks/s) para dimensionar el hardware.
+
+Compara el embedding secuencial del modelo con BatchEmbedder para distintos
+tamaños de lote y número de réplicas.
+
+Uso:
+    python -m benchmarks.embedding_benchmark --chunks 2000 --workers 1 4 \
+        --batch-sizes 32 64
+"""
+import argparse
+import random
+import time
+
+from langchain_huggingface import HuggingFaceEmbeddings
+
+from benchmarks.bm25_benchmark import VOCABULARY
+from config.settings import settings
+from infrastructure.vector_store.batch_embedder import BatchEmbedder
+
+
+def build_chunks(num_chunks: int, seed: int):
+    rng = random.Random(seed)
+    # Longitudes variables, como los hijos de CHUNK_SIZE_CHILD caracteres de un PDF
+    return [
+        " ".join(rng.choices(VOCABULARY, k=rng.randint(5, 70)))
+        for _ in range(num_chunks)
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1])
+    parser.add_argument(
+        "--batch-sizes", type=int, nargs="+", default=[settings.EMBEDDING_BATCH_SIZE]
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    chunks = build_chunks(args.chunks, args.seed)
+    embeddings = HuggingFaceEmbeddings(
+        model_name=settings.EMBEDDING_MODEL,
+        model_kwargs={'device': 'cpu'},
+        encode_kwargs={'normalize_embeddings': False}
+    )
+
+    start = time.perf_counter()
+    embeddings.embed_documents(chunks)
+    baseline = args.chunks / (time.perf_counter() - start)
+
+    print(f"Modelo: {settings.EMBEDDING_MODEL}, {args.chunks} chunks")
+    print(f"{'Configuración':<28}{'chunks/s':>12}{'Aceleración':>14}")
+    print(f"{'secuencial (embed_documents)':<28}{baseline:>12.1f}{'x1.0':>14}")
+    settings.EMBEDDING_PARALLEL_MIN_CHUNKS = 0
+    for workers in args.workers:
+        for batch_size in args.batch_sizes:
+            embedder = BatchEmbedder(embeddings, batch_size=batch_size, workers=workers)
+            if workers > 1:
+                # Calentar el pool: la carga de las réplicas no cuenta como throughput
+                embedder.embed_documents(chunks[:workers * batch_size])
+            embedder.embed_documents(chunks)
+            rate = embedder.last_run["chunks_per_sec"]
+            embedder.close()
+            label = f"{workers} réplicas, lote {batch_size}"
+            print(f"{label:<28}{rate:>12.1f}{f'x{rate / baseline:.1f}':>14}")
+
+if __name__ == "__main__":
+    main()
@@ -23,6 +23,130 @@ class Settings:
     RETRIEVER_K_PARENT = 60
     RETRIEVER_K_BM25 = 30
     RERANKER_TOP_K = 5
+    RERANKER_MAX_BATCH_PAIRS = 256  # Micro-lotes entre peticiones concurrentes
+    RERANKER_MAX_WAIT_MS = 10
+    # "child": puntuar los hijos coincidentes (CHUNK_SIZE_CHILD) y agregar al padre;
+    # "parent": padre completo
+    RERANK_GRANULARITY = "child"
+    RERANK_CHILD_AGGREGATION = "max"  # "max" o "sum"
+    RERANK_CHILDREN_PER_PARENT = 3
+    # Cascada: poda por score de fusión, tramos en orden previo y salida anticipada
+    RERANK_MAX_CANDIDATES = 40
+    RERANK_PRUNE_MIN_RATIO = 0.3  # Score RRF mínimo relativo al primer candidato
+    RERANK_PRUNE_GAP = 0.3  # Corte si el score RRF cae más (relativo al primero)
+    RERANK_CASCADE_CHUNK = 8
+    RERANK_EARLY_EXIT_MARGIN = 1.0  # En unidades del score del CrossEncoder
+    # Caché de scores del reranker: (modelo, consulta normalizada, pasaje) -> score
+    RERANK_CACHE_ENABLED = True
+    RERANK_CACHE_MAX_ENTRIES = 50000  # LRU en memoria
+    RERANK_CACHE_DIR = "data/rerank_cache"  # Nivel en disco (None = sólo memoria)
+    RERANK_CACHE_DISK_MAX_ENTRIES = 1000000
+
+    # Recuperación híbrida: Reciprocal Rank Fusion ponderado (BM25 + denso)
+    HYBRID_WEIGHT_SPARSE = 0.4
+    HYBRID_WEIGHT_DENSE = 0.6
+    HYBRID_RRF_C = 60
+    RETRIEVAL_MAX_WORKERS = 8  # Pool compartido: dos ramas por consulta en curso
+    RETRIEVAL_BRANCH_TIMEOUT_S = 5.0
+
+    # BM25 (índice invertido persistente)
+    BM25_K1 = 1.5
+    BM25_B = 0.75
+    BM25_COMPACT_LOG_ENTRIES = 5000
+    # Ingestas agregadas a la matriz en caché antes de reconstruirla
+    BM25_MAX_SEGMENTS = 8
+
+    # Índice vectorial (FAISS): "auto", "flat", "hnsw", "ivf_flat" o "ivf_pq".
+    # En "auto" la sesión se promociona a VECTOR_INDEX_AUTO_TARGET al superar el umbral.
+    VECTOR_INDEX_MODE = "auto"
+    VECTOR_INDEX_AUTO_TARGET = "hnsw"
+    ANN_PROMOTION_THRESHOLD = 50000
+    HNSW_M = 32
+    HNSW_EF_CONSTRUCTION = 80
+    HNSW_EF_SEARCH = 128
+    IVF_MIN_LISTS = 16
+    IVF_NPROBE = 16
+    IVF_PQ_M = 16
+    IVF_PQ_NBITS = 8
+    IVF_RETRAIN_GROWTH = 4  # Reentrenar IVF/SQ8 cuando el corpus crece x veces
+
+    # Almacenamiento de vectores: "float32", "fp16" o "sq8" (cuantizados con
+    # producto interno)
+    VECTOR_STORAGE = "float32"
+    SQ8_MIN_TRAIN = 1000
+    # Re-puntuar la lista corta con la copia float32 en disco
+    VECTOR_EXACT_RESCORE = True
+    RESCORE_CANDIDATE_FACTOR = 4
+
+    # Apertura de índices grandes con mmap (sólo lectura, páginas compartidas
+    # entre procesos)
+    FAISS_MMAP_ENABLED = True
+    FAISS_MMAP_MIN_MB = 64
+
+    # Docstore de padres (SQLite). "zstd" requiere el paquete opcional `zstandard`
+    DOCSTORE_COMPRESSION = os.getenv("DOCSTORE_COMPRESSION") or None
+
+    # Carga de archivos en paralelo: LlamaParse (red) con concurrencia acotada y
+    # PyPDF en procesos
+    LLAMA_PARSE_MAX_CONCURRENCY = 4
+    PDF_LOADER_PROCESSES = (
+        int(os.getenv("PDF_LOADER_PROCESSES", "0")) or (os.cpu_count() or 1)
+    )
+
+    # Caché de parseo por contenido (SHA-256 del archivo + parser + opciones)
+    PARSE_CACHE_ENABLED = True
+    PARSE_CACHE_DIR = "data/parse_cache"
+    PARSE_CACHE_MAX_MB = 1024
+
+    # Ingesta por etapas: archivos en cola entre carga e indexado, páginas por lote
+    # y fragmentos hijos indexados entre cada guardado del índice en disco
+    INGEST_QUEUE_SIZE = 4
+    INGEST_BATCH_PAGES = 64
+    INGEST_COMMIT_CHUNKS = 2048
+
+    # Cola persistente de trabajos de ingesta (hilos en segundo plano, uno por
+    # proyecto a la vez)
+    INGEST_JOB_WORKERS = int(os.getenv("INGEST_JOB_WORKERS", "2"))
+    INGEST_JOBS_DIR = "data"
+    INGEST_JOB_POLL_SECONDS = 2
+    # Lease de un trabajo en curso: el servicio que lo tomó lo renueva cada
+    # INGEST_JOB_HEARTBEAT_SECONDS; sólo un lease vencido vuelve a la cola
+    INGEST_JOB_LEASE_SECONDS = 60
+    INGEST_JOB_HEARTBEAT_SECONDS = 15
+
+    # Embedding de ingesta: lotes por longitud y réplicas del modelo en procesos
+    # (1 = sin pool)
+    EMBEDDING_BATCH_SIZE = 64
+    EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", "1"))
+    EMBEDDING_PARALLEL_MIN_CHUNKS = 512
+
+    # Caché de embeddings por contenido (hash de modelo + texto), compartido por
+    # todas las sesiones
+    EMBEDDING_CACHE_ENABLED = True
+    EMBEDDING_CACHE_DIR = "data/embedding_cache"
+    EMBEDDING_CACHE_MAX_MB = 2048
+    # Caché LRU de vectores de consulta y agrupación de consultas concurrentes
+    QUERY_EMBEDDING_CACHE_SIZE = 4096
+    QUERY_EMBEDDING_MAX_BATCH = 32
+    QUERY_EMBEDDING_MAX_WAIT_MS = 5
+
+    # Búsqueda federada en todos los proyectos
+    FEDERATED_MAX_WORKERS = 4
+    FEDERATED_MAX_RESIDENT = 2  # Índices no cacheados cargados a la vez
+    FEDERATED_K_PER_SESSION = 10
+    FEDERATED_TOP_K = 10
+
+    # Búsqueda filtrada por metadatos: hasta este número de vectores se puntúan
+    # directamente
+    METADATA_FILTER_SCAN_MAX = 4096
+
+    # Caché de índices (compartido por todas las sesiones de Streamlit del proceso)
+    INDEX_CACHE_MAX_MB = 2048
+
+    # Caché de resultados de recuperación por sesión (consulta normalizada -> top K),
+    # invalidado por versión
+    RETRIEVAL_CACHE_ENABLED = True
+    RETRIEVAL_CACHE_MAX_ENTRIES = 256
     
     # LLM Configuration
     LLM_TEMPERATURE = 0.1
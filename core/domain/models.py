@@ -9,6 +9,14 @@ class RouteType(str, Enum):
     WALKTHROUGH = "WALKTHROUGH"
     ERROR = "ERROR"
 
+class JobStatus(str, Enum):
+    """Estados de un trabajo de ingesta en segundo plano."""
+    QUEUED = "queued"
+    PARSING = "parsing"
+    EMBEDDING = "embedding"
+    DONE = "done"
+    FAILED = "failed"
+
 @dataclass
 class SourceDocument:
     page_content: str
@@ -16,6 +24,95 @@ class SourceDocument:
     source_file: str = ""
     page_number: int = 0
 
+@dataclass
+class RetrievalCandidate:
+    """Documento padre candidato tras la fusión híbrida (antes de materializarlo)."""
+    doc_id: str
+    score: float
+    dense_rank: Optional[int] = None
+    sparse_rank: Optional[int] = None
+    # Fragmentos hijos que coincidieron
+    passages: List[str] = field(default_factory=list)
+
+@dataclass
+class RerankStats:
+    """Estadísticas del reranking en cascada de una consulta."""
+    candidates: int = 0
+    after_pruning: int = 0
+    scored_candidates: int = 0
+    pairs_scored: int = 0
+    chunks: int = 0
+    early_exit: bool = False
+
+@dataclass
+class FileLoadResult:
+    """
+    Resultado de cargar un archivo: documentos, parser usado, tiempo y error (si lo
+    hubo).
+    """
+    file_path: str
+    filename: str
+    documents: List[Any] = field(default_factory=list)
+    parser: Optional[str] = None
+    seconds: float = 0.0
+    error: Optional[str] = None
+    cached: bool = False  # Resultado tomado del caché de parseo
+
+@dataclass
+class IngestionProgress:
+    """
+    Avance de una ingesta por etapas (se emite tras cada archivo y cada lote
+    indexado).
+    """
+    stage: str
+    files_total: int
+    files_done: int = 0
+    pages_loaded: int = 0
+    chunks_indexed: int = 0
+    filename: Optional[str] = None
+    failed_files: List[str] = field(default_factory=list)
+    # Archivo fallido -> error
+    file_errors: Dict[str, str] = field(default_factory=dict)
+
+@dataclass
+class IngestionJob:
+    """
+    Trabajo de ingesta persistido: archivos ya guardados de una sesión y su
+    avance.
+    """
+    id: str
+    session_id: str
+    session_path: str
+    filenames: List[str]
+    file_paths: List[str]
+    status: str = JobStatus.QUEUED.value
+    created_at: str = ""
+    updated_at: str = ""
+    attempts: int = 0
+    files_done: int = 0
+    pages_loaded: int = 0
+    chunks_indexed: int = 0
+    failed_files: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    # Servicio que lo está procesando y vencimiento de su lease (epoch)
+    worker_id: Optional[str] = None
+    lease_expires_at: Optional[float] = None
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in (
+            JobStatus.QUEUED.value, JobStatus.PARSING.value, JobStatus.EMBEDDING.value
+        )
+
+@dataclass
+class FederatedSearchResult:
+    """Resultado de una búsqueda en todos los proyectos, con el proyecto de origen."""
+    session_id: str
+    session_name: str
+    document: SourceDocument
+    score: float
+    session_rank: int  # Posición del documento dentro de su proyecto (0 = primero)
+
 @dataclass
 class ChatResponse:
     answer: str
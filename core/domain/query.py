@@ -0,0 +1,9 @@
+import re
+import unicodedata
+
+
+def normalize_query(query: str) -> str:
+    """Forma canónica: sin mayúsculas, tildes, signos ni espacios repetidos."""
+    decomposed = unicodedata.normalize("NFKD", query.casefold())
+    unaccented = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(re.findall(r"\w+", unaccented))
@@ -1,7 +1,18 @@
 from abc import ABC, abstractmethod
-from typing import List, Any
+from typing import Any, Iterator, List
+from core.domain.models import FileLoadResult
 
 class DocumentLoaderRepository(ABC):
     @abstractmethod
     def load_documents(self, file_paths: List[str]) -> List[Any]:
         pass
+
+    @abstractmethod
+    def load_files(self, file_paths: List[str]) -> List[FileLoadResult]:
+        """Carga cada archivo por separado; resultados en el orden de entrada."""
+        pass
+
+    @abstractmethod
+    def iter_files(self, file_paths: List[str]) -> Iterator[FileLoadResult]:
+        """Como `load_files`, pero entrega cada resultado en cuanto está listo."""
+        pass
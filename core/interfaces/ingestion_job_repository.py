@@ -0,0 +1,56 @@
+from abc import ABC, abstractmethod
+from typing import Any, List, Optional
+
+from core.domain.models import IngestionJob
+
+
+class IngestionJobRepository(ABC):
+    """Interfaz para la cola persistente de trabajos de ingesta."""
+
+    @abstractmethod
+    def create_job(
+        self,
+        session_id: str,
+        session_path: str,
+        filenames: List[str],
+        file_paths: List[str]
+    ) -> IngestionJob:
+        """Encola un trabajo nuevo y lo retorna."""
+        pass
+
+    @abstractmethod
+    def claim_next_job(self, worker_id: str) -> Optional[IngestionJob]:
+        """
+        Toma el trabajo en cola más antiguo de una sesión sin otro trabajo en curso
+        y lo marca como iniciado por `worker_id`, con un lease nuevo. None si no
+        hay ninguno disponible.
+        """
+        pass
+
+    @abstractmethod
+    def renew_leases(self, worker_id: str) -> int:
+        """Extiende el lease de los trabajos en curso de `worker_id`."""
+        pass
+
+    @abstractmethod
+    def update_job(self, job_id: str, **fields: Any) -> None:
+        """Actualiza el estado o el avance de un trabajo."""
+        pass
+
+    @abstractmethod
+    def get_job(self, job_id: str) -> Optional[IngestionJob]:
+        """Obtiene un trabajo por su ID."""
+        pass
+
+    @abstractmethod
+    def list_jobs(self, session_id: str, limit: int = 10) -> List[IngestionJob]:
+        """Trabajos de una sesión, del más reciente al más antiguo."""
+        pass
+
+    @abstractmethod
+    def requeue_expired(self) -> int:
+        """
+        Vuelve a encolar los trabajos en curso cuyo lease venció (el proceso que
+        los tomó se interrumpió).
+        """
+        pass
@@ -0,0 +1,9 @@
+from abc import ABC, abstractmethod
+from typing import List, Sequence
+
+
+class RerankerRepository(ABC):
+    @abstractmethod
+    def score(self, query: str, passages: Sequence[str]) -> List[float]:
+        """Puntúa la relevancia de cada pasaje para la consulta (mayor es mejor)."""
+        pass
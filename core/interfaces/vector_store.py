@@ -1,16 +1,74 @@
 from abc import ABC, abstractmethod
-from typing import List, Any, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
 class VectorStoreRepository(ABC):
     @abstractmethod
-    def get_vector_db(self, session_path: str) -> Tuple[Any, Any]:
+    def get_vector_db(
+        self, session_path: str, transient: bool = False
+    ) -> Tuple[Any, Any]:
+        """Componentes del índice de la sesión; con `transient` no entran al caché."""
+        pass
+
+    @abstractmethod
+    def release_vector_db(self, retriever: Any) -> None:
+        """Libera los recursos de componentes obtenidos con `transient`."""
+        pass
+
+    @abstractmethod
+    def is_cached(self, session_path: str) -> bool:
+        """Indica si el índice vigente de la sesión ya está cargado en memoria."""
         pass
 
     @abstractmethod
     def add_documents(self, session_path: str, new_documents: List[Any]) -> Tuple[Any, Any]:
         pass
 
+    @abstractmethod
+    def add_documents_stream(
+        self,
+        session_path: str,
+        batches: Iterable[List[Any]],
+        on_progress: Optional[Callable[[int], None]] = None
+    ) -> Tuple[Any, Any]:
+        """
+        Indexa lotes de documentos a medida que llegan, guardando el índice cada
+        cierto número de fragmentos. `on_progress` recibe los fragmentos indexados.
+        """
+        pass
+
+    @abstractmethod
+    def get_hybrid_retriever(self, retriever: Any, bm25_retriever: Any) -> Any:
+        """Retriever híbrido (fusión BM25 + denso) para los componentes dados."""
+        pass
+
+    @abstractmethod
+    def similarity_search(
+        self,
+        retriever: Any,
+        query: str,
+        k: int,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Any]:
+        """
+        Fragmentos más similares a la consulta. `filters` restringe por metadatos
+        (source_file, parser, type, page) antes de buscar.
+        """
+        pass
+
     @abstractmethod
     def clear_index(self, session_path: str) -> bool:
         """Elimina y limpia el índice vectorial y el almacenamiento de documentos."""
         pass
+
+    @abstractmethod
+    def copy_index(self, source_path: str, target_path: str) -> None:
+        """
+        Copia el índice completo de una sesión (vectores, docstore, BM25,
+        metadatos) a otra.
+        """
+        pass
+
+    @abstractmethod
+    def delete_documents_by_source(self, session_path: str, source_file: str) -> bool:
+        """Elimina del índice sólo las entradas de un archivo; False si no se puede."""
+        pass
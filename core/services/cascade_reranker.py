@@ -0,0 +1,105 @@
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from config.settings import settings
+from core.domain.models import RerankStats, RetrievalCandidate
+from core.interfaces.reranker import RerankerRepository
+
+logger = logging.getLogger(__name__)
+
+class CascadeReranker:
+    """
+    Reranking en cascada sobre los candidatos de la fusión híbrida.
+
+    1. Poda: descarta candidatos con score de fusión muy inferior al primero o
+       tras un salto brusco de score (siempre conserva al menos top K).
+    2. Puntúa por tramos en el orden previo de la fusión.
+    3. Salida anticipada: se detiene cuando un tramo no altera el top K y su mejor
+       score queda por debajo del K-ésimo menos un margen.
+    """
+    def __init__(self, reranker: RerankerRepository, top_k: Optional[int] = None):
+        self.reranker = reranker
+        self.top_k = top_k or settings.RERANKER_TOP_K
+        self.chunk_size = settings.RERANK_CASCADE_CHUNK
+        self.margin = settings.RERANK_EARLY_EXIT_MARGIN
+        self.min_ratio = settings.RERANK_PRUNE_MIN_RATIO
+        self.max_gap = settings.RERANK_PRUNE_GAP
+        self.max_candidates = settings.RERANK_MAX_CANDIDATES
+        self.aggregate = sum if settings.RERANK_CHILD_AGGREGATION == "sum" else max
+
+    def prune(self, candidates: List[RetrievalCandidate]) -> List[RetrievalCandidate]:
+        """Poda por score de fusión (ratio respecto al primero) y por salto de score."""
+        if len(candidates) <= self.top_k:
+            return candidates
+        best = candidates[0].score
+        kept = candidates[:self.top_k]
+        pairs = zip(candidates[self.top_k - 1:], candidates[self.top_k:])
+        for previous, candidate in pairs:
+            if len(kept) >= self.max_candidates:
+                break
+            if candidate.score < best * self.min_ratio:
+                break
+            if self.max_gap and previous.score - candidate.score > best * self.max_gap:
+                break
+            kept.append(candidate)
+        return kept
+
+    def _candidate_score(
+        self, candidate: RetrievalCandidate, passage_scores: Dict[str, float]
+    ) -> float:
+        # Un candidato sin pasajes no se descarta: queda detrás de los puntuados
+        if not candidate.passages:
+            return float("-inf")
+        return float(self.aggregate(passage_scores[p] for p in candidate.passages))
+
+    def rerank(
+        self,
+        query: str,
+        candidates: List[RetrievalCandidate],
+        already_pruned: bool = False
+    ) -> Tuple[List[Tuple[float, RetrievalCandidate]], RerankStats]:
+        """
+        Puntúa los candidatos (sus `passages`) por tramos y retorna el top K como
+        pares (score, candidato), junto con las estadísticas de la consulta. Con
+        `already_pruned` se omite la poda (el llamador ya la aplicó).
+        """
+        stats = RerankStats(candidates=len(candidates))
+        pruned = candidates if already_pruned else self.prune(candidates)
+        stats.after_pruning = len(pruned)
+
+        passage_scores: Dict[str, float] = {}
+        scored: List[Tuple[float, RetrievalCandidate]] = []
+        for start in range(0, len(pruned), self.chunk_size):
+            chunk = pruned[start:start + self.chunk_size]
+            new_passages = list(dict.fromkeys(
+                p for c in chunk for p in c.passages if p not in passage_scores
+            ))
+            if new_passages:
+                scores = self.reranker.score(query, new_passages)
+                passage_scores.update(zip(new_passages, scores))
+                stats.pairs_scored += len(new_passages)
+            stats.chunks += 1
+
+            previous_top = {id(c) for _, c in scored[:self.top_k]}
+            chunk_scored = [
+                (self._candidate_score(c, passage_scores), c) for c in chunk
+            ]
+            scored.extend(chunk_scored)
+            scored.sort(key=lambda item: item[0], reverse=True)
+            stats.scored_candidates += len(chunk_scored)
+
+            if len(scored) >= self.top_k and start > 0 and chunk_scored:
+                top_stable = {id(c) for _, c in scored[:self.top_k]} == previous_top
+                kth_score = scored[self.top_k - 1][0]
+                chunk_best = max(s for s, _ in chunk_scored)
+                if top_stable and chunk_best < kth_score - self.margin:
+                    stats.early_exit = start + self.chunk_size < len(pruned)
+                    break
+
+        logger.info(
+            f"Rerank en cascada: {stats.candidates} candidatos, "
+            f"{stats.after_pruning} tras poda, {stats.scored_candidates} puntuados "
+            f"({stats.pairs_scored} pares, {stats.chunks} tramos)"
+            f"{', salida anticipada' if stats.early_exit else ''}"
+        )
+        return scored[:self.top_k], stats
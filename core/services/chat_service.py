@@ -1,13 +1,17 @@
-from typing import List, Any, Tuple, Optional, Generator
-from langchain_classic.retrievers import EnsembleRetriever
-from sentence_transformers import CrossEncoder
+from typing import List, Any, Tuple, Optional, Generator, Dict
 from langchain_core.documents import Document
 from core.interfaces.llm_provider import LLMProvider
 from core.interfaces.vector_store import VectorStoreRepository
 from core.interfaces.document_loader import DocumentLoaderRepository
 from core.interfaces.router import RouterRepository
-from core.domain.models import ChatResponse, SourceDocument, LLMProviderError, RouteType
+from core.interfaces.reranker import RerankerRepository
+from core.domain.models import (
+    ChatResponse, SourceDocument, LLMProviderError, RouteType, RerankStats,
+    RetrievalCandidate
+)
+from core.services.cascade_reranker import CascadeReranker
 from core.services.prompt_manager import PromptManager
+from core.domain.query import normalize_query
 from config.settings import settings
 import logging
 
@@ -24,7 +28,8 @@ class ChatService:
         vector_store_repo: VectorStoreRepository,
         document_loader: DocumentLoaderRepository,
         router_repo: RouterRepository,
-        prompt_manager: PromptManager
+        prompt_manager: PromptManager,
+        reranker: Optional[RerankerRepository] = None
     ):
         self.llm_provider = llm_provider
         self.vector_store_repo = vector_store_repo
@@ -33,12 +38,10 @@ class ChatService:
         self.prompt_manager = prompt_manager
         self.vector_store = None
         self.bm25_retriever = None
-        # Inicializamos Reranker Multilingüe Ligero
-        try:
-            self.reranker = CrossEncoder(settings.RERANKER_MODEL, device='cpu')
-        except Exception as e:
-            logger.warning(f"Error cargando reranker: {e}")
-            self.reranker = None
+        # Reranker compartido por el proceso (se inyecta, no se carga por instancia)
+        self.reranker = reranker
+        self.cascade = CascadeReranker(reranker) if reranker else None
+        self.last_rerank_stats: Optional[RerankStats] = None
 
     def _rerank_documents(self, query: str, docs: List[Document]) -> List[Document]:
         """
@@ -54,22 +57,28 @@ class ChatService:
         if not docs:
             return []
             
-        # Eliminar duplicados basados en contenido antes del reranking
+        # Eliminar duplicados antes del reranking: por id estable del padre (o por
+        # contenido si el documento no lo trae) y acotar el conjunto de candidatos
         unique_docs = []
-        seen_content = set()
+        seen = set()
         for doc in docs:
-            if doc.page_content not in seen_content:
+            key = doc.id if doc.id is not None else hash(doc.page_content)
+            if key not in seen:
                 unique_docs.append(doc)
-                seen_content.add(doc.page_content)
+                seen.add(key)
+        unique_docs = unique_docs[:settings.RERANK_MAX_CANDIDATES]
         
         if not unique_docs or not self.reranker:
             return unique_docs[:settings.RERANKER_TOP_K]
 
-        # Preparar pares para el CrossEncoder
-        pairs = [[query, doc.page_content] for doc in unique_docs]
-        
-        # Predecir scores
-        scores = self.reranker.predict(pairs)
+        # Predecir scores (el servicio agrupa en lotes las peticiones concurrentes)
+        try:
+            scores = self.reranker.score(
+                query, [doc.page_content for doc in unique_docs]
+            )
+        except Exception as e:
+            logger.warning(f"Error en reranking, se usa el orden de recuperación: {e}")
+            return unique_docs[:settings.RERANKER_TOP_K]
         
         # Asignar scores a metadata y ordenar
         for doc, score in zip(unique_docs, scores):
@@ -81,6 +90,79 @@ class ChatService:
         # Retornar top K
         return scored_docs[:settings.RERANKER_TOP_K]
 
+    def _rerank_candidates(
+        self,
+        query: str,
+        hybrid_retriever: Any,
+        cascade: CascadeReranker,
+        use_children: bool = True
+    ) -> List[Document]:
+        """
+        Reranking en cascada de los candidatos de la fusión híbrida.
+        Con `use_children` se puntúan los hijos (CHUNK_SIZE_CHILD) que coincidieron
+        con la consulta y su score se agrega al padre (max o sum); sólo se leen del
+        docstore los padres del top K final. Sin él, se puntúa el padre completo.
+        """
+        candidates = hybrid_retriever.search(query, with_passages=use_children)
+        if not candidates:
+            return []
+
+        num_candidates = len(candidates)
+        if not use_children:
+            # Sólo se leen los padres que sobreviven a la poda, sin duplicados de
+            # contenido
+            candidates = cascade.prune(candidates)
+            docs_by_id = {
+                doc.id: doc for doc in hybrid_retriever.materialize(candidates)
+            }
+            seen_content = set()
+            unique_candidates = []
+            for candidate in candidates:
+                doc = docs_by_id.get(candidate.doc_id)
+                if doc is not None and doc.page_content not in seen_content:
+                    seen_content.add(doc.page_content)
+                    candidate.passages = [doc.page_content]
+                    unique_candidates.append(candidate)
+            candidates = unique_candidates
+
+        try:
+            top, stats = cascade.rerank(
+                query, candidates, already_pruned=not use_children
+            )
+            stats.candidates = num_candidates
+            self.last_rerank_stats = stats
+        except Exception as e:
+            logger.warning(f"Error en reranking, se usa el orden de recuperación: {e}")
+            return hybrid_retriever.materialize(candidates[:settings.RERANKER_TOP_K])
+
+        docs = hybrid_retriever.materialize([candidate for _, candidate in top])
+        scores_by_id = {candidate.doc_id: score for score, candidate in top}
+        for doc in docs:
+            doc.metadata['score'] = float(scores_by_id.get(doc.id, 0.0))
+        return docs
+
+    def _result_cache_key(self, query: str) -> str:
+        """Clave del caché de resultados: consulta normalizada + modo de reranking."""
+        mode = settings.RERANK_GRANULARITY if self.cascade else "retrieval"
+        return f"{mode}:{normalize_query(query)}"
+
+    def _cached_top_docs(
+        self, hybrid_retriever: Any, cache_key: str
+    ) -> Optional[List[Document]]:
+        """Top K guardado para la versión vigente del índice (sólo lee los padres)."""
+        cached = hybrid_retriever.result_cache.get(cache_key, hybrid_retriever.version)
+        if cached is None:
+            return None
+        docs = hybrid_retriever.materialize([
+            RetrievalCandidate(doc_id=doc_id, score=0.0) for doc_id, _ in cached
+        ])
+        if len(docs) != len(cached):
+            return None
+        for doc, (_, score) in zip(docs, cached):
+            if score is not None:
+                doc.metadata['score'] = score
+        return docs
+
     def _retrieve_documents(self, query: str) -> Tuple[List[SourceDocument], str]:
         """
         Recupera y reordena documentos relevantes para la consulta.
@@ -91,16 +173,36 @@ class ChatService:
         if not self.vector_store or not self.bm25_retriever:
             return [], ""
 
-        # Ensemble Retriever
-        ensemble_retriever = EnsembleRetriever(
-            retrievers=[self.bm25_retriever, self.vector_store],
-            weights=[0.4, 0.6]
+        # Retriever híbrido (BM25 + denso con RRF), memoizado por versión del índice
+        hybrid_retriever = self.vector_store_repo.get_hybrid_retriever(
+            self.vector_store, self.bm25_retriever
         )
-        
-        initial_docs = ensemble_retriever.invoke(query)
-        
-        # Reranking Avanzado
-        top_docs = self._rerank_documents(query, initial_docs)
+
+        # Consultas repetidas sobre el mismo índice: se reutiliza el top K ya calculado
+        result_cache = getattr(hybrid_retriever, "result_cache", None)
+        cache_key = self._result_cache_key(query) if result_cache is not None else None
+        top_docs = (
+            self._cached_top_docs(hybrid_retriever, cache_key) if cache_key else None
+        )
+
+        if top_docs is None:
+            # Reranking Avanzado
+            if self.cascade:
+                top_docs = self._rerank_candidates(
+                    query,
+                    hybrid_retriever,
+                    self.cascade,
+                    use_children=settings.RERANK_GRANULARITY == "child"
+                )
+            else:
+                initial_docs = hybrid_retriever.invoke(query)
+                top_docs = self._rerank_documents(query, initial_docs)
+
+            if cache_key and top_docs and all(doc.id for doc in top_docs):
+                result_cache.put(
+                    cache_key, hybrid_retriever.version,
+                    [(doc.id, doc.metadata.get('score')) for doc in top_docs]
+                )
         
         # Prepare context string
         context_parts = []
@@ -232,10 +334,11 @@ class ChatService:
             def error_gen(): yield f"Ocurrió un error procesando tu solicitud: {str(e)}"
             return error_gen(), [], RouteType.ERROR
     
-    def generate_context_summary(self) -> str:
+    def generate_context_summary(self, filters: Optional[Dict[str, Any]] = None) -> str:
         """
         Genera un resumen ejecutivo del contexto actual almacenado en la base vectorial.
         Utiliza una búsqueda amplia para obtener una muestra representativa del contenido.
+        `filters` limita el resumen a ciertos metadatos (p. ej. un solo manual).
         """
         if not self.vector_store:
             return "No hay contexto disponible para analizar. Por favor carga documentos primero."
@@ -243,11 +346,12 @@ class ChatService:
         try:
             # 1. Recuperar una muestra amplia de documentos
             # Aumentamos k para tener más contexto y reducimos el riesgo de perder info clave
-            # Usamos una query que busque estructura documental
-            # Accedemos al vectorstore subyacente porque ParentDocumentRetriever no tiene similarity_search
-            docs = self.vector_store.vectorstore.similarity_search(
+            # Query que busca estructura documental (sobre los fragmentos hijos)
+            docs = self.vector_store_repo.similarity_search(
+                self.vector_store,
                 "objetivo alcance definiciones responsabilidades procedimiento", 
-                k=15
+                k=15,
+                filters=filters
             )
             
             if not docs:
@@ -269,17 +373,26 @@ class ChatService:
             logger.error(f"Error generando resumen de contexto: {e}")
             return f"No se pudo generar el resumen del contexto debido a un error: {str(e)}"
 
-    def generate_quiz(self, topic: str, difficulty: str, num_questions: int) -> str:
+    def generate_quiz(
+        self,
+        topic: str,
+        difficulty: str,
+        num_questions: int,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> str:
         """
         Genera un cuestionario de opción múltiple basado en el contexto disponible.
+        Con `filters` el contexto sale sólo de los fragmentos que cumplen esos
+        metadatos (p. ej. {"source_file": "PR-01.pdf"} o {"type": "qa_insight"}).
         Retorna un string JSON con las preguntas.
         """
         try:
             # 1. Recuperar contexto relevante para el tema
             context_str = ""
             if self.vector_store:
-                # Accedemos al vectorstore subyacente porque ParentDocumentRetriever no tiene similarity_search
-                docs = self.vector_store.vectorstore.similarity_search(topic, k=8)
+                docs = self.vector_store_repo.similarity_search(
+                    self.vector_store, topic, k=8, filters=filters
+                )
                 context_str = "\n\n".join([d.page_content for d in docs])
             
             if not context_str:
@@ -1,10 +1,12 @@
 import logging
 from datetime import datetime
-from typing import List, Any, Tuple, Optional
+from typing import List, Any, Callable, Tuple, Optional
 from langchain_core.documents import Document
+from core.domain.models import IngestionProgress
 from core.interfaces.document_loader import DocumentLoaderRepository
 from core.interfaces.vector_store import VectorStoreRepository
 from core.interfaces.file_storage import FileStorageRepository
+from core.services.ingestion_pipeline import IngestionPipeline
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +17,7 @@ class DocumentService:
     def __init__(self, doc_loader: DocumentLoaderRepository, file_storage: FileStorageRepository) -> None:
         self.doc_loader = doc_loader
         self.file_storage = file_storage
+        self.ingestion_pipeline = IngestionPipeline(doc_loader)
 
     def ingest_text_as_document(
         self, 
@@ -52,35 +55,52 @@ class DocumentService:
             logger.error(f"Error ingesting text document: {e}")
             return False
 
+    def save_uploaded_files(
+        self, uploaded_files: List[Any], session_path: str
+    ) -> List[str]:
+        """Guarda permanentemente los archivos subidos y retorna sus rutas."""
+        file_paths: List[str] = []
+        for uploaded_file in uploaded_files:
+            # Usar el repositorio de almacenamiento para guardar el archivo
+            file_path = self.file_storage.save_file(
+                session_path, uploaded_file.name, uploaded_file
+            )
+            file_paths.append(file_path)
+        return file_paths
+
+    def ingest_files(
+        self,
+        file_paths: List[str],
+        session_path: str,
+        vector_repo: VectorStoreRepository,
+        on_progress: Optional[Callable[[IngestionProgress], None]] = None
+    ) -> Tuple[Optional[Any], Optional[Any], int]:
+        """
+        Indexa archivos ya guardados en la sesión. La ingesta es por etapas y lotes
+        (ver IngestionPipeline); `on_progress` recibe el avance tras cada archivo
+        cargado y cada lote indexado. Los errores se propagan al llamador.
+        """
+        if not file_paths:
+            return None, None, 0
+        # Cargar, dividir, embeber e indexar por lotes (un archivo fallido no detiene
+        # al resto)
+        return self.ingestion_pipeline.run(
+            file_paths, session_path, vector_repo, on_progress
+        )
+
     def process_and_ingest_files(
         self, 
         uploaded_files: List[Any], 
         session_path: str, 
-        vector_repo: VectorStoreRepository
+        vector_repo: VectorStoreRepository,
+        on_progress: Optional[Callable[[IngestionProgress], None]] = None
     ) -> Tuple[Optional[Any], Optional[Any], int]:
         """
         Procesa archivos subidos, los guarda permanentemente y actualiza el repositorio vectorial.
         """
-        file_paths: List[str] = []
-        
         try:
-            for uploaded_file in uploaded_files:
-                # Usar el repositorio de almacenamiento para guardar el archivo
-                file_path = self.file_storage.save_file(session_path, uploaded_file.name, uploaded_file)
-                file_paths.append(file_path)
-            
-            if not file_paths:
-                return None, None, 0
-
-            # Cargar y procesar documentos
-            chunks = self.doc_loader.load_documents(file_paths)
-            
-            if chunks:
-                new_retriever, new_bm25 = vector_repo.add_documents(session_path, chunks)
-                return new_retriever, new_bm25, len(chunks)
-            else:
-                return None, None, 0
-                
+            file_paths = self.save_uploaded_files(uploaded_files, session_path)
+            return self.ingest_files(file_paths, session_path, vector_repo, on_progress)
         except Exception as e:
             logger.error(f"Error processing files: {e}")
             return None, None, 0
@@ -91,20 +111,29 @@ class DocumentService:
 
     def delete_file(self, session_path: str, filename: str, vector_repo: VectorStoreRepository) -> bool:
         """
-        Elimina un archivo y reconstruye el índice vectorial.
-        Estrategia: Borrado físico + Reconstrucción total (Clean Rebuild).
+        Elimina un archivo y sus entradas del índice vectorial.
+        Estrategia: Borrado físico + Borrado incremental de sus entradas; si el
+        repositorio no lo consigue, Reconstrucción total (Clean Rebuild).
         """
         try:
             # 1. Borrar archivo físico usando el repositorio
             if not self.file_storage.delete_file(session_path, filename):
                  logger.warning(f"Advertencia: El archivo {filename} no se pudo borrar o no existía, pero se procederá a limpiar el índice.")
-            
-            # 2. Limpiar índices vectoriales (Delegado al repositorio)
+
+            # 2. Borrado incremental: sólo los vectores, padres y entradas BM25
+            if vector_repo.delete_documents_by_source(session_path, filename):
+                return True
+            logger.warning(
+                f"Borrado incremental de {filename} no disponible; "
+                "se reconstruye el índice completo."
+            )
+
+            # 3. Limpiar índices vectoriales (Delegado al repositorio)
             if not vector_repo.clear_index(session_path):
                 logger.error("Error al limpiar el índice vectorial.")
                 return False
             
-            # 3. Re-indexar todos los archivos restantes
+            # 4. Re-indexar todos los archivos restantes
             remaining_filenames = self.file_storage.list_files(session_path)
             
             if not remaining_filenames:
@@ -116,9 +145,9 @@ class DocumentService:
             remaining_files_paths = [self.file_storage.get_file_path(session_path, f) for f in remaining_filenames]
 
             # Cargar y procesar documentos restantes
-            chunks = self.doc_loader.load_documents(remaining_files_paths)
-            if chunks:
-                vector_repo.add_documents(session_path, chunks)
+            self.ingestion_pipeline.run(
+                remaining_files_paths, session_path, vector_repo
+            )
                 
             return True
         except Exception as e:
@@ -0,0 +1,151 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from config.settings import settings
+from core.domain.models import FederatedSearchResult, RetrievalCandidate, SourceDocument
+from core.interfaces.reranker import RerankerRepository
+from core.interfaces.session_repository import SessionRepository
+from core.interfaces.vector_store import VectorStoreRepository
+from core.services.cascade_reranker import CascadeReranker
+
+logger = logging.getLogger(__name__)
+
+class FederatedSearchService:
+    """
+    Búsqueda en todos los proyectos (sesiones) a la vez.
+
+    Cada proyecto es un fragmento independiente: la consulta se lanza en paralelo
+    contra el índice híbrido de cada uno y se fusionan sus top K en un ranking
+    global. Los índices que ya están en el caché se consultan directamente; el
+    resto se carga sin entrar al caché y como máximo `max_resident` a la vez, así
+    que una búsqueda federada no expulsa las sesiones que se están usando.
+
+    Con reranker, los candidatos de todos los proyectos se puntúan juntos (scores
+    comparables entre proyectos). Sin él, se ordenan por el score de fusión RRF,
+    que sólo depende de la posición en cada proyecto.
+    """
+    def __init__(
+        self,
+        session_repo: SessionRepository,
+        vector_repo: VectorStoreRepository,
+        reranker: Optional[RerankerRepository] = None,
+        max_workers: Optional[int] = None,
+        max_resident: Optional[int] = None
+    ):
+        self.session_repo = session_repo
+        self.vector_repo = vector_repo
+        self.reranker = reranker
+        self.max_workers = max_workers or settings.FEDERATED_MAX_WORKERS
+        self._resident = threading.Semaphore(
+            max_resident or settings.FEDERATED_MAX_RESIDENT
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="federated"
+        )
+
+    def _search_session(
+        self, session: Dict[str, Any], query: str, k: int
+    ) -> List[Tuple[RetrievalCandidate, Any]]:
+        session_path = self.session_repo.get_session_path(session["id"])
+        if self.vector_repo.is_cached(session_path):
+            return self._search_index(session_path, query, k)
+        with self._resident:
+            return self._search_index(session_path, query, k, transient=True)
+
+    def _search_index(
+        self, session_path: str, query: str, k: int, transient: bool = False
+    ) -> List[Tuple[RetrievalCandidate, Any]]:
+        retriever, bm25_retriever = self.vector_repo.get_vector_db(
+            session_path, transient=transient
+        )
+        try:
+            hybrid_retriever = self.vector_repo.get_hybrid_retriever(
+                retriever, bm25_retriever
+            )
+            with_passages = self.reranker is not None
+            candidates = hybrid_retriever.search(
+                query, with_passages=with_passages
+            )[:k]
+            docs_by_id = {
+                doc.id: doc for doc in hybrid_retriever.materialize(candidates)
+            }
+        finally:
+            # Los índices leídos fuera del caché no conservan su conexión
+            if transient:
+                self.vector_repo.release_vector_db(retriever)
+        for candidate in candidates:
+            if not candidate.passages and candidate.doc_id in docs_by_id:
+                candidate.passages = [docs_by_id[candidate.doc_id].page_content]
+        return [(c, docs_by_id[c.doc_id]) for c in candidates if c.doc_id in docs_by_id]
+
+    def search(
+        self,
+        query: str,
+        top_k: Optional[int] = None,
+        session_ids: Optional[Sequence[str]] = None,
+        k_per_session: Optional[int] = None
+    ) -> List[FederatedSearchResult]:
+        """
+        Busca `query` en todos los proyectos con documentos (o sólo en `session_ids`)
+        y retorna el top K global con el proyecto de origen de cada documento.
+        """
+        top_k = top_k or settings.FEDERATED_TOP_K
+        k_per_session = k_per_session or settings.FEDERATED_K_PER_SESSION
+        sessions = [
+            s for s in self.session_repo.list_sessions()
+            if s.get("files") and (session_ids is None or s["id"] in session_ids)
+        ]
+        if not sessions:
+            return []
+
+        futures = {
+            s["id"]: self._executor.submit(
+                self._search_session, s, query, k_per_session
+            )
+            for s in sessions
+        }
+        origin: Dict[int, Tuple[Dict[str, Any], int, Any]] = {}
+        merged: List[RetrievalCandidate] = []
+        for session in sessions:
+            try:
+                shard = futures[session["id"]].result()
+            except Exception as e:
+                logger.warning(
+                    f"Búsqueda federada: se omite el proyecto {session['id']}: {e}"
+                )
+                continue
+            for rank, (candidate, doc) in enumerate(shard):
+                origin[id(candidate)] = (session, rank, doc)
+                merged.append(candidate)
+
+        # Orden previo global por score de fusión; a igual score se intercalan los
+        # proyectos
+        merged.sort(key=lambda c: (-c.score, origin[id(c)][1]))
+        if self.reranker is not None:
+            cascade = CascadeReranker(self.reranker, top_k=top_k)
+            ranked, _ = cascade.rerank(query, merged)
+        else:
+            ranked = [(c.score, c) for c in merged[:top_k]]
+
+        results = []
+        for score, candidate in ranked:
+            session, rank, doc = origin[id(candidate)]
+            results.append(FederatedSearchResult(
+                session_id=session["id"],
+                session_name=session.get("name", ""),
+                document=SourceDocument(
+                    page_content=doc.page_content,
+                    metadata=doc.metadata,
+                    source_file=doc.metadata.get("source_file", "unknown"),
+                    page_number=doc.metadata.get("page", 0)
+                ),
+                score=float(score),
+                session_rank=rank
+            ))
+        logger.info(
+            f"Búsqueda federada: {len(sessions)} proyectos, {len(merged)} candidatos, "
+            f"{len(results)} resultados"
+        )
+        return results
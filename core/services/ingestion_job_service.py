@@ -0,0 +1,188 @@
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Any, List, Optional
+
+from config.settings import settings
+from core.domain.models import IngestionJob, IngestionProgress, JobStatus
+from core.interfaces.ingestion_job_repository import IngestionJobRepository
+from core.interfaces.session_repository import SessionRepository
+from core.interfaces.vector_store import VectorStoreRepository
+from core.services.document_service import DocumentService
+
+logger = logging.getLogger(__name__)
+
+class IngestionJobService:
+    """
+    Ingesta en segundo plano, desacoplada de la ejecución del script de Streamlit.
+
+    Cada subida se guarda en disco y se registra como un trabajo en la cola
+    persistente; un grupo de `max_workers` hilos la vacía (carga, embedding e
+    índice vía `DocumentService.ingest_files`) y va guardando el estado y el avance
+    del trabajo, que la UI consulta periódicamente. Un proyecto procesa sus
+    trabajos de a uno (escriben el mismo índice), pero varios proyectos ingieren a
+    la vez; el índice en caché sigue respondiendo al chat mientras tanto.
+
+    Cada servicio tiene su propio `worker_id` y renueva el lease de los trabajos
+    que procesa desde un hilo de heartbeat. Otro proceso (o un servicio
+    recreado) que comparte la cola no los toca mientras el lease siga vigente;
+    los de un proceso caído vuelven a la cola cuando su lease vence y, antes de
+    repetirlos, se quita del índice lo que alcanzaron a guardar de sus archivos.
+    """
+    def __init__(
+        self,
+        job_repo: IngestionJobRepository,
+        doc_service: DocumentService,
+        vector_repo: VectorStoreRepository,
+        session_repo: SessionRepository,
+        max_workers: Optional[int] = None
+    ):
+        self.job_repo = job_repo
+        self.doc_service = doc_service
+        self.vector_repo = vector_repo
+        self.session_repo = session_repo
+        self.max_workers = max_workers or settings.INGEST_JOB_WORKERS
+        # Identifica a este servicio en los leases (único aunque se recree en el
+        # mismo proceso)
+        self.worker_id = (
+            f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        )
+        self._wake = threading.Event()
+        self._workers: List[threading.Thread] = []
+        self._start_lock = threading.Lock()
+
+    def start(self) -> None:
+        """
+        Retoma los trabajos de lease vencido y lanza los hilos de trabajo y de
+        heartbeat (una sola vez).
+        """
+        with self._start_lock:
+            if self._workers:
+                return
+            self.job_repo.requeue_expired()
+            for i in range(self.max_workers):
+                worker = threading.Thread(
+                    target=self._worker_loop, name=f"ingest-worker-{i}", daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+            heartbeat = threading.Thread(
+                target=self._heartbeat_loop, name="ingest-heartbeat", daemon=True
+            )
+            heartbeat.start()
+            self._workers.append(heartbeat)
+        self._wake.set()
+
+    def submit(self, session_id: str, uploaded_files: List[Any]) -> IngestionJob:
+        """
+        Guarda los archivos subidos y encola su ingesta. Retorna enseguida: el
+        trabajo se procesa en segundo plano.
+        """
+        session_path = self.session_repo.get_session_path(session_id)
+        file_paths = self.doc_service.save_uploaded_files(uploaded_files, session_path)
+        job = self.job_repo.create_job(
+            session_id, session_path, [f.name for f in uploaded_files], file_paths
+        )
+        logger.info(
+            f"Trabajo de ingesta {job.id} encolado ({len(file_paths)} archivos, "
+            f"sesión {session_id})"
+        )
+        self._wake.set()
+        return job
+
+    def get_job(self, job_id: str) -> Optional[IngestionJob]:
+        return self.job_repo.get_job(job_id)
+
+    def list_jobs(self, session_id: str, limit: int = 10) -> List[IngestionJob]:
+        """Trabajos recientes de la sesión (el más reciente primero)."""
+        return self.job_repo.list_jobs(session_id, limit)
+
+    def has_active_jobs(self, session_id: str) -> bool:
+        return any(job.is_active for job in self.job_repo.list_jobs(session_id))
+
+    def _heartbeat_loop(self) -> None:
+        while True:
+            try:
+                self.job_repo.renew_leases(self.worker_id)
+            except Exception as e:
+                logger.error(f"Error renovando los leases de ingesta: {e}")
+            time.sleep(settings.INGEST_JOB_HEARTBEAT_SECONDS)
+
+    def _worker_loop(self) -> None:
+        while True:
+            try:
+                job = self.job_repo.claim_next_job(self.worker_id)
+            except Exception as e:
+                logger.error(f"Error leyendo la cola de ingesta: {e}")
+                job = None
+            if job is None:
+                # Sin trabajo disponible: liberar los de procesos caídos
+                try:
+                    self.job_repo.requeue_expired()
+                except Exception as e:
+                    logger.error(f"Error revisando los leases de ingesta: {e}")
+                self._wake.wait(timeout=settings.INGEST_JOB_POLL_SECONDS)
+                self._wake.clear()
+                continue
+            self._run_job(job)
+            # Otro hilo pudo saltarse un trabajo de esta misma sesión mientras corría
+            self._wake.set()
+
+    def _run_job(self, job: IngestionJob) -> None:
+        logger.info(f"Procesando trabajo de ingesta {job.id} (intento {job.attempts})")
+
+        def on_progress(progress: IngestionProgress) -> None:
+            fields = {
+                "files_done": progress.files_done,
+                "pages_loaded": progress.pages_loaded,
+                "chunks_indexed": progress.chunks_indexed,
+                "failed_files": progress.failed_files,
+            }
+            if progress.stage != JobStatus.DONE.value:
+                fields["status"] = progress.stage
+            if progress.file_errors:
+                fields["error"] = "; ".join(
+                    f"{name}: {error}" for name, error in progress.file_errors.items()
+                )
+            self.job_repo.update_job(job.id, **fields)
+
+        try:
+            if job.attempts > 1:
+                # Reintento tras una interrupción: el índice pudo quedar con parte de
+                # los archivos
+                for filename in job.filenames:
+                    self.vector_repo.delete_documents_by_source(
+                        job.session_path, filename
+                    )
+
+            _, _, num_pages = self.doc_service.ingest_files(
+                job.file_paths, job.session_path, self.vector_repo, on_progress
+            )
+            if num_pages == 0:
+                # Los errores por archivo (si los hubo) ya están en el trabajo
+                current = self.job_repo.get_job(job.id)
+                details = current.error if current else None
+                error = "No se pudo extraer contenido de los archivos"
+                self.job_repo.update_job(
+                    job.id, status=JobStatus.FAILED.value,
+                    error=error + (f" ({details})" if details else "")
+                )
+                return
+
+            current = self.job_repo.get_job(job.id)
+            failed = set(current.failed_files) if current else set()
+            self.session_repo.add_files_to_session(
+                job.session_id, [name for name in job.filenames if name not in failed]
+            )
+            self.job_repo.update_job(job.id, status=JobStatus.DONE.value)
+            logger.info(
+                f"Trabajo de ingesta {job.id} completado ({num_pages} páginas)"
+            )
+        except Exception as e:
+            logger.error(f"Error en el trabajo de ingesta {job.id}: {e}")
+            self.job_repo.update_job(
+                job.id, status=JobStatus.FAILED.value, error=str(e)
+            )
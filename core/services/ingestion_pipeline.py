@@ -0,0 +1,159 @@
+import logging
+import queue
+import threading
+from dataclasses import replace
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+from config.settings import settings
+from core.domain.models import IngestionProgress, JobStatus
+from core.interfaces.document_loader import DocumentLoaderRepository
+from core.interfaces.vector_store import VectorStoreRepository
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Las etapas coinciden con los estados de los trabajos de ingesta en segundo plano
+STAGE_PARSING = JobStatus.PARSING.value
+STAGE_EMBEDDING = JobStatus.EMBEDDING.value
+STAGE_DONE = JobStatus.DONE.value
+
+_END = object()
+
+def prefetch(items: Iterable[T], maxsize: int) -> Iterator[T]:
+    """
+    Consume `items` en un hilo aparte y los entrega a través de una cola acotada:
+    el productor se detiene cuando hay `maxsize` elementos sin consumir. Los
+    errores del productor se relanzan en el consumidor.
+    """
+    buffer: "queue.Queue[Any]" = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def put(item: Any) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for item in items:
+                if not put(item):
+                    return
+        except BaseException as e:
+            put(e)
+            return
+        put(_END)
+
+    producer = threading.Thread(target=produce, name="ingest-prefetch", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _END:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        # Consumidor cerrado antes de tiempo: liberar al productor
+        stop.set()
+
+class IngestionPipeline:
+    """
+    Ingesta por etapas con memoria acotada: carga -> división -> embedding -> índice.
+
+    Los archivos se cargan en segundo plano (`iter_files`, con un número acotado de
+    archivos en curso) y pasan por una cola de `queue_size` resultados; sus páginas
+    se agrupan en lotes de `batch_pages` que el repositorio divide, embebe e indexa
+    uno a uno, guardando el índice cada `INGEST_COMMIT_CHUNKS` fragmentos. Ningún
+    paso retiene todas las páginas de la subida a la vez.
+
+    `on_progress` se invoca siempre desde el hilo que llama a `run` (así la UI de
+    Streamlit puede actualizarse desde el callback).
+    """
+    def __init__(
+        self,
+        doc_loader: DocumentLoaderRepository,
+        queue_size: Optional[int] = None,
+        batch_pages: Optional[int] = None
+    ):
+        self.doc_loader = doc_loader
+        self.queue_size = queue_size or settings.INGEST_QUEUE_SIZE
+        self.batch_pages = batch_pages or settings.INGEST_BATCH_PAGES
+
+    def run(
+        self,
+        file_paths: List[str],
+        session_path: str,
+        vector_repo: VectorStoreRepository,
+        on_progress: Optional[Callable[[IngestionProgress], None]] = None
+    ) -> Tuple[Optional[Any], Optional[Any], int]:
+        """
+        Ingresa `file_paths` en el índice de la sesión.
+        Retorna (retriever, bm25_retriever, páginas ingresadas); (None, None, 0) si
+        ningún archivo tuvo contenido.
+        """
+        progress = IngestionProgress(stage=STAGE_PARSING, files_total=len(file_paths))
+
+        def emit(**changes: Any) -> None:
+            for name, value in changes.items():
+                setattr(progress, name, value)
+            if on_progress is not None:
+                on_progress(replace(
+                    progress,
+                    failed_files=list(progress.failed_files),
+                    file_errors=dict(progress.file_errors)
+                ))
+
+        def page_batches() -> Iterator[List[Any]]:
+            batch: List[Any] = []
+            results = prefetch(self.doc_loader.iter_files(file_paths), self.queue_size)
+            for result in results:
+                if result.error:
+                    logger.warning(
+                        f"No se pudo cargar {result.filename}: {result.error}"
+                    )
+                    progress.failed_files.append(result.filename)
+                    progress.file_errors[result.filename] = result.error
+                emit(
+                    stage=STAGE_PARSING,
+                    files_done=progress.files_done + 1,
+                    pages_loaded=progress.pages_loaded + len(result.documents),
+                    filename=result.filename
+                )
+                documents, result.documents = result.documents, []
+                for doc in documents:
+                    batch.append(doc)
+                    if len(batch) >= self.batch_pages:
+                        yield batch
+                        batch = []
+            if batch:
+                yield batch
+
+        def indexed(chunks: int) -> None:
+            emit(stage=STAGE_EMBEDDING, chunks_indexed=chunks)
+
+        batches = page_batches()
+        first = next(batches, None)
+        if first is None:
+            emit(stage=STAGE_DONE)
+            return None, None, 0
+
+        def all_batches() -> Iterator[List[Any]]:
+            yield first
+            yield from batches
+
+        retriever, bm25_retriever = vector_repo.add_documents_stream(
+            session_path, all_batches(), on_progress=indexed
+        )
+        emit(stage=STAGE_DONE, filename=None)
+        logger.info(
+            f"Ingesta completada: {progress.files_done} archivos, "
+            f"{progress.pages_loaded} páginas, "
+            f"{progress.chunks_indexed} fragmentos indexados"
+        )
+        return retriever, bm25_retriever, progress.pages_loaded
@@ -0,0 +1,102 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, List, Optional, Sequence, Tuple
+
+from config.settings import settings
+from core.interfaces.reranker import RerankerRepository
+
+logger = logging.getLogger(__name__)
+
+class CrossEncoderReranker(RerankerRepository):
+    """
+    Reranker CrossEncoder compartido por todo el proceso.
+
+    Las peticiones de usuarios concurrentes se encolan y un único hilo las agrupa
+    en micro-lotes: espera como máximo `max_wait_ms` desde la primera petición (o
+    hasta reunir `max_batch_pairs` pares) y hace un solo `predict` por lote.
+    """
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        max_batch_pairs: Optional[int] = None,
+        max_wait_ms: Optional[float] = None,
+        model: Optional[Any] = None
+    ):
+        self.model_name = model_name or settings.RERANKER_MODEL
+        self.max_batch_pairs = max_batch_pairs or settings.RERANKER_MAX_BATCH_PAIRS
+        self.max_wait_ms = (
+            max_wait_ms if max_wait_ms is not None else settings.RERANKER_MAX_WAIT_MS
+        )
+        self.model = model or self._load_model(self.model_name)
+        self._queue: "queue.Queue[Tuple[List[List[str]], Future]]" = queue.Queue()
+        self._worker = threading.Thread(
+            target=self._batch_loop, name="reranker-batcher", daemon=True
+        )
+        self._worker.start()
+        self.batches = 0
+        self.pairs_scored = 0
+
+    @staticmethod
+    def _load_model(model_name: str) -> Any:
+        from sentence_transformers import CrossEncoder
+        logger.info(f"Cargando reranker {model_name}...")
+        return CrossEncoder(model_name, device='cpu')
+
+    def score(self, query: str, passages: Sequence[str]) -> List[float]:
+        if not passages:
+            return []
+        future: Future = Future()
+        self._queue.put(([[query, passage] for passage in passages], future))
+        return future.result()
+
+    def _collect_batch(self) -> List[Tuple[List[List[str]], Future]]:
+        requests = [self._queue.get()]
+        num_pairs = len(requests[0][0])
+        deadline = time.monotonic() + self.max_wait_ms / 1000
+        while num_pairs < self.max_batch_pairs:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            requests.append(request)
+            num_pairs += len(request[0])
+        return requests
+
+    def _batch_loop(self) -> None:
+        while True:
+            requests = self._collect_batch()
+            pairs = [pair for request_pairs, _ in requests for pair in request_pairs]
+            try:
+                scores = self.model.predict(pairs)
+            except Exception as e:
+                logger.error(f"Error en el lote de reranking ({len(pairs)} pares): {e}")
+                for _, future in requests:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.pairs_scored += len(pairs)
+            offset = 0
+            for request_pairs, future in requests:
+                request_scores = scores[offset:offset + len(request_pairs)]
+                future.set_result([float(s) for s in request_scores])
+                offset += len(request_pairs)
+            if len(requests) > 1:
+                logger.debug(
+                    f"Lote de reranking: {len(requests)} peticiones, {len(pairs)} pares"
+                )
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "pairs_scored": self.pairs_scored,
+            "avg_pairs_per_batch": (
+                round(self.pairs_scored / self.batches, 1) if self.batches else 0.0
+            ),
+        }
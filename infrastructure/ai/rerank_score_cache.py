@@ -0,0 +1,212 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from config.settings import settings
+from core.domain.query import normalize_query
+from core.interfaces.reranker import RerankerRepository
+from infrastructure.constants import FILE_RERANK_CACHE_DB
+
+logger = logging.getLogger(__name__)
+
+# Tamaño del hash (bytes) de cada par (modelo, consulta, pasaje): blake2b de 128 bits
+_KEY_SIZE = 16
+# Límite conservador de parámetros por sentencia en SQLite
+_MAX_SQL_PARAMS = 500
+# Cada cuántas llamadas a `score` se registran las métricas del caché
+_STATS_LOG_EVERY = 100
+
+class DiskScoreStore:
+    """
+    Nivel en disco del caché de scores: una tabla SQLite (modo WAL) clave -> score.
+
+    Se acota por número de filas descartando las más antiguas por orden de
+    inserción; así las lecturas no necesitan escribir para mantener un LRU.
+    """
+    def __init__(self, db_path: Path, max_entries: int):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS scores"
+            " (key BLOB PRIMARY KEY, score REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self._count = self._conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def mget(self, keys: Sequence[bytes]) -> Dict[bytes, float]:
+        found: Dict[bytes, float] = {}
+        for start in range(0, len(keys), _MAX_SQL_PARAMS):
+            batch = keys[start:start + _MAX_SQL_PARAMS]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._conn.execute(
+                f"SELECT key, score FROM scores WHERE key IN ({placeholders})", batch
+            )
+            found.update(rows.fetchall())
+        return found
+
+    def mset(self, items: Dict[bytes, float]) -> None:
+        if not items:
+            return
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO scores (key, score) VALUES (?, ?)",
+                items.items()
+            )
+        self._count += len(items)
+        if self._count > self.max_entries:
+            self._trim()
+
+    def _trim(self) -> None:
+        self._count = self._conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+        excess = self._count - self.max_entries
+        if excess <= 0:
+            return
+        with self._conn:
+            self._conn.execute(
+                "DELETE FROM scores WHERE rowid IN"
+                " (SELECT rowid FROM scores ORDER BY rowid LIMIT ?)",
+                (excess,)
+            )
+        self._count -= excess
+        logger.info(
+            f"Caché de reranking en disco recortado: {excess} entradas antiguas "
+            "eliminadas"
+        )
+
+class CachedReranker(RerankerRepository):
+    """
+    Reranker con caché de scores por (modelo, consulta normalizada, pasaje).
+
+    Las preguntas de auditoría se repiten entre usuarios y sesiones: un acierto
+    evita la inferencia del CrossEncoder. Primero se consulta un LRU acotado en
+    memoria y después, si está configurado, el nivel en disco (compartido entre
+    reinicios). Sólo los pasajes sin score en caché llegan al modelo.
+    """
+    def __init__(
+        self,
+        reranker: RerankerRepository,
+        model_name: Optional[str] = None,
+        max_entries: Optional[int] = None,
+        cache_dir: Optional[str] = None,
+        disk_max_entries: Optional[int] = None
+    ):
+        self.reranker = reranker
+        self.model_name = (
+            model_name
+            or getattr(reranker, "model_name", None)
+            or type(reranker).__name__
+        )
+        self.max_entries = max_entries or settings.RERANK_CACHE_MAX_ENTRIES
+        self._memory: "OrderedDict[bytes, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.disk: Optional[DiskScoreStore] = None
+        if cache_dir:
+            self.disk = DiskScoreStore(
+                Path(cache_dir) / FILE_RERANK_CACHE_DB,
+                disk_max_entries or settings.RERANK_CACHE_DISK_MAX_ENTRIES
+            )
+        self.calls = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _keys(self, query: str, passages: Sequence[str]) -> List[bytes]:
+        prefix = hashlib.blake2b(digest_size=_KEY_SIZE)
+        prefix.update(self.model_name.encode("utf-8"))
+        prefix.update(b"\x00")
+        prefix.update(normalize_query(query).encode("utf-8"))
+        prefix.update(b"\x00")
+        keys = []
+        for passage in passages:
+            digest = prefix.copy()
+            digest.update(passage.encode("utf-8"))
+            keys.append(digest.digest())
+        return keys
+
+    def _remember(self, items: Dict[bytes, float]) -> None:
+        for key, value in items.items():
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def score(self, query: str, passages: Sequence[str]) -> List[float]:
+        if not passages:
+            return []
+        keys = self._keys(query, passages)
+        with self._lock:
+            self.calls += 1
+            scores: Dict[bytes, float] = {}
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    scores[key] = self._memory[key]
+            memory_hits = len(scores)
+
+            pending = [key for key in dict.fromkeys(keys) if key not in scores]
+            if pending and self.disk is not None:
+                from_disk = self.disk.mget(pending)
+                self._remember(from_disk)
+                scores.update(from_disk)
+                pending = [key for key in pending if key not in from_disk]
+            disk_hits = len(scores) - memory_hits
+
+        # El modelo se llama fuera del lock: el reranker agrupa peticiones concurrentes
+        if pending:
+            pending_set = set(pending)
+            texts: Dict[bytes, str] = {}
+            for key, passage in zip(keys, passages):
+                if key in pending_set and key not in texts:
+                    texts[key] = passage
+            model_scores = self.reranker.score(query, list(texts.values()))
+            new_scores = dict(zip(texts.keys(), model_scores))
+            scores.update(new_scores)
+
+        with self._lock:
+            self.memory_hits += memory_hits
+            self.disk_hits += disk_hits
+            self.misses += len(pending)
+            if pending:
+                self._remember(new_scores)
+                if self.disk is not None:
+                    try:
+                        self.disk.mset(new_scores)
+                    except sqlite3.Error as e:
+                        logger.warning(
+                            f"No se pudo guardar el caché de reranking en disco: {e}"
+                        )
+            if self.calls % _STATS_LOG_EVERY == 0:
+                logger.info(f"Caché de reranking: {self.stats()}")
+
+        if memory_hits or disk_hits:
+            logger.debug(
+                f"Caché de reranking: {memory_hits} aciertos en memoria, "
+                f"{disk_hits} en disco, {len(pending)} pasajes al modelo"
+            )
+        return [scores[key] for key in keys]
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        stats = {
+            "entries": len(self._memory),
+            "disk_entries": len(self.disk) if self.disk is not None else 0,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+        }
+        if hasattr(self.reranker, "stats"):
+            stats["reranker"] = self.reranker.stats()
+        return stats
@@ -6,11 +6,29 @@ DIR_VECTOR_STORE = "vector_store"
 DIR_DOC_STORE = "doc_store"
 DIR_CHATS = "chats"
 DIR_RAW_FILES = "raw_files"
+DIR_BM25_INDEX = "bm25"
+DIR_EMBEDDING_CACHE = "embedding_cache"
 
 # File Names
 FILE_METADATA = "metadata.json"
 FILE_HISTORY_LEGACY = "history.json"
 FILE_FAISS_INDEX = "index.faiss"
+FILE_INDEX_META = "index_meta.json"
+FILE_BM25_SNAPSHOT = "bm25_snapshot.pkl"
+FILE_BM25_LOG = "bm25_log.jsonl"
+FILE_DOCSTORE_DB = "parents.sqlite3"
+FILE_EXACT_VECTORS = "vectors.f32"  # Copia exacta sin generación (sesiones anteriores)
+FILE_EXACT_VECTORS_VERSIONED = "vectors.{generation}.f32"
+EXACT_VECTORS_GLOB = "vectors*.f32"
+FILE_SOURCE_MANIFEST = "sources.json"
+# Formato anterior del caché de embeddings (se elimina al abrirlo)
+FILE_EMBEDDING_CACHE_KEYS = "keys.bin"
+FILE_EMBEDDING_CACHE_VECTORS = "vectors.f32"
+FILE_EMBEDDING_CACHE_META = "cache_meta.json"
+FILE_EMBEDDING_CACHE_RECORDS = "records.bin"
+FILE_EMBEDDING_CACHE_LOCK = "cache.lock"
+FILE_RERANK_CACHE_DB = "rerank_scores.sqlite3"
+FILE_INGEST_JOBS_DB = "ingest_jobs.sqlite3"
 
 # CSV Headers
 FEEDBACK_HEADERS = ["Timestamp", "Pregunta", "Respuesta", "Calificación", "Detalle"]
@@ -1,17 +1,61 @@
+import atexit
 import logging
+import multiprocessing
 import os
-from typing import List, Any, Optional
+import threading
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_core.documents import Document
 from llama_parse import LlamaParse
 from config.settings import settings
+from core.domain.models import FileLoadResult
 from core.interfaces.document_loader import DocumentLoaderRepository
+from infrastructure.files.parse_cache import ParseCache, file_sha256
 
 logger = logging.getLogger(__name__)
 
+PARSER_LLAMA_PARSE = "LlamaParse"
+PARSER_PYPDF = "PyPDFLoader"
+# Opciones que cambian la salida del parser (forman parte de la clave del caché de
+# parseo)
+_LLAMA_PARSE_OPTIONS = {"result_type": "markdown"}
+
+def _parse_with_pypdf(pdf_path: str, filename: str) -> List[Document]:
+    """
+    Lectura local con PyPDFLoader (se ejecuta en un proceso del pool). Los errores
+    se propagan: `_load_file` los registra como error del archivo.
+    """
+    logger.info(f"Procesando {filename} con PyPDFLoader...")
+    loader = PyPDFLoader(pdf_path)
+    raw_documents = loader.load()
+
+    for doc in raw_documents:
+        doc.metadata['source_file'] = filename
+        doc.metadata['source'] = filename
+        doc.metadata['parser'] = PARSER_PYPDF
+    return raw_documents
+
 class DocumentLoader(DocumentLoaderRepository):
     def __init__(self):
         self.parser = self._initialize_llama_parse()
+        self._llama_slots = threading.Semaphore(settings.LLAMA_PARSE_MAX_CONCURRENCY)
+        self._pdf_pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        # Caché de parseo por contenido: reindexar un PDF sin cambios no lo vuelve a
+        # parsear
+        self.parse_cache: Optional[ParseCache] = None
+        if settings.PARSE_CACHE_ENABLED:
+            self.parse_cache = ParseCache(
+                settings.PARSE_CACHE_DIR, settings.PARSE_CACHE_MAX_MB * 1024 * 1024
+            )
 
     def _initialize_llama_parse(self) -> Optional[LlamaParse]:
         """Inicializa LlamaParse si hay API Key disponible."""
@@ -19,8 +63,8 @@ class DocumentLoader(DocumentLoaderRepository):
             try:
                 return LlamaParse(
                     api_key=settings.LLAMA_CLOUD_API_KEY,
-                    result_type="markdown",
-                    verbose=True
+                    verbose=True,
+                    **_LLAMA_PARSE_OPTIONS
                 )
             except Exception as e:
                 logger.warning(f"Error al inicializar LlamaParse: {e}")
@@ -42,7 +86,7 @@ class DocumentLoader(DocumentLoaderRepository):
                     metadata={
                         "source_file": filename,
                         "source": filename,
-                        "parser": "LlamaParse"
+                        "parser": PARSER_LLAMA_PARSE
                     }
                 )
                 raw_documents.append(lc_doc)
@@ -51,46 +95,190 @@ class DocumentLoader(DocumentLoaderRepository):
             logger.warning(f"Fallo LlamaParse para {filename}: {e}. Usando fallback.")
             return []
 
-    def _load_with_pypdf(self, pdf_path: str, filename: str) -> List[Document]:
-        """Carga documentos usando PyPDFLoader como fallback."""
+    def _load_with_pypdf(
+        self, pdf_path: str, filename: str, parallel: bool = False
+    ) -> List[Document]:
+        """
+        Carga documentos usando PyPDFLoader como fallback (en el pool de procesos si
+        hay varios archivos).
+        """
+        pool = self._get_pdf_pool() if parallel else None
+        if pool is None:
+            return _parse_with_pypdf(pdf_path, filename)
+        return pool.submit(_parse_with_pypdf, pdf_path, filename).result()
+
+    def _get_pdf_pool(self) -> Optional[ProcessPoolExecutor]:
+        if settings.PDF_LOADER_PROCESSES <= 1:
+            return None
+        with self._pool_lock:
+            if self._pdf_pool is None:
+                logger.info(
+                    "Iniciando pool de lectura de PDF "
+                    f"({settings.PDF_LOADER_PROCESSES} procesos)"
+                )
+                self._pdf_pool = ProcessPoolExecutor(
+                    max_workers=settings.PDF_LOADER_PROCESSES,
+                    # spawn: el proceso de Streamlit tiene hilos activos (fork no es
+                    # seguro)
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+                atexit.register(self.close)
+            return self._pdf_pool
+
+    def close(self) -> None:
+        """
+        Detiene el pool de procesos de lectura de PDF (se registra también al
+        salir).
+        """
+        with self._pool_lock:
+            pool, self._pdf_pool = self._pdf_pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+            logger.info("Pool de lectura de PDF detenido")
+
+    def _parse_cached(
+        self,
+        parser: str,
+        options: Dict[str, Any],
+        file_hash: Optional[str],
+        filename: str,
+        parse: Callable[[], List[Document]]
+    ) -> Tuple[List[Document], bool]:
+        """
+        Ejecuta `parse` salvo que el caché ya tenga el resultado. Retorna
+        (documentos, acierto).
+        """
+        cache = self.parse_cache
+        if file_hash is None or cache is None:
+            return parse(), False
+        key = ParseCache.key(file_hash, parser, options)
+        cached = cache.get(key, filename)
+        if cached is not None:
+            logger.info(
+                f"{filename}: resultado de {parser} recuperado del caché de parseo"
+            )
+            return cached, True
+        documents = parse()
+        if documents:
+            cache.put(key, documents)
+        return documents, False
+
+    def _load_file(self, pdf_path: str, parallel: bool = False) -> FileLoadResult:
+        """Carga un archivo (LlamaParse y, si falla, PyPDF). Nunca propaga errores."""
+        start = time.perf_counter()
+        filename = os.path.basename(pdf_path)
+        result = FileLoadResult(file_path=pdf_path, filename=filename)
         try:
-            logger.info(f"Procesando {filename} con PyPDFLoader...")
-            loader = PyPDFLoader(pdf_path)
-            raw_documents = loader.load()
-            
-            for doc in raw_documents:
-                doc.metadata['source_file'] = filename
-                doc.metadata['source'] = filename
-                doc.metadata['parser'] = "PyPDFLoader"
-            return raw_documents
+            logger.info(f"Iniciando carga de: {pdf_path}")
+
+            file_hash = file_sha256(pdf_path) if self.parse_cache is not None else None
+
+            # Intentar LlamaParse (llamadas de red: concurrencia acotada)
+            raw_documents: List[Document] = []
+            if self.parser:
+                def parse_llama() -> List[Document]:
+                    with self._llama_slots:
+                        return self._load_with_llama_parse(pdf_path, filename)
+                raw_documents, result.cached = self._parse_cached(
+                    PARSER_LLAMA_PARSE,
+                    _LLAMA_PARSE_OPTIONS,
+                    file_hash,
+                    filename,
+                    parse_llama
+                )
+            result.parser = PARSER_LLAMA_PARSE if raw_documents else PARSER_PYPDF
+
+            # Fallback a PyPDFLoader
+            if not raw_documents:
+                raw_documents, result.cached = self._parse_cached(
+                    PARSER_PYPDF, {}, file_hash, filename,
+                    lambda: self._load_with_pypdf(pdf_path, filename, parallel)
+                )
+
+            result.documents = raw_documents
+            if not raw_documents:
+                result.error = "No se pudo extraer contenido"
         except Exception as e:
-            logger.error(f"Error en PyPDFLoader para {filename}: {e}")
+            logger.error(f"Error procesando {pdf_path}: {e}")
+            result.error = f"{type(e).__name__}: {e}"
+        result.seconds = round(time.perf_counter() - start, 3)
+
+        if result.documents:
+            logger.info(
+                f"Procesado exitosamente: {pdf_path} ({result.parser}) - "
+                f"{len(result.documents)} documentos padres generados en "
+                f"{result.seconds:.2f}s"
+                f"{' (caché)' if result.cached else ''}."
+            )
+        else:
+            logger.warning(f"No se pudo extraer contenido de {pdf_path}")
+        return result
+
+    def iter_files(self, pdf_paths: List[str]) -> Iterator[FileLoadResult]:
+        """
+        Carga los archivos en paralelo y entrega cada resultado en orden de entrada.
+        Cada hilo libre toma el siguiente archivo en cuanto termina el suyo (un
+        archivo lento no deja el pool ocioso); los resultados que llegan antes de
+        su turno esperan en un búfer. Los archivos lanzados y aún no entregados se
+        acotan a `2 * hilos`, así que los documentos no se acumulan en memoria.
+        """
+        if not pdf_paths:
+            return
+        if len(pdf_paths) == 1:
+            yield self._load_file(pdf_paths[0])
+            return
+
+        # Un hilo por archivo en curso: espera a LlamaParse o al proceso que lee el PDF
+        concurrency = max(
+            settings.LLAMA_PARSE_MAX_CONCURRENCY, settings.PDF_LOADER_PROCESSES
+        )
+        workers = min(len(pdf_paths), concurrency)
+        window = 2 * workers
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="loader"
+        ) as executor:
+            running: Dict[Future, int] = {}
+            ready: Dict[int, FileLoadResult] = {}
+            submitted = delivered = 0
+            while delivered < len(pdf_paths):
+                while (
+                    submitted < len(pdf_paths)
+                    and len(running) < workers
+                    and submitted - delivered < window
+                ):
+                    future = executor.submit(
+                        self._load_file, pdf_paths[submitted], True
+                    )
+                    running[future] = submitted
+                    submitted += 1
+                if delivered in ready:
+                    yield ready.pop(delivered)
+                    delivered += 1
+                    continue
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    ready[running.pop(future)] = future.result()
+
+    def load_files(self, pdf_paths: List[str]) -> List[FileLoadResult]:
+        """
+        Carga varios archivos en paralelo y retorna un resultado por archivo, en el
+        orden de entrada. El error de un archivo no afecta a los demás.
+        """
+        if not pdf_paths:
             return []
+        start = time.perf_counter()
+        results = list(self.iter_files(pdf_paths))
+
+        loaded = sum(1 for r in results if r.documents)
+        logger.info(
+            f"Carga de {len(pdf_paths)} archivos en {time.perf_counter() - start:.2f}s "
+            f"({loaded} con contenido, "
+            f"suma de tiempos {sum(r.seconds for r in results):.2f}s)"
+        )
+        return results
 
     def load_documents(self, pdf_paths: List[str]) -> List[Document]:
         all_chunks: List[Document] = []
-        
-        for pdf_path in pdf_paths:
-            try:
-                logger.info(f"Iniciando carga de: {pdf_path}")
-                filename = os.path.basename(pdf_path)
-                
-                # Intentar LlamaParse
-                raw_documents = self._load_with_llama_parse(pdf_path, filename)
-                used_parser = "LlamaParse" if raw_documents else "PyPDFLoader"
-
-                # Fallback a PyPDFLoader
-                if not raw_documents:
-                    raw_documents = self._load_with_pypdf(pdf_path, filename)
-
-                if raw_documents:
-                    all_chunks.extend(raw_documents)
-                    logger.info(f"Procesado exitosamente: {pdf_path} ({used_parser}) - {len(raw_documents)} documentos padres generados.")
-                else:
-                    logger.warning(f"No se pudo extraer contenido de {pdf_path}")
-
-            except Exception as e:
-                logger.error(f"Error crítico procesando {pdf_path}: {e}")
-                continue
-
+        for result in self.load_files(pdf_paths):
+            all_chunks.extend(result.documents)
         return all_chunks
@@ -0,0 +1,153 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+# Metadatos que dependen del nombre con el que se subió el archivo, no de su contenido
+_NAME_FIELDS = ("source_file", "source")
+_HASH_BLOCK = 1024 * 1024
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+class ParseCache:
+    """
+    Caché persistente de resultados de parseo, direccionado por contenido.
+
+    La clave es SHA-256(bytes del archivo) + parser + opciones, así que un PDF
+    sin cambios no vuelve a LlamaParse (ni a PyPDF) aunque se reindexe o se suba
+    con otro nombre. Cada entrada es un fichero JSON comprimido con gzip con los
+    documentos de página; el nombre del archivo se reasigna al leer.
+
+    El tamaño en disco se acota a `max_bytes` expulsando las entradas usadas hace
+    más tiempo (la fecha de modificación se actualiza en cada acierto).
+    """
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes = sum(
+            p.stat().st_size for p in self.cache_dir.glob("*.json.gz")
+        )
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(
+        file_hash: str, parser: str, options: Optional[Dict[str, Any]] = None
+    ) -> str:
+        payload = json.dumps(
+            {"file": file_hash, "parser": parser, "options": options or {}},
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json.gz"
+
+    def get(self, key: str, filename: str) -> Optional[List[Document]]:
+        """Documentos guardados para `key` (con `filename` como origen) o None."""
+        path = self._path(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                entries = json.load(f)
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(
+                f"Entrada de caché de parseo ilegible ({path.name}), se descarta: {e}"
+            )
+            self._remove(path)
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return [
+            Document(
+                page_content=entry["page_content"],
+                metadata={
+                    **entry["metadata"], "source_file": filename, "source": filename
+                }
+            )
+            for entry in entries
+        ]
+
+    def put(self, key: str, documents: List[Document]) -> None:
+        entries = [
+            {
+                "page_content": doc.page_content,
+                "metadata": {
+                    k: v for k, v in doc.metadata.items() if k not in _NAME_FIELDS
+                }
+            }
+            for doc in documents
+        ]
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(entries, f, ensure_ascii=False, default=str)
+        size = tmp_path.stat().st_size
+        with self._lock:
+            previous = path.stat().st_size if path.exists() else 0
+            os.replace(tmp_path, path)
+            self._total_bytes += size - previous
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _remove(self, path: Path) -> None:
+        with self._lock:
+            try:
+                size = path.stat().st_size
+                path.unlink()
+                self._total_bytes -= size
+            except FileNotFoundError:
+                pass
+
+    def _evict(self) -> None:
+        files = sorted(
+            self.cache_dir.glob("*.json.gz"), key=lambda p: p.stat().st_mtime
+        )
+        removed = 0
+        for path in files:
+            if self._total_bytes <= self.max_bytes:
+                break
+            try:
+                size = path.stat().st_size
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            self._total_bytes -= size
+            removed += 1
+        if removed:
+            logger.info(
+                f"Caché de parseo: {removed} entradas expulsadas "
+                f"({self._total_bytes / 1e6:.1f} MB en uso)"
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size_mb": round(self._total_bytes / (1024 * 1024), 2),
+            "max_mb": round(self.max_bytes / (1024 * 1024), 2),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
@@ -0,0 +1,60 @@
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict
+
+from infrastructure.constants import FILE_INDEX_META
+
+logger = logging.getLogger(__name__)
+
+class IndexMetadataHandler:
+    """
+    Manejador de los metadatos del índice de una sesión (versión, modo, etc.).
+    Se guarda en la raíz de la sesión para sobrevivir a `clear_index`.
+    """
+
+    @staticmethod
+    def load(session_path: Path) -> Dict[str, Any]:
+        """Carga los metadatos del índice. Retorna un dict vacío si no existen."""
+        meta_path = Path(session_path) / FILE_INDEX_META
+        if not meta_path.exists():
+            return {}
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            logger.error(f"Error leyendo metadatos del índice en {meta_path}: {e}")
+            return {}
+
+    @staticmethod
+    def save(session_path: Path, metadata: Dict[str, Any]) -> None:
+        """Guarda los metadatos del índice de forma atómica."""
+        meta_path = Path(session_path) / FILE_INDEX_META
+        tmp_path = meta_path.with_suffix(".tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(metadata, f, indent=4, ensure_ascii=False)
+            os.replace(tmp_path, meta_path)
+        except OSError as e:
+            logger.error(f"Error guardando metadatos del índice en {meta_path}: {e}")
+
+    @staticmethod
+    def update(session_path: Path, updates: Dict[str, Any]) -> Dict[str, Any]:
+        """Actualiza campos específicos y retorna los metadatos resultantes."""
+        metadata = IndexMetadataHandler.load(session_path)
+        metadata.update(updates)
+        IndexMetadataHandler.save(session_path, metadata)
+        return metadata
+
+    @staticmethod
+    def get_version(session_path: Path) -> int:
+        """Obtiene la versión actual del índice (0 si nunca se ha escrito)."""
+        return int(IndexMetadataHandler.load(session_path).get("version", 0))
+
+    @staticmethod
+    def bump_version(session_path: Path) -> int:
+        """Incrementa la versión del índice y retorna el nuevo valor."""
+        new_version = IndexMetadataHandler.get_version(session_path) + 1
+        IndexMetadataHandler.update(session_path, {"version": new_version})
+        return new_version
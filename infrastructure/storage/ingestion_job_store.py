@@ -0,0 +1,224 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, List, Optional
+
+from config.settings import settings
+from core.domain.models import IngestionJob, JobStatus
+from core.interfaces.ingestion_job_repository import IngestionJobRepository
+
+logger = logging.getLogger(__name__)
+
+_RUNNING = (JobStatus.PARSING.value, JobStatus.EMBEDDING.value)
+# Columnas guardadas como JSON
+_LIST_FIELDS = ("filenames", "file_paths", "failed_files")
+_UPDATABLE_FIELDS = {
+    "status", "files_done", "pages_loaded", "chunks_indexed", "failed_files", "error"
+}
+# Columnas agregadas después de la primera versión de la tabla
+_LEASE_COLUMNS = {"worker_id": "TEXT", "lease_expires_at": "REAL"}
+
+class SQLiteIngestionJobStore(IngestionJobRepository):
+    """
+    Cola de trabajos de ingesta en una tabla SQLite (modo WAL) compartida por
+    todas las sesiones: sobrevive a recargas del navegador y a reinicios del
+    proceso. Tomar un trabajo es una transacción IMMEDIATE, así que varios hilos
+    (o procesos) no pueden tomar el mismo.
+
+    Cada trabajo en curso tiene un lease de `lease_seconds` que su servicio
+    renueva mientras lo procesa; sólo los de lease vencido vuelven a la cola.
+    """
+    def __init__(self, db_path: Path, lease_seconds: Optional[float] = None):
+        self.db_path = Path(db_path)
+        self.lease_seconds = (
+            settings.INGEST_JOB_LEASE_SECONDS if lease_seconds is None
+            else lease_seconds
+        )
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.db_path), check_same_thread=False, isolation_level=None
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, session_id TEXT NOT NULL,"
+            " session_path TEXT NOT NULL, filenames TEXT NOT NULL,"
+            " file_paths TEXT NOT NULL, status TEXT NOT NULL,"
+            " created_at TEXT NOT NULL, updated_at TEXT NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " files_done INTEGER NOT NULL DEFAULT 0,"
+            " pages_loaded INTEGER NOT NULL DEFAULT 0,"
+            " chunks_indexed INTEGER NOT NULL DEFAULT 0,"
+            " failed_files TEXT NOT NULL DEFAULT '[]', error TEXT,"
+            " worker_id TEXT, lease_expires_at REAL)"
+        )
+        self._add_missing_columns()
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS jobs_session ON jobs (session_id, created_at)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)"
+        )
+
+    def _add_missing_columns(self) -> None:
+        """Agrega las columnas de lease a bases creadas sin ellas."""
+        rows = self._conn.execute("PRAGMA table_info(jobs)").fetchall()
+        columns = {row["name"] for row in rows}
+        for name, sql_type in _LEASE_COLUMNS.items():
+            if name in columns:
+                continue
+            try:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {sql_type}")
+            except sqlite3.OperationalError as e:
+                # Otro proceso la agregó entre la lectura y el ALTER
+                if "duplicate column" not in str(e):
+                    raise
+
+    @staticmethod
+    def _to_job(row: sqlite3.Row) -> IngestionJob:
+        data = dict(row)
+        for name in _LIST_FIELDS:
+            data[name] = json.loads(data[name])
+        return IngestionJob(**data)
+
+    def create_job(
+        self,
+        session_id: str,
+        session_path: str,
+        filenames: List[str],
+        file_paths: List[str]
+    ) -> IngestionJob:
+        now = datetime.now().isoformat()
+        job = IngestionJob(
+            id=str(uuid.uuid4()),
+            session_id=session_id,
+            session_path=session_path,
+            filenames=list(filenames),
+            file_paths=list(file_paths),
+            created_at=now,
+            updated_at=now
+        )
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, session_id, session_path, filenames,"
+                " file_paths, status, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job.id,
+                    session_id,
+                    session_path,
+                    json.dumps(job.filenames, ensure_ascii=False),
+                    json.dumps(job.file_paths, ensure_ascii=False),
+                    job.status,
+                    now,
+                    now
+                )
+            )
+        return job
+
+    def claim_next_job(self, worker_id: str) -> Optional[IngestionJob]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? AND session_id NOT IN"
+                    " (SELECT session_id FROM jobs WHERE status IN (?, ?))"
+                    " ORDER BY created_at, rowid LIMIT 1",
+                    (JobStatus.QUEUED.value, *_RUNNING)
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                now = datetime.now().isoformat()
+                lease = time.time() + self.lease_seconds
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1,"
+                    " updated_at = ?, worker_id = ?, lease_expires_at = ?"
+                    " WHERE id = ?",
+                    (JobStatus.PARSING.value, now, worker_id, lease, row["id"])
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        job = self._to_job(row)
+        job.status = JobStatus.PARSING.value
+        job.attempts += 1
+        job.updated_at = now
+        job.worker_id = worker_id
+        job.lease_expires_at = lease
+        return job
+
+    def renew_leases(self, worker_id: str) -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET lease_expires_at = ?"
+                " WHERE worker_id = ? AND status IN (?, ?)",
+                (time.time() + self.lease_seconds, worker_id, *_RUNNING)
+            )
+        return cursor.rowcount
+
+    def update_job(self, job_id: str, **fields: Any) -> None:
+        unknown = set(fields) - _UPDATABLE_FIELDS
+        if unknown:
+            raise ValueError(f"Campos de trabajo no actualizables: {sorted(unknown)}")
+        values = {
+            name: (
+                json.dumps(value, ensure_ascii=False)
+                if name in _LIST_FIELDS else value
+            )
+            for name, value in fields.items()
+        }
+        values["updated_at"] = datetime.now().isoformat()
+        assignments = ", ".join(f"{name} = ?" for name in values)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ?",
+                (*values.values(), job_id)
+            )
+
+    def get_job(self, job_id: str) -> Optional[IngestionJob]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._to_job(row) if row else None
+
+    def list_jobs(self, session_id: str, limit: int = 10) -> List[IngestionJob]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE session_id = ?"
+                " ORDER BY created_at DESC, rowid DESC LIMIT ?",
+                (session_id, limit)
+            ).fetchall()
+        return [self._to_job(row) for row in rows]
+
+    def requeue_expired(self) -> int:
+        with self._lock:
+            # Sin lease: trabajos tomados antes de que existiera la columna
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ?, worker_id = NULL,"
+                " lease_expires_at = NULL WHERE status IN (?, ?)"
+                " AND (lease_expires_at IS NULL OR lease_expires_at < ?)",
+                (
+                    JobStatus.QUEUED.value,
+                    datetime.now().isoformat(),
+                    *_RUNNING,
+                    time.time()
+                )
+            )
+        if cursor.rowcount:
+            logger.info(
+                f"{cursor.rowcount} trabajos de ingesta interrumpidos "
+                "vuelven a la cola"
+            )
+        return cursor.rowcount
@@ -0,0 +1,141 @@
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Modelo cargado en cada proceso del pool (una réplica por worker)
+_worker_model: Any = None
+
+def _init_worker(
+    model_name: str,
+    model_kwargs: Dict[str, Any],
+    encode_kwargs: Dict[str, Any],
+    threads: int
+) -> None:
+    global _worker_model
+    import torch
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    # Repartir los núcleos entre réplicas en lugar de competir por todos
+    torch.set_num_threads(threads)
+    _worker_model = HuggingFaceEmbeddings(
+        model_name=model_name,
+        model_kwargs=model_kwargs,
+        encode_kwargs=encode_kwargs
+    )
+
+def _embed_batch(texts: List[str]) -> np.ndarray:
+    return np.asarray(_worker_model.embed_documents(texts), dtype=np.float32)
+
+def length_buckets(texts: Sequence[str], batch_size: int) -> List[List[int]]:
+    """
+    Agrupa los índices de `texts` en lotes de longitud similar (en palabras, como
+    aproximación a tokens) para minimizar el padding dentro de cada lote.
+    """
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i].split()))
+    return [
+        order[start:start + batch_size] for start in range(0, len(order), batch_size)
+    ]
+
+class BatchEmbedder:
+    """
+    Embebe fragmentos por lotes ordenados por longitud.
+
+    Con `EMBEDDING_WORKERS > 1` y un modelo HuggingFace, los lotes de una ingesta
+    grande se reparten en un pool de procesos, cada uno con su réplica del modelo.
+    En otro caso se usa el modelo del proceso. Cada ejecución registra chunks/s
+    (`last_run`) para dimensionar el hardware de ingesta.
+    """
+    def __init__(
+        self,
+        embeddings: Any,
+        batch_size: Optional[int] = None,
+        workers: Optional[int] = None
+    ):
+        self.embeddings = embeddings
+        self.batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
+        self.workers = workers if workers is not None else settings.EMBEDDING_WORKERS
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self.last_run: Dict[str, Any] = {}
+
+    def _can_fan_out(self, num_texts: int) -> bool:
+        return (
+            self.workers > 1
+            and num_texts >= settings.EMBEDDING_PARALLEL_MIN_CHUNKS
+            and type(self.embeddings).__name__ == "HuggingFaceEmbeddings"
+        )
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                threads = max(1, (os.cpu_count() or 1) // self.workers)
+                logger.info(
+                    f"Iniciando pool de embeddings: {self.workers} réplicas "
+                    f"x {threads} hilos"
+                )
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    # spawn: torch no es seguro tras fork con hilos activos
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(
+                        self.embeddings.model_name,
+                        {**self.embeddings.model_kwargs, "device": "cpu"},
+                        self.embeddings.encode_kwargs,
+                        threads
+                    )
+                )
+            return self._pool
+
+    def embed_documents(self, texts: Sequence[str]) -> np.ndarray:
+        """Retorna los embeddings de `texts` (matriz float32, en el orden original)."""
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        start = time.perf_counter()
+        buckets = length_buckets(texts, self.batch_size)
+        batches = [[texts[i] for i in bucket] for bucket in buckets]
+
+        parallel = self._can_fan_out(len(texts))
+        if parallel:
+            results = list(self._get_pool().map(_embed_batch, batches))
+        else:
+            results = [
+                np.asarray(self.embeddings.embed_documents(batch), dtype=np.float32)
+                for batch in batches
+            ]
+
+        vectors = np.empty((len(texts), results[0].shape[1]), dtype=np.float32)
+        for bucket, batch_vectors in zip(buckets, results):
+            vectors[bucket] = batch_vectors
+
+        elapsed = time.perf_counter() - start
+        self.last_run = {
+            "chunks": len(texts),
+            "batches": len(batches),
+            "workers": self.workers if parallel else 1,
+            "seconds": round(elapsed, 3),
+            "chunks_per_sec": round(len(texts) / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+        logger.info(
+            f"Embeddings: {len(texts)} chunks en {elapsed:.2f}s "
+            f"({self.last_run['chunks_per_sec']} chunks/s, {len(batches)} lotes, "
+            f"{self.last_run['workers']} réplicas)"
+        )
+        return vectors
+
+    def close(self) -> None:
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
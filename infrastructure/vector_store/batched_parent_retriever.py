@@ -0,0 +1,70 @@
+import logging
+import threading
+from typing import Any, List, Optional
+
+import numpy as np
+from langchain_classic.retrievers import ParentDocumentRetriever
+from langchain_classic.retrievers.multi_vector import SearchType
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from pydantic import PrivateAttr
+
+from infrastructure.vector_store.parent_map import ParentMap
+from infrastructure.vector_store.rescoring_faiss import RescoringFAISS
+from infrastructure.vector_store.sqlite_docstore import SQLiteDocStore
+
+logger = logging.getLogger(__name__)
+
+class BatchedParentDocumentRetriever(ParentDocumentRetriever):
+    """
+    ParentDocumentRetriever que resuelve los padres con enteros.
+
+    La búsqueda de hijos devuelve posiciones de FAISS (sin construir Documents);
+    la relación hijo -> padre de la versión (`ParentMap`, compartida con el
+    retriever híbrido) las convierte en ordinales, que se deduplican conservando
+    el orden con NumPy. Después se leen todos los padres con un solo `mget`,
+    acotados a `max_parents`.
+    """
+    vectorstore: RescoringFAISS
+    docstore: SQLiteDocStore
+    max_parents: Optional[int] = None
+    # Relación hijo -> padre compartida de la versión (la asigna el repositorio
+    # al construirla para la entrada del caché)
+    parent_map: Optional[Any] = None
+
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    def _ensure_parent_map(self) -> ParentMap:
+        """
+        Relación hijo -> padre; si el índice no pasó por el caché se construye
+        aquí.
+        """
+        ntotal = self.vectorstore.index.ntotal
+        if self.parent_map is not None and self.parent_map.num_vectors == ntotal:
+            return self.parent_map
+        with self._lock:
+            if self.parent_map is None or self.parent_map.num_vectors != ntotal:
+                self.parent_map = ParentMap.build(self.vectorstore, self.id_key)
+        return self.parent_map
+
+    def parent_ordinals(self, query: str) -> np.ndarray:
+        """Ordinales de padre únicos en el orden del primer hijo encontrado."""
+        child_parent = self._ensure_parent_map().child_parent
+        embedding = self.vectorstore._embed_query(query)
+        positions, _ = self.vectorstore.search_positions(
+            embedding, self.search_kwargs.get("k", 4)
+        )
+        ords = child_parent[positions]
+        ords = ords[ords >= 0]
+        _, first = np.unique(ords, return_index=True)
+        ords = ords[np.sort(first)]
+        return ords[:self.max_parents] if self.max_parents else ords
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        if self.search_type != SearchType.similarity:
+            return super()._get_relevant_documents(query, run_manager=run_manager)
+        parent_ids = self._ensure_parent_map().parent_ids
+        ids = [parent_ids[ord_] for ord_ in self.parent_ordinals(query).tolist()]
+        return [doc for doc in self.docstore.mget(ids) if doc is not None]
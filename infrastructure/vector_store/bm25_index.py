@@ -0,0 +1,236 @@
+import json
+import logging
+import os
+import pickle
+import re
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from config.settings import settings
+from infrastructure.constants import FILE_BM25_LOG, FILE_BM25_SNAPSHOT
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+_SNAPSHOT_FORMAT = 1
+
+def tokenize(text: str) -> List[str]:
+    """Tokenizador léxico común para indexación y consulta."""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+class BM25InvertedIndex:
+    """
+    Índice invertido BM25 persistente e incremental.
+
+    En disco se guarda un snapshot (postings, longitudes y ids) más un log
+    append-only de altas y bajas. Una escritura sólo añade líneas al log, por lo
+    que su coste depende del texto nuevo y no del tamaño del corpus. El log se
+    compacta en un nuevo snapshot cuando crece demasiado.
+    """
+    def __init__(self, index_dir: Path):
+        self.index_dir = Path(index_dir)
+        self.doc_ids: List[Optional[str]] = []
+        self.doc_index: Dict[str, int] = {}
+        self.doc_lengths = array("I")
+        self.postings: Dict[str, Tuple[array, array]] = {}
+        self.total_length = 0
+        self.log_entries = 0
+        # Altas (ordinal, frecuencias) hechas con `add_documents` desde la carga o la
+        # última compactación: la matriz dispersa las agrega como columnas nuevas
+        self.recent_additions: List[Tuple[int, Dict[str, int]]] = []
+
+    # --- Estadísticas ---
+
+    @property
+    def num_docs(self) -> int:
+        return len(self.doc_index)
+
+    @property
+    def avg_doc_length(self) -> float:
+        return self.total_length / self.num_docs if self.num_docs else 0.0
+
+    @property
+    def num_deleted(self) -> int:
+        return len(self.doc_ids) - self.num_docs
+
+    def estimated_bytes(self) -> int:
+        """Memoria aproximada ocupada por las estructuras del índice."""
+        postings = sum(len(ords) * 8 for ords, _ in self.postings.values())
+        return postings + len(self.postings) * 64 + len(self.doc_ids) * 80
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self.doc_index
+
+    # --- Persistencia ---
+
+    @classmethod
+    def exists(cls, index_dir: Path) -> bool:
+        index_dir = Path(index_dir)
+        return (
+            (index_dir / FILE_BM25_SNAPSHOT).exists()
+            or (index_dir / FILE_BM25_LOG).exists()
+        )
+
+    @classmethod
+    def load(cls, index_dir: Path) -> "BM25InvertedIndex":
+        """Carga el snapshot y reaplica el log de operaciones pendientes."""
+        index = cls(index_dir)
+        snapshot_path = index.index_dir / FILE_BM25_SNAPSHOT
+        if snapshot_path.exists():
+            with open(snapshot_path, "rb") as f:
+                data = pickle.load(f)
+            if data.get("format") != _SNAPSHOT_FORMAT:
+                raise ValueError(
+                    f"Formato de snapshot BM25 no soportado: {data.get('format')}"
+                )
+            index.doc_ids = data["doc_ids"]
+            index.doc_index = {
+                doc_id: i
+                for i, doc_id in enumerate(index.doc_ids)
+                if doc_id is not None
+            }
+            index.doc_lengths = data["doc_lengths"]
+            index.postings = data["postings"]
+            index.total_length = sum(index.doc_lengths)
+
+        log_path = index.index_dir / FILE_BM25_LOG
+        if log_path.exists():
+            with open(log_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Línea truncada por una escritura interrumpida: se ignora
+                        logger.warning(
+                            f"Entrada corrupta en log BM25 {log_path}, se ignora."
+                        )
+                        continue
+                    index._apply(entry)
+                    index.log_entries += 1
+        return index
+
+    def _append_log(self, entries: List[Dict[str, Any]]) -> None:
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.index_dir / FILE_BM25_LOG, "a", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.log_entries += len(entries)
+
+    def compact(self) -> None:
+        """Reescribe el snapshot sin documentos borrados y vacía el log."""
+        remap: Dict[int, int] = {}
+        doc_ids: List[Optional[str]] = []
+        doc_lengths = array("I")
+        for old_ord, doc_id in enumerate(self.doc_ids):
+            if doc_id is not None:
+                remap[old_ord] = len(doc_ids)
+                doc_ids.append(doc_id)
+                doc_lengths.append(self.doc_lengths[old_ord])
+
+        postings: Dict[str, Tuple[array, array]] = {}
+        for term, (ords, tfs) in self.postings.items():
+            new_ords, new_tfs = array("I"), array("I")
+            for ord_, tf in zip(ords, tfs):
+                if ord_ in remap:
+                    new_ords.append(remap[ord_])
+                    new_tfs.append(tf)
+            if new_ords:
+                postings[term] = (new_ords, new_tfs)
+
+        self.doc_ids = doc_ids
+        self.doc_index = {
+            doc_id: i for i, doc_id in enumerate(doc_ids) if doc_id is not None
+        }
+        self.doc_lengths = doc_lengths
+        self.postings = postings
+
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        snapshot_path = self.index_dir / FILE_BM25_SNAPSHOT
+        tmp_path = snapshot_path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump({
+                "format": _SNAPSHOT_FORMAT,
+                "doc_ids": self.doc_ids,
+                "doc_lengths": self.doc_lengths,
+                "postings": self.postings,
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, snapshot_path)
+
+        log_path = self.index_dir / FILE_BM25_LOG
+        if log_path.exists():
+            log_path.unlink()
+        self.log_entries = 0
+        self.recent_additions = []
+        logger.info(
+            f"Índice BM25 compactado en {snapshot_path} ({self.num_docs} documentos)"
+        )
+
+    def _maybe_compact(self) -> None:
+        too_many_entries = self.log_entries >= settings.BM25_COMPACT_LOG_ENTRIES
+        too_many_deleted = self.num_deleted > max(100, len(self.doc_ids) // 4)
+        if too_many_entries or too_many_deleted:
+            self.compact()
+
+    # --- Escritura ---
+
+    def _apply(self, entry: Dict[str, Any]) -> None:
+        if entry["op"] == "add":
+            doc_id = entry["id"]
+            if doc_id in self.doc_index:
+                self._remove(doc_id)
+            ord_ = len(self.doc_ids)
+            self.doc_ids.append(doc_id)
+            self.doc_index[doc_id] = ord_
+            length = sum(entry["tf"].values())
+            self.doc_lengths.append(length)
+            self.total_length += length
+            for term, tf in entry["tf"].items():
+                posting = self.postings.get(term)
+                if posting is None:
+                    posting = (array("I"), array("I"))
+                    self.postings[term] = posting
+                posting[0].append(ord_)
+                posting[1].append(tf)
+        elif entry["op"] == "remove":
+            for doc_id in entry["ids"]:
+                self._remove(doc_id)
+
+    def _remove(self, doc_id: str) -> None:
+        # Borrado lógico: los postings se depuran en la siguiente compactación
+        ord_ = self.doc_index.pop(doc_id, None)
+        if ord_ is None:
+            return
+        self.doc_ids[ord_] = None
+        self.total_length -= self.doc_lengths[ord_]
+        self.doc_lengths[ord_] = 0
+
+    def add_documents(self, items: Iterable[Tuple[str, str]]) -> None:
+        """Indexa pares (doc_id, texto) y los persiste en el log."""
+        entries: List[Dict[str, Any]] = []
+        for doc_id, text in items:
+            tf = Counter(tokenize(text))
+            if tf:
+                entries.append({"op": "add", "id": doc_id, "tf": dict(tf)})
+        if not entries:
+            return
+        for entry in entries:
+            self._apply(entry)
+            self.recent_additions.append((self.doc_index[entry["id"]], entry["tf"]))
+        self._append_log(entries)
+        self._maybe_compact()
+
+    def remove_documents(self, doc_ids: Iterable[str]) -> None:
+        """Da de baja documentos por id y persiste la operación en el log."""
+        ids = [doc_id for doc_id in doc_ids if doc_id in self.doc_index]
+        if not ids:
+            return
+        entry = {"op": "remove", "ids": ids}
+        self._apply(entry)
+        self._append_log([entry])
+        self._maybe_compact()
@@ -0,0 +1,303 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+from infrastructure.constants import (
+    FILE_EMBEDDING_CACHE_KEYS,
+    FILE_EMBEDDING_CACHE_LOCK,
+    FILE_EMBEDDING_CACHE_META,
+    FILE_EMBEDDING_CACHE_RECORDS,
+    FILE_EMBEDDING_CACHE_VECTORS,
+)
+
+try:
+    import fcntl
+except ImportError:  # Windows: el lock de fichero sólo protege entre hilos del proceso
+    fcntl = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+# Tamaño del hash (bytes) que identifica un texto: blake2b de 128 bits
+_KEY_SIZE = 16
+
+def embedding_model_name(embeddings: Any) -> str:
+    """Nombre estable del modelo de embeddings (forma parte de la clave del caché)."""
+    return (
+        getattr(embeddings, "model_name", None)
+        or getattr(embeddings, "model", None)
+        or type(embeddings).__name__
+    )
+
+def content_key(model_name: str, text: str) -> bytes:
+    """Clave de contenido: hash(modelo, texto)."""
+    digest = hashlib.blake2b(digest_size=_KEY_SIZE)
+    digest.update(model_name.encode("utf-8"))
+    digest.update(b"\x00")
+    digest.update(text.encode("utf-8"))
+    return digest.digest()
+
+class EmbeddingCache:
+    """
+    Caché persistente de embeddings por contenido, uno por modelo.
+
+    En disco es un único fichero append-only de registros de tamaño fijo
+    (`records.bin`): hash de 16 bytes + vector float32, leído con `np.memmap`. En
+    memoria sólo vive el diccionario hash -> fila. Clave y vector van en el mismo
+    registro, así que una fila nunca mezcla datos de dos escrituras.
+
+    El fichero se comparte entre procesos (workers de Streamlit): las escrituras
+    toman un lock de fichero (`fcntl`), descartan un registro incompleto que haya
+    dejado una escritura interrumpida y, antes de agregar, leen las filas que otros
+    procesos hayan añadido. La fila de cada registro sale de su posición en el
+    fichero, no de un contador del proceso.
+
+    El tamaño se acota a `max_bytes`: al superarlo se reescribe el fichero
+    conservando los registros más recientes (los más antiguos se expulsan).
+    """
+    def __init__(
+        self, cache_dir: Path, model_name: str, max_bytes: Optional[int] = None
+    ):
+        self.model_name = model_name
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name).strip("_")[:60]
+        model_hash = hashlib.sha1(model_name.encode("utf-8")).hexdigest()[:8]
+        self.cache_dir = Path(cache_dir) / f"{slug}-{model_hash}"
+        self.max_bytes = max_bytes
+        self._records_path = self.cache_dir / FILE_EMBEDDING_CACHE_RECORDS
+        self._lock_path = self.cache_dir / FILE_EMBEDDING_CACHE_LOCK
+        self._meta_path = self.cache_dir / FILE_EMBEDDING_CACHE_META
+        self._lock = threading.Lock()
+        self._rows: Dict[bytes, int] = {}
+        self._memmap: Optional[np.memmap] = None
+        self._file_id: Optional[tuple] = None
+        self._known_rows = 0
+        self.dim: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    # --- Persistencia ---
+
+    @property
+    def _dtype(self) -> np.dtype:
+        return np.dtype([("key", f"V{_KEY_SIZE}"), ("vector", "<f4", (self.dim,))])
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Lock exclusivo entre procesos (sólo entre hilos si no hay `fcntl`)."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with open(self._lock_path, "a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _load(self) -> None:
+        if not self._meta_path.exists():
+            return
+        with open(self._meta_path, "r", encoding="utf-8") as f:
+            self.dim = json.load(f)["dim"]
+        with self._file_lock():
+            self._remove_legacy_files()
+            self._refresh()
+        logger.info(
+            f"Caché de embeddings '{self.model_name}' cargado "
+            f"({len(self._rows)} vectores)"
+        )
+
+    def _remove_legacy_files(self) -> None:
+        # Formato anterior (claves y vectores en ficheros separados): se descarta
+        for name in (FILE_EMBEDDING_CACHE_KEYS, FILE_EMBEDDING_CACHE_VECTORS):
+            path = self.cache_dir / name
+            if path.exists():
+                path.unlink()
+                logger.info(
+                    "Caché de embeddings: eliminado fichero de formato anterior "
+                    f"{path.name}"
+                )
+
+    def _refresh(self) -> None:
+        """
+        Sincroniza filas y memmap con el fichero (con el lock de fichero tomado):
+        recarga si otro proceso lo reescribió y lee los registros agregados.
+        """
+        if not self._records_path.exists():
+            self._rows, self._known_rows = {}, 0
+            self._file_id, self._memmap = None, None
+            return
+        stat = os.stat(self._records_path)
+        file_id = (stat.st_dev, stat.st_ino)
+        if file_id != self._file_id:
+            self._rows, self._known_rows, self._file_id = {}, 0, file_id
+
+        record_size = self._dtype.itemsize
+        if stat.st_size % record_size:
+            # Registro incompleto de una escritura interrumpida
+            logger.warning(
+                f"Caché de embeddings truncado en {self.cache_dir}; "
+                "se descarta el registro incompleto."
+            )
+            with open(self._records_path, "r+b") as f:
+                f.truncate(stat.st_size - stat.st_size % record_size)
+        rows = stat.st_size // record_size
+        if rows == self._known_rows and self._memmap is not None:
+            return
+
+        memmap = (
+            np.memmap(self._records_path, dtype=self._dtype, mode="r", shape=(rows,))
+            if rows else None
+        )
+        self._memmap = memmap
+        if memmap is not None and rows > self._known_rows:
+            keys = memmap["key"][self._known_rows:].tobytes()
+            for offset in range(rows - self._known_rows):
+                key = keys[offset * _KEY_SIZE:(offset + 1) * _KEY_SIZE]
+                self._rows[key] = self._known_rows + offset
+        self._known_rows = rows
+
+    def _init_dim(self, dim: int) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        if self._meta_path.exists():
+            with open(self._meta_path, "r", encoding="utf-8") as f:
+                self.dim = json.load(f)["dim"]
+            return
+        with open(self._meta_path, "w", encoding="utf-8") as f:
+            json.dump({"model_name": self.model_name, "dim": dim}, f)
+        self.dim = dim
+
+    def _append(self, keys: List[bytes], vectors: np.ndarray) -> None:
+        """Agrega registros (con el lock de fichero tomado y tras `_refresh`)."""
+        records = np.empty(len(keys), dtype=self._dtype)
+        records["key"] = np.frombuffer(b"".join(keys), dtype=f"V{_KEY_SIZE}")
+        records["vector"] = vectors
+        with open(self._records_path, "ab") as f:
+            f.write(records.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        self._refresh()
+        max_bytes = self.max_bytes
+        if max_bytes and self._known_rows * self._dtype.itemsize > max_bytes:
+            self._evict(max_bytes)
+
+    def _evict(self, max_bytes: int) -> None:
+        """Reescribe el fichero con los registros más recientes (3/4 del límite)."""
+        if self._memmap is None:
+            return
+        keep = max(1, int(max_bytes * 0.75) // self._dtype.itemsize)
+        removed = self._known_rows - keep
+        tmp_path = self._records_path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(self._memmap[removed:].tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._records_path)
+        self._refresh()
+        logger.info(
+            f"Caché de embeddings '{self.model_name}': "
+            f"{removed} vectores antiguos expulsados"
+        )
+
+    # --- API ---
+
+    def embed_documents(
+        self,
+        texts: Sequence[str],
+        embed_fn: Callable[[List[str]], Union[np.ndarray, List[List[float]]]]
+    ) -> np.ndarray:
+        """
+        Retorna los embeddings de `texts` (matriz float32 en el mismo orden).
+        Sólo se llama a `embed_fn` con los textos que no están en caché, sin
+        repetir.
+        """
+        keys = [content_key(self.model_name, text) for text in texts]
+        computed: Dict[bytes, np.ndarray] = {}
+        with self._lock:
+            pending: Dict[bytes, str] = {}
+            for key, text in zip(keys, texts):
+                if key not in self._rows and key not in pending:
+                    pending[key] = text
+            if pending and self.dim is not None:
+                # Otro proceso pudo embeberlos ya
+                with self._file_lock():
+                    self._refresh()
+                pending = {
+                    key: text for key, text in pending.items() if key not in self._rows
+                }
+            self.hits += len(texts) - len(pending)
+            self.misses += len(pending)
+
+            if pending:
+                logger.info(
+                    f"Caché de embeddings: {len(texts) - len(pending)} aciertos, "
+                    f"{len(pending)} textos nuevos"
+                )
+                new_vectors = np.asarray(
+                    embed_fn(list(pending.values())), dtype=np.float32
+                )
+                computed = dict(zip(pending, new_vectors))
+                with self._file_lock():
+                    if self.dim is None:
+                        self._init_dim(new_vectors.shape[1])
+                    self._refresh()
+                    missing = [key for key in computed if key not in self._rows]
+                    if missing:
+                        # Copiar los aciertos antes de agregar: la compactación que
+                        # dispare `_append` puede expulsar sus filas
+                        stored = self._memmap
+                        if stored is not None:
+                            for key in keys:
+                                row = self._rows.get(key)
+                                if row is not None and key not in computed:
+                                    computed[key] = np.array(stored[row]["vector"])
+                        vectors = np.stack([computed[key] for key in missing])
+                        self._append(missing, vectors)
+
+            if not texts:
+                return np.zeros((0, self.dim or 0), dtype=np.float32)
+            rows = [self._rows.get(key) for key in keys]
+            stored = self._memmap
+            found = [row for row in rows if row is not None]
+            if stored is not None and len(found) == len(rows):
+                return np.asarray(stored["vector"][found])
+            # Expulsados por la compactación en esta misma llamada
+            return np.stack([
+                computed[key]
+                if row is None or stored is None
+                else np.asarray(stored[row]["vector"])
+                for key, row in zip(keys, rows)
+            ])
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._rows),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+_caches: Dict[str, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+def get_embedding_cache(
+    cache_dir: str, model_name: str, max_bytes: Optional[int] = None
+) -> EmbeddingCache:
+    """Caché de embeddings compartido por el proceso para (directorio, modelo)."""
+    key = f"{Path(cache_dir).resolve()}::{model_name}"
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = EmbeddingCache(Path(cache_dir), model_name, max_bytes)
+        return _caches[key]
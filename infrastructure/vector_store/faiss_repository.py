@@ -1,29 +1,92 @@
 import logging
 import os
 import shutil
-from typing import List, Tuple, Any, Optional
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, cast
 from pathlib import Path
 
 from langchain_core.documents import Document
-from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
 from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.retrievers import BM25Retriever
 from langchain_classic.retrievers import ParentDocumentRetriever
-from langchain_classic.storage import LocalFileStore
-from langchain_classic.storage._lc_store import create_kv_docstore
 
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from core.interfaces.vector_store import VectorStoreRepository
 from config.settings import settings
-from infrastructure.constants import DIR_DOC_STORE, DIR_VECTOR_STORE, FILE_FAISS_INDEX
-import faiss
+from infrastructure.constants import (
+    DIR_BM25_INDEX, DIR_DOC_STORE, DIR_VECTOR_STORE, EXACT_VECTORS_GLOB,
+    FILE_DOCSTORE_DB, FILE_EXACT_VECTORS, FILE_FAISS_INDEX, FILE_INDEX_META
+)
+import numpy as np
+from infrastructure.storage.handlers.index_metadata_handler import IndexMetadataHandler
+from infrastructure.vector_store.batch_embedder import BatchEmbedder
+from infrastructure.vector_store.batched_parent_retriever import (
+    BatchedParentDocumentRetriever,
+)
+from infrastructure.vector_store.bm25_index import BM25InvertedIndex
+from infrastructure.vector_store.embedding_cache import (
+    EmbeddingCache, embedding_model_name, get_embedding_cache
+)
+from infrastructure.vector_store.hybrid_retriever import (
+    HybridRetriever, build_hybrid_retriever
+)
+from infrastructure.vector_store.index_factory import (
+    INDEX_MODE_FLAT, INDEX_MODE_IVF_FLAT, INDEX_MODE_IVF_PQ, INDEX_MODES,
+    STORAGE_FLOAT32, STORAGE_FP16, STORAGE_SQ8, VECTOR_STORAGES,
+    apply_search_params, build_index, create_index, detect_mode, detect_storage,
+    estimate_index_bytes, mmap_io_flags, reconstruct_all, resolve_mode, resolve_storage
+)
+from infrastructure.vector_store.index_cache import (
+    CachedSessionIndex, SessionIndexCache, get_shared_index_cache
+)
+from infrastructure.vector_store.metadata_index import MetadataIndex
+from infrastructure.vector_store.parent_map import (
+    ParentMap, build_child_maps, child_documents
+)
+from infrastructure.vector_store.query_embedding_cache import QueryEmbeddingCache
+from infrastructure.vector_store.rescoring_faiss import ExactVectorFile, RescoringFAISS
+from infrastructure.vector_store.retrieval_cache import RetrievalResultCache
+from infrastructure.vector_store.source_manifest import SourceManifest, source_key
+from infrastructure.vector_store.sparse_bm25 import (
+    SparseBM25Matrix,
+    SparseBM25Retriever,
+)
+from infrastructure.vector_store.sqlite_docstore import SQLiteDocStore
 from langchain_community.docstore.in_memory import InMemoryDocstore
+import faiss
 
 logger = logging.getLogger(__name__)
 
 class FAISSRepository(VectorStoreRepository):
-    def __init__(self, embeddings: Any):
+    def __init__(
+        self, embeddings: Any, index_cache: Optional[SessionIndexCache] = None,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        batch_embedder: Optional[BatchEmbedder] = None
+    ):
         self.embeddings = embeddings
+        # Caché compartido entre todas las sesiones de Streamlit del proceso
+        self.index_cache = index_cache or get_shared_index_cache()
+        # Caché de embeddings por contenido: reingestas y reconstrucciones no re-embeben
+        if embedding_cache is None and settings.EMBEDDING_CACHE_ENABLED:
+            embedding_cache = get_embedding_cache(
+                settings.EMBEDDING_CACHE_DIR, embedding_model_name(embeddings),
+                max_bytes=settings.EMBEDDING_CACHE_MAX_MB * 1024 * 1024
+            )
+        self.embedding_cache = embedding_cache
+        # Embedding de ingesta por lotes ordenados por longitud (opcionalmente
+        # multiproceso); el caché de consultas no aplica a la ingesta, se usa el
+        # modelo que envuelve
+        document_embeddings = (
+            embeddings.embeddings
+            if isinstance(embeddings, QueryEmbeddingCache)
+            else embeddings
+        )
+        self.batch_embedder = batch_embedder or BatchEmbedder(document_embeddings)
+
+    @staticmethod
+    def _session_key(session_path: str) -> str:
+        """Clave canónica de una sesión para el caché de índices."""
+        return str(Path(session_path).resolve())
 
     def _get_splitters(self) -> Tuple[RecursiveCharacterTextSplitter, RecursiveCharacterTextSplitter]:
         """Configura y retorna los splitters para documentos hijos y padres."""
@@ -37,90 +100,471 @@ class FAISSRepository(VectorStoreRepository):
         )
         return child_splitter, parent_splitter
 
-    def _load_or_create_vector_store(self, vectorstore_path: Path) -> FAISS:
-        """Carga un índice FAISS existente o crea uno nuevo."""
-        if vectorstore_path.exists() and (vectorstore_path / FILE_FAISS_INDEX).exists():
-            logger.info(f"Cargando índice FAISS existente desde {vectorstore_path}...")
-            return FAISS.load_local(
-                str(vectorstore_path), 
-                self.embeddings, 
-                allow_dangerous_deserialization=True
+    @staticmethod
+    def _target_layout(
+        index_meta: Dict[str, Any], num_vectors: int
+    ) -> Tuple[str, str, bool]:
+        """
+        (modo, almacenamiento, normalizado) que corresponden a la sesión para
+        `num_vectors`. Los almacenamientos cuantizados escalares (fp16/sq8) trabajan
+        siempre con producto interno sobre vectores normalizados, tanto si se
+        eligieron para la sesión como si vienen de `VECTOR_STORAGE`; una vez
+        normalizada, la sesión conserva esa métrica.
+        """
+        mode = resolve_mode(
+            index_meta.get("index_mode", settings.VECTOR_INDEX_MODE), num_vectors
+        )
+        storage = resolve_storage(
+            index_meta.get("vector_storage", settings.VECTOR_STORAGE), mode, num_vectors
+        )
+        normalized = (
+            bool(index_meta.get("normalized")) or storage in (STORAGE_FP16, STORAGE_SQ8)
+        )
+        return mode, storage, normalized
+
+    @staticmethod
+    def _apply_metric(vector_store: RescoringFAISS, normalized: bool) -> None:
+        """
+        Métrica de la sesión: producto interno sobre vectores normalizados o L2.
+        Se asigna tras construir el vector store porque langchain sólo contempla
+        `normalize_L2` junto a la distancia euclídea (y emite un aviso si no).
+        """
+        vector_store._normalize_L2 = normalized
+        vector_store.distance_strategy = (
+            DistanceStrategy.MAX_INNER_PRODUCT
+            if normalized
+            else DistanceStrategy.EUCLIDEAN_DISTANCE
+        )
+
+    @staticmethod
+    def _keeps_exact_copy(mode: str, storage: str, normalized: bool) -> bool:
+        """
+        Si el layout conserva la copia float32 de los vectores. IVF-PQ la conserva
+        siempre: `reconstruct` devuelve vectores con pérdida y es la única fuente
+        fiel para reentrenar o quitar vectores. Los almacenamientos escalares, sólo
+        para la re-puntuación exacta.
+        """
+        if mode == INDEX_MODE_IVF_PQ:
+            return True
+        return (
+            settings.VECTOR_EXACT_RESCORE and normalized and storage != STORAGE_FLOAT32
+        )
+
+    @staticmethod
+    def _attach_exact_vectors(vector_store: RescoringFAISS, exact_path: Path) -> None:
+        """
+        Asocia la copia exacta de vectores si el índice es cuantizado y está alineada.
+        Filas de más al final (una ingesta que no llegó a guardar el índice) se ignoran.
+        """
+        vector_store.exact_vectors = None
+        if detect_storage(vector_store.index) == STORAGE_FLOAT32:
+            return
+        exact = ExactVectorFile(exact_path, vector_store.index.d)
+        if exact.num_rows >= vector_store.index.ntotal:
+            exact.num_rows = vector_store.index.ntotal
+            vector_store.exact_vectors = exact
+        elif exact.num_rows:
+            logger.warning(
+                f"Copia exacta de vectores desalineada en {exact_path}; se ignora."
+            )
+
+    @staticmethod
+    def _exact_vectors_path(vectorstore_path: Path, index_meta: Dict[str, Any]) -> Path:
+        """Copia exacta vigente (sin generación en el nombre en sesiones antiguas)."""
+        name = index_meta.get("exact_vectors_file") or FILE_EXACT_VECTORS
+        return vectorstore_path / name
+
+    def _save_vector_store(
+        self, session_dir: Path, vector_store: RescoringFAISS
+    ) -> None:
+        """Guarda el índice FAISS y registra qué copia exacta le corresponde."""
+        vector_store.save_local(str(session_dir / DIR_VECTOR_STORE))
+        exact = vector_store.exact_vectors
+        IndexMetadataHandler.update(
+            session_dir, {"exact_vectors_file": exact.path.name if exact else None}
+        )
+
+    def _publish_version(self, session_dir: Path, vector_store: RescoringFAISS) -> int:
+        """
+        Publica una versión nueva del índice y, ya publicada, borra las copias
+        exactas de generaciones anteriores (las versiones previas ya no se cargan;
+        quien las tenga mapeadas conserva su mapeo).
+        """
+        version = IndexMetadataHandler.bump_version(session_dir)
+        exact = vector_store.exact_vectors
+        current = exact.path if exact else None
+        for path in (session_dir / DIR_VECTOR_STORE).glob(EXACT_VECTORS_GLOB):
+            if path != current:
+                try:
+                    path.unlink()
+                except OSError as e:
+                    logger.warning(
+                        f"No se pudo borrar la copia exacta obsoleta {path}: {e}"
+                    )
+        return version
+
+    @staticmethod
+    def _should_mmap(index_path: Path) -> bool:
+        """Los índices grandes se abren con mmap (compartidos entre procesos)."""
+        min_bytes = settings.FAISS_MMAP_MIN_MB * 1024 * 1024
+        return settings.FAISS_MMAP_ENABLED and index_path.stat().st_size >= min_bytes
+
+    def _load_or_create_vector_store(
+        self,
+        vectorstore_path: Path,
+        index_meta: Dict[str, Any],
+        read_only: bool = False
+    ) -> RescoringFAISS:
+        """
+        Carga un índice FAISS existente o crea uno nuevo. Con `read_only` un índice
+        grande se mapea en memoria en lugar de leerse entero (no admite escrituras).
+        """
+        index_path = vectorstore_path / FILE_FAISS_INDEX
+        if vectorstore_path.exists() and index_path.exists():
+            mode = index_meta.get('active_index_mode', INDEX_MODE_FLAT)
+            if read_only and self._should_mmap(index_path):
+                logger.info(
+                    f"Mapeando índice FAISS desde {vectorstore_path} "
+                    f"(modo {mode}, sólo lectura)..."
+                )
+                vector_store = RescoringFAISS.load_mapped(
+                    str(vectorstore_path), self.embeddings, mmap_io_flags(mode)
+                )
+            else:
+                logger.info(
+                    f"Cargando índice FAISS existente desde {vectorstore_path} "
+                    f"(modo {mode})..."
+                )
+                # `load_local` construye la subclase, aunque su firma retorne FAISS
+                vector_store = cast(RescoringFAISS, RescoringFAISS.load_local(
+                    str(vectorstore_path), 
+                    self.embeddings, 
+                    allow_dangerous_deserialization=True
+                ))
+            # Sólo las sesiones normalizadas tienen índices de producto interno
+            index = vector_store.index
+            self._apply_metric(
+                vector_store, index.metric_type == faiss.METRIC_INNER_PRODUCT
+            )
+            apply_search_params(index, index_meta.get("search_params"))
+            self._attach_exact_vectors(
+                vector_store, self._exact_vectors_path(vectorstore_path, index_meta)
             )
+            return vector_store
         
         logger.info("Inicializando nuevo índice FAISS vacío...")
         embedding_size = len(self.embeddings.embed_query("test"))
-        index = faiss.IndexFlatL2(embedding_size)
-        return FAISS(
+        mode, storage, normalized = self._target_layout(index_meta, 0)
+        metric = faiss.METRIC_INNER_PRODUCT if normalized else faiss.METRIC_L2
+        index = create_index(mode, embedding_size, 0, metric, storage)
+        apply_search_params(index, index_meta.get("search_params"))
+        vector_store = RescoringFAISS(
             embedding_function=self.embeddings,
             index=index,
             docstore=InMemoryDocstore(),
             index_to_docstore_id={}
         )
+        self._apply_metric(vector_store, normalized)
+        keeps_copy = self._keeps_exact_copy(mode, storage, normalized)
+        if keeps_copy and storage != STORAGE_FLOAT32:
+            vector_store.exact_vectors = ExactVectorFile(
+                ExactVectorFile.next_path(vectorstore_path), embedding_size, 0
+            )
+        return vector_store
 
-    def get_vector_db(self, session_path: str) -> Tuple[Any, Any]:
+    def _load_retriever(
+        self, session_dir: Path, read_only: bool = False
+    ) -> BatchedParentDocumentRetriever:
+        """
+        Construye el ParentDocumentRetriever de una sesión leyendo desde disco.
+        `read_only` permite mapear el índice en memoria (sólo para consultas).
+        """
+        docstore_path = session_dir / DIR_DOC_STORE
+        vectorstore_path = session_dir / DIR_VECTOR_STORE
+
+        # 1. Configurar Almacenamiento de Documentos (Padres) en un único fichero
+        store = self._open_docstore(docstore_path)
+
+        # 2. Configurar Splitters
+        child_splitter, parent_splitter = self._get_splitters()
+
+        # 3. Cargar o Inicializar Vector Store (FAISS)
+        index_meta = IndexMetadataHandler.load(session_dir)
+        vector_store = self._load_or_create_vector_store(
+            vectorstore_path, index_meta, read_only
+        )
+
+        # 4. Configurar ParentDocumentRetriever (padres deduplicados por id y
+        # leídos en lote)
+        return BatchedParentDocumentRetriever(
+            vectorstore=vector_store,
+            docstore=store,
+            child_splitter=child_splitter,
+            parent_splitter=parent_splitter,
+            search_kwargs={"k": settings.RETRIEVER_K_PARENT},
+            max_parents=settings.RERANK_MAX_CANDIDATES
+        )
+
+    def _open_docstore(self, docstore_path: Path) -> SQLiteDocStore:
+        """Abre el docstore SQLite de la sesión; migra el formato antiguo si lo hay."""
+        store = SQLiteDocStore(
+            docstore_path / FILE_DOCSTORE_DB, compression=settings.DOCSTORE_COMPRESSION
+        )
+        store.migrate_legacy_files(docstore_path)
+        return store
+
+    def _estimate_size(self, retriever: Any, bm25_retriever: Any) -> int:
+        """Estimación aproximada (bytes) de la memoria ocupada por un índice cargado."""
+        size = estimate_index_bytes(retriever.vectorstore.index)
+        size += retriever.vectorstore.estimated_mapping_bytes()
+        if bm25_retriever is not None:
+            size += bm25_retriever.matrix.estimated_bytes()
+        return size
+
+    def _cache_components(
+        self, session_key: str, version: int, retriever: Any, bm25_retriever: Any
+    ) -> None:
+        self.index_cache.put(session_key, CachedSessionIndex(
+            retriever=retriever,
+            bm25_retriever=bm25_retriever,
+            version=version,
+            size_bytes=self._estimate_size(retriever, bm25_retriever),
+            result_cache=(
+                RetrievalResultCache(settings.RETRIEVAL_CACHE_MAX_ENTRIES, version)
+                if settings.RETRIEVAL_CACHE_ENABLED else None
+            )
+        ))
+
+    def _child_maps(
+        self, entry: CachedSessionIndex
+    ) -> Tuple[ParentMap, MetadataIndex]:
+        """
+        Relación hijo -> padre e índice de metadatos de la entrada. Se construyen
+        en la primera consulta que los necesita (un solo recorrido de los hijos),
+        así abrir un índice mapeado no carga su tabla de ids.
+        """
+        with entry.lock:
+            if entry.parent_map is None or entry.metadata_index is None:
+                retriever, bm25_retriever = entry.retriever, entry.bm25_retriever
+                parent_map, metadata_index = build_child_maps(
+                    retriever.vectorstore, retriever.id_key,
+                    bm25_retriever.matrix.doc_ids if bm25_retriever else None
+                )
+                retriever.parent_map = parent_map
+                entry.parent_map, entry.metadata_index = parent_map, metadata_index
+                self.index_cache.add_size(
+                    entry,
+                    parent_map.estimated_bytes() + metadata_index.estimated_bytes()
+                )
+            return entry.parent_map, entry.metadata_index
+
+    def is_cached(self, session_path: str) -> bool:
+        """Indica si el índice vigente de la sesión ya está cargado en memoria."""
+        version = IndexMetadataHandler.get_version(Path(session_path))
+        return self.index_cache.contains(self._session_key(session_path), version)
+
+    def get_vector_db(
+        self, session_path: str, transient: bool = False
+    ) -> Tuple[Any, Any]:
         """
         Obtiene (carga o crea) la base de datos vectorial para una sesión.
+        Usa el caché compartido del proceso; sólo lee desde disco si la versión
+        vigente del índice no está cargada. Con `transient` lo leído no entra al
+        caché (consultas puntuales que no deben desplazar sesiones activas).
         """
         session_dir = Path(session_path)
         if not session_dir.exists():
             raise ValueError(f"El directorio de sesión no existe: {session_path}")
 
-        docstore_path = session_dir / DIR_DOC_STORE
-        vectorstore_path = session_dir / DIR_VECTOR_STORE
+        session_key = self._session_key(session_path)
+        version = IndexMetadataHandler.get_version(session_dir)
+        cached = self.index_cache.get(session_key, version)
+        if cached:
+            return cached.retriever, cached.bm25_retriever
 
-        try:
-            # 1. Configurar Almacenamiento de Documentos (Padres)
-            fs = LocalFileStore(str(docstore_path))
-            store = create_kv_docstore(fs)
+        with self.index_cache.session_lock(session_key):
+            # Otro hilo pudo cargarlo mientras esperábamos el lock
+            if self.index_cache.contains(session_key, version):
+                cached = self.index_cache.get(session_key, version)
+                if cached:
+                    return cached.retriever, cached.bm25_retriever
 
-            # 2. Configurar Splitters
-            child_splitter, parent_splitter = self._get_splitters()
+            try:
+                retriever = self._load_retriever(session_dir, read_only=True)
 
-            # 3. Cargar o Inicializar Vector Store (FAISS)
-            vector_store = self._load_or_create_vector_store(vectorstore_path)
+                # 5. Configurar BM25 Retriever (índice invertido persistente)
+                bm25_index = self._load_bm25_index(session_dir, retriever.docstore)
+                bm25_retriever = self._create_bm25_retriever(
+                    bm25_index, retriever.docstore
+                )
 
-            # 4. Configurar ParentDocumentRetriever
-            retriever = ParentDocumentRetriever(
-                vectorstore=vector_store,
-                docstore=store,
-                child_splitter=child_splitter,
-                parent_splitter=parent_splitter,
-                search_kwargs={"k": settings.RETRIEVER_K_PARENT}
-            )
+                if not transient:
+                    self._cache_components(
+                        session_key, version, retriever, bm25_retriever
+                    )
+                return retriever, bm25_retriever
 
-            # 5. Configurar BM25 Retriever
-            bm25_retriever = self._create_bm25_retriever(store)
+            except Exception as e:
+                logger.error(
+                    "Error crítico obteniendo Vector DB para sesión "
+                    f"{session_path}: {e}"
+                )
+                raise RuntimeError(
+                    f"No se pudo inicializar la base de datos vectorial: {e}"
+                )
 
-            return retriever, bm25_retriever
+    def release_vector_db(self, retriever: Any) -> None:
+        """
+        Cierra el docstore de componentes leídos con `transient`. Si el retriever
+        es el de una entrada del caché no se toca: el caché lo cierra al soltarla.
+        """
+        if self.index_cache.find_by_retriever(retriever) is None:
+            retriever.docstore.close()
 
-        except Exception as e:
-            logger.error(f"Error crítico obteniendo Vector DB para sesión {session_path}: {e}")
-            raise RuntimeError(f"No se pudo inicializar la base de datos vectorial: {e}")
+    def get_hybrid_retriever(
+        self, retriever: Any, bm25_retriever: Any
+    ) -> HybridRetriever:
+        """
+        Retriever híbrido para los componentes de una sesión. Se memoiza en la
+        entrada del caché de índices, así que se crea una vez por versión, y lleva
+        la versión y el caché de resultados de esa entrada.
+        """
+        entry = self.index_cache.find_by_retriever(retriever)
+        if entry is None or entry.bm25_retriever is not bm25_retriever:
+            return build_hybrid_retriever(retriever, bm25_retriever)
+        if entry.hybrid_retriever is None:
+            parent_map, _ = self._child_maps(entry)
+            entry.hybrid_retriever = build_hybrid_retriever(
+                retriever,
+                bm25_retriever,
+                version=entry.version,
+                result_cache=entry.result_cache,
+                parent_map=parent_map
+            )
+        return entry.hybrid_retriever
+
+    def get_metadata_index(self, retriever: Any) -> MetadataIndex:
+        """
+        Índice de metadatos de los hijos (el de la entrada del caché, construido
+        en la primera consulta que lo usa).
+        """
+        entry = self.index_cache.find_by_retriever(retriever)
+        if entry is None:
+            vector_store = retriever.vectorstore
+            return MetadataIndex.from_children(
+                vector_store.index.ntotal, child_documents(vector_store)
+            )
+        return self._child_maps(entry)[1]
 
-    def add_documents(self, session_path: str, new_documents: List[Document]) -> Tuple[Any, Any]:
+    def similarity_search(
+        self,
+        retriever: Any,
+        query: str,
+        k: int,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Document]:
+        """
+        Búsqueda de fragmentos hijos. Con `filters` sólo se consideran los vectores
+        que los cumplen según el índice de metadatos (sin sobre-recuperar y
+        descartar).
+        """
+        vector_store = retriever.vectorstore
+        if not filters:
+            return vector_store.similarity_search(query, k=k)
+        allowed = self.get_metadata_index(retriever).mask(filters)
+        positions, _ = vector_store.search_positions(
+            vector_store.embedding_function.embed_query(query), k, allowed=allowed
+        )
+        child_ids = [vector_store.index_to_docstore_id[int(p)] for p in positions]
+        docs = [vector_store.docstore.search(child_id) for child_id in child_ids]
+        return [doc for doc in docs if isinstance(doc, Document)]
+
+    def add_documents(
+        self, session_path: str, new_documents: List[Document]
+    ) -> Tuple[Any, Any]:
         """
         Agrega nuevos documentos a la sesión existente.
+        Trabaja sobre una copia privada del índice (la del caché puede estar
+        sirviendo consultas) y al terminar publica la nueva versión en el caché.
         """
+        if new_documents:
+            logger.info(
+                f"Agregando {len(new_documents)} documentos a sesión {session_path}..."
+            )
+        return self.add_documents_stream(
+            session_path, [new_documents] if new_documents else []
+        )
+
+    def add_documents_stream(
+        self,
+        session_path: str,
+        batches: Iterable[List[Document]],
+        on_progress: Optional[Callable[[int], None]] = None
+    ) -> Tuple[Any, Any]:
+        """
+        Agrega documentos por lotes a medida que llegan: cada lote se divide, embebe
+        e indexa y después se descarta. Cada `INGEST_COMMIT_CHUNKS` fragmentos se
+        guardan juntos índice FAISS, manifiesto, padres y BM25 (una ingesta
+        interrumpida conserva lo confirmado y nada queda fuera del manifiesto).
+        La versión sólo cambia al final, así que el índice en caché sigue sirviendo
+        consultas mientras tanto y se publica una sola versión nueva.
+        """
+        session_dir = Path(session_path)
+        session_key = self._session_key(session_path)
         try:
-            # Obtener componentes actuales
-            retriever, _ = self.get_vector_db(session_path)
-            
-            if new_documents:
-                logger.info(f"Agregando {len(new_documents)} documentos a sesión {session_path}...")
-                retriever.add_documents(new_documents, ids=None)
-                
-                # Persistir Vector Store
-                vectorstore_path = Path(session_path) / DIR_VECTOR_STORE
-                logger.info(f"Guardando índice vectorial actualizado en {vectorstore_path}...")
-                retriever.vectorstore.save_local(str(vectorstore_path))
-                
-                # Reconstruir BM25 con los nuevos datos
-                docstore_path = Path(session_path) / DIR_DOC_STORE
-                fs = LocalFileStore(str(docstore_path))
-                store = create_kv_docstore(fs)
-                bm25_retriever = self._create_bm25_retriever(store)
-            else:
-                bm25_retriever = self._create_bm25_retriever(retriever.docstore)
+            with self.index_cache.session_lock(session_key):
+                # La matriz BM25 en caché de la versión en disco se extiende en lugar
+                # de reconstruirse
+                previous = self.index_cache.peek(
+                    session_key, IndexMetadataHandler.get_version(session_dir)
+                )
+                retriever = self._load_retriever(session_dir)
+                bm25_index = self._load_bm25_index(session_dir, retriever.docstore)
+                vectorstore_path = session_dir / DIR_VECTOR_STORE
+                manifest: Optional[SourceManifest] = None
+                pending_parents: List[Tuple[str, Document]] = []
+                indexed = 0
+                uncommitted = 0
+
+                for batch in batches:
+                    if not batch:
+                        continue
+                    if manifest is None:
+                        manifest = self._load_manifest(vectorstore_path, retriever)
+                    added, parents = self._index_batch(retriever, manifest, batch)
+                    pending_parents.extend(parents)
+                    uncommitted += added
+                    if uncommitted >= settings.INGEST_COMMIT_CHUNKS:
+                        indexed += uncommitted
+                        uncommitted = 0
+                        self._commit_index(
+                            session_dir, retriever, manifest, bm25_index,
+                            pending_parents
+                        )
+                        pending_parents = []
+                    if on_progress is not None:
+                        on_progress(indexed + uncommitted)
+
+                if manifest is not None:
+                    indexed += uncommitted
+                    self._commit_index(
+                        session_dir, retriever, manifest, bm25_index, pending_parents
+                    )
+                    logger.info(
+                        f"{indexed} fragmentos agregados a sesión {session_path}"
+                    )
+                    version = self._publish_version(session_dir, retriever.vectorstore)
+                else:
+                    version = IndexMetadataHandler.get_version(session_dir)
+
+                previous_matrix = (
+                    previous.bm25_retriever.matrix
+                    if previous and previous.bm25_retriever else None
+                )
+                bm25_retriever = self._create_bm25_retriever(
+                    bm25_index, retriever.docstore, previous_matrix
+                )
+                self._cache_components(session_key, version, retriever, bm25_retriever)
 
             return retriever, bm25_retriever
 
@@ -128,46 +572,450 @@ class FAISSRepository(VectorStoreRepository):
             logger.error(f"Error agregando documentos a sesión {session_path}: {e}")
             raise e
 
-    def _create_bm25_retriever(self, store: Any) -> Optional[BM25Retriever]:
-        """Helper para crear BM25 desde el docstore."""
+    def _index_batch(
+        self,
+        retriever: BatchedParentDocumentRetriever,
+        manifest: SourceManifest,
+        documents: List[Document]
+    ) -> Tuple[int, List[Tuple[str, Document]]]:
+        """
+        Divide, embebe e indexa (en memoria) un lote de documentos.
+        Retorna (hijos agregados, padres); los padres se guardan al confirmar.
+        """
+        children, parents = self._split_for_retriever(retriever, documents)
+        child_ids = self._add_children(retriever.vectorstore, children)
+
+        # Registrar qué ids provienen de cada archivo (borrado incremental)
+        for child_id, child in zip(child_ids, children):
+            manifest.add(source_key(child.metadata), child_ids=[child_id])
+        for parent_id, parent in parents:
+            manifest.add(source_key(parent.metadata), parent_ids=[parent_id])
+        return len(children), parents
+
+    def _commit_index(
+        self,
+        session_dir: Path,
+        retriever: BatchedParentDocumentRetriever,
+        manifest: SourceManifest,
+        bm25_index: BM25InvertedIndex,
+        parents: List[Tuple[str, Document]]
+    ) -> None:
+        """
+        Confirma lo indexado desde el último guardado: ajusta el layout del índice
+        ANN y guarda manifiesto, padres, BM25 e índice FAISS. El manifiesto va
+        primero: si el proceso se corta a mitad, todo lo escrito figura en él y
+        un borrado por archivo (o el reintento del trabajo) lo limpia.
+        """
+        # Promoción automática / reentrenamiento del índice ANN si corresponde
+        self._sync_index_layout(session_dir, retriever.vectorstore)
+
+        manifest.save()
+        retriever.docstore.mset(parents)
+        # Actualización incremental del índice léxico (sólo el texto nuevo)
+        bm25_index.add_documents(
+            (parent_id, parent.page_content) for parent_id, parent in parents
+        )
+
+        # Persistir Vector Store
+        logger.info(
+            "Guardando índice vectorial actualizado en "
+            f"{session_dir / DIR_VECTOR_STORE}..."
+        )
+        self._save_vector_store(session_dir, retriever.vectorstore)
+
+    def _add_children(
+        self, vector_store: RescoringFAISS, children: List[Document]
+    ) -> List[str]:
+        """
+        Indexa los fragmentos hijos, embebiendo sólo el texto que no está en caché.
+        Retorna los ids asignados en el docstore de FAISS.
+        """
+        texts = [child.page_content for child in children]
+        if self.embedding_cache is None:
+            embeddings = self.batch_embedder.embed_documents(texts).tolist()
+        else:
+            embeddings = self.embedding_cache.embed_documents(
+                texts, self.batch_embedder.embed_documents
+            ).tolist()
+        return vector_store.add_embeddings(
+            zip(texts, embeddings),
+            metadatas=[child.metadata for child in children]
+        )
+
+    def delete_documents_by_source(self, session_path: str, source_file: str) -> bool:
+        """
+        Elimina del índice sólo las entradas de un archivo: vectores hijos, padres
+        del docstore y documentos del índice BM25. Retorna False si no se pudo
+        (el llamador puede recurrir a una reconstrucción completa).
+        """
+        session_dir = Path(session_path)
+        session_key = self._session_key(session_path)
+        vectorstore_path = session_dir / DIR_VECTOR_STORE
         try:
-            stored_docs = []
-            for key in store.yield_keys():
-                doc = store.mget([key])[0]
-                if doc:
-                    stored_docs.append(doc)
-            
-            if stored_docs:
-                bm25 = BM25Retriever.from_documents(stored_docs)
-                bm25.k = settings.RETRIEVER_K_BM25
-                return bm25
-            return None
+            with self.index_cache.session_lock(session_key):
+                retriever = self._load_retriever(session_dir)
+                manifest = self._load_manifest(vectorstore_path, retriever)
+                entry = manifest.pop(source_file)
+                if entry is None:
+                    logger.info(
+                        f"{source_file} no tiene entradas indexadas en {session_path}"
+                    )
+                    return True
+
+                logger.info(
+                    f"Eliminando {source_file} de la sesión {session_path} "
+                    f"({len(entry['parents'])} padres, "
+                    f"{len(entry['children'])} hijos)..."
+                )
+                self._remove_children(
+                    session_dir, retriever.vectorstore, entry["children"]
+                )
+                retriever.docstore.mdelete(entry["parents"])
+                bm25_index = self._load_bm25_index(session_dir, retriever.docstore)
+                bm25_index.remove_documents(entry["parents"])
+
+                self._save_vector_store(session_dir, retriever.vectorstore)
+                manifest.save()
+                version = self._publish_version(session_dir, retriever.vectorstore)
+                bm25_retriever = self._create_bm25_retriever(
+                    bm25_index, retriever.docstore
+                )
+                self._cache_components(
+                    session_key, version, retriever, bm25_retriever
+                )
+            return True
+
         except Exception as e:
-            logger.warning(f"No se pudo crear BM25Retriever: {e}")
+            logger.error(
+                f"Error eliminando {source_file} del índice de sesión "
+                f"{session_path}: {e}"
+            )
+            return False
+
+    def _load_manifest(
+        self, vectorstore_path: Path, retriever: BatchedParentDocumentRetriever
+    ) -> SourceManifest:
+        """Carga el manifiesto archivo -> ids, reconstruyéndolo en sesiones antiguas."""
+        if SourceManifest.exists(vectorstore_path):
+            return SourceManifest.load(vectorstore_path)
+        vector_store = retriever.vectorstore
+        children = (
+            (child_id, vector_store.docstore.search(child_id))
+            for child_id in vector_store.index_to_docstore_id.values()
+        )
+        manifest = SourceManifest.from_children(
+            vectorstore_path,
+            (
+                (child_id, child)
+                for child_id, child in children
+                if isinstance(child, Document)
+            ),
+            retriever.id_key
+        )
+        if manifest.sources:
+            logger.info(
+                f"Manifiesto de archivos reconstruido para {vectorstore_path} "
+                f"({len(manifest.sources)} archivos)"
+            )
+        return manifest
+
+    def _remove_children(
+        self, session_dir: Path, vector_store: RescoringFAISS, child_ids: List[str]
+    ) -> None:
+        """
+        Quita vectores hijos del índice. Flat/SQ admiten `remove_ids` (compacta las
+        posiciones); HNSW e IVF se reconstruyen con los vectores restantes.
+        """
+        stored = set(vector_store.index_to_docstore_id.values())
+        child_ids = [child_id for child_id in child_ids if child_id in stored]
+        if not child_ids:
+            return
+        if detect_mode(vector_store.index) == INDEX_MODE_FLAT:
+            vector_store.delete(child_ids)
+            return
+
+        removed = set(child_ids)
+        positions = vector_store.index_to_docstore_id
+        keep = np.array(
+            [positions[pos] not in removed for pos in range(vector_store.index.ntotal)],
+            dtype=bool
+        )
+        vectors = self._stored_vectors(vector_store)[keep]
+        vector_store.docstore.delete(child_ids)
+        remaining_ids = [positions[pos] for pos in range(len(keep)) if keep[pos]]
+        vector_store.index_to_docstore_id = dict(enumerate(remaining_ids))
+        self._sync_index_layout(session_dir, vector_store, vectors=vectors)
+
+    @staticmethod
+    def _stored_vectors(vector_store: RescoringFAISS) -> np.ndarray:
+        """Vectores del índice en orden de posición (copia exacta si está alineada)."""
+        exact = vector_store.exact_vectors
+        if exact is not None and exact.num_rows == vector_store.index.ntotal:
+            return exact.read_all()
+        if detect_mode(vector_store.index) == INDEX_MODE_IVF_PQ:
+            logger.warning(
+                "Índice IVF-PQ sin copia exacta de vectores: "
+                "se reconstruye con pérdida."
+            )
+        return reconstruct_all(vector_store.index)
+
+    def _sync_index_layout(
+        self,
+        session_dir: Path,
+        vector_store: RescoringFAISS,
+        vectors: Optional[np.ndarray] = None
+    ) -> str:
+        """
+        Ajusta el índice FAISS al modo, almacenamiento y métrica solicitados para la
+        sesión. Reconstruye los vectores ya almacenados (sin re-embeber) y, si el modo
+        lo requiere, entrena el nuevo índice. Las posiciones se conservan, así que
+        `index_to_docstore_id` sigue siendo válido. Si se pasan `vectors` (en el
+        formato del índice actual), el índice se reconstruye siempre con ellos.
+        """
+        index_meta = IndexMetadataHandler.load(session_dir)
+        vectorstore_path = session_dir / DIR_VECTOR_STORE
+        index = vector_store.index
+        num_vectors = index.ntotal if vectors is None else len(vectors)
+
+        target_mode, target_storage, normalized = self._target_layout(
+            index_meta, num_vectors
+        )
+        target_metric = faiss.METRIC_INNER_PRODUCT if normalized else faiss.METRIC_L2
+        current_mode = detect_mode(index)
+
+        retrains_with_growth = (
+            target_mode in (INDEX_MODE_IVF_FLAT, INDEX_MODE_IVF_PQ)
+            or target_storage == STORAGE_SQ8
+        )
+        trained_on = index_meta.get("trained_on", 0)
+        needs_retrain = (
+            retrains_with_growth
+            and num_vectors > trained_on * settings.IVF_RETRAIN_GROWTH
+        )
+        layout_changed = (
+            target_mode != current_mode
+            or target_storage != detect_storage(index)
+            or target_metric != index.metric_type
+        )
+
+        updates: Dict[str, Any] = {
+            "active_index_mode": target_mode, "active_vector_storage": target_storage
+        }
+        if normalized:
+            updates["normalized"] = True
+        if layout_changed or needs_retrain or vectors is not None:
+            logger.info(
+                f"Reconstruyendo índice {current_mode}/{detect_storage(index)} -> "
+                f"{target_mode}/{target_storage} ({num_vectors} vectores)..."
+            )
+            if vectors is None:
+                vectors = self._stored_vectors(vector_store)
+            if normalized and index.metric_type != faiss.METRIC_INNER_PRODUCT:
+                faiss.normalize_L2(vectors)
+            vector_store.index = build_index(
+                target_mode, vectors, target_metric, target_storage
+            )
+            updates["trained_on"] = num_vectors if retrains_with_growth else 0
+
+            # Copia exacta: re-puntuación de índices cuantizados y fuente de IVF-PQ.
+            # Va a una generación nueva; la anterior se borra al publicar la versión
+            vector_store.exact_vectors = (
+                ExactVectorFile.create(vectorstore_path, vectors)
+                if self._keeps_exact_copy(target_mode, target_storage, normalized)
+                else None
+            )
+
+        self._apply_metric(vector_store, normalized)
+        apply_search_params(vector_store.index, index_meta.get("search_params"))
+        IndexMetadataHandler.update(session_dir, updates)
+        return target_mode
+
+    def _apply_index_layout(
+        self, session_path: str, meta_updates: Dict[str, Any]
+    ) -> str:
+        """Guarda la configuración del índice de la sesión y reconstruye si cambia."""
+        session_dir = Path(session_path)
+        session_key = self._session_key(session_path)
+        with self.index_cache.session_lock(session_key):
+            IndexMetadataHandler.update(session_dir, meta_updates)
+            retriever = self._load_retriever(session_dir)
+            try:
+                index_before = retriever.vectorstore.index
+                active = self._sync_index_layout(session_dir, retriever.vectorstore)
+                if retriever.vectorstore.index is not index_before:
+                    self._save_vector_store(session_dir, retriever.vectorstore)
+                    self._publish_version(session_dir, retriever.vectorstore)
+                    self.index_cache.invalidate(session_key)
+            finally:
+                # Este retriever no entra al caché
+                retriever.docstore.close()
+        return active
+
+    def set_index_mode(self, session_path: str, mode: str) -> str:
+        """
+        Selecciona el modo de índice vectorial de una sesión y lo aplica de inmediato.
+        Retorna el modo efectivo (puede seguir en flat si aún no hay vectores
+        suficientes).
+        """
+        if mode not in INDEX_MODES:
+            raise ValueError(
+                f"Modo de índice no soportado: {mode}. Opciones: {INDEX_MODES}"
+            )
+        return self._apply_index_layout(session_path, {"index_mode": mode})
+
+    def set_vector_storage(self, session_path: str, storage: str) -> str:
+        """
+        Selecciona cómo se almacenan los vectores de la sesión (float32, fp16 o sq8).
+        Los modos cuantizados normalizan los vectores y pasan a producto interno;
+        una vez normalizada, la sesión conserva esa métrica.
+        """
+        if storage not in VECTOR_STORAGES:
+            raise ValueError(
+                f"Almacenamiento no soportado: {storage}. Opciones: {VECTOR_STORAGES}"
+            )
+        updates: Dict[str, Any] = {"vector_storage": storage}
+        if storage != STORAGE_FLOAT32:
+            updates["normalized"] = True
+        return self._apply_index_layout(session_path, updates)
+
+    def set_search_params(
+        self,
+        session_path: str,
+        ef_search: Optional[int] = None,
+        nprobe: Optional[int] = None
+    ) -> None:
+        """Ajusta efSearch (HNSW) / nprobe (IVF) de la sesión y del índice cargado."""
+        session_dir = Path(session_path)
+        params = IndexMetadataHandler.load(session_dir).get("search_params", {})
+        if ef_search is not None:
+            params["ef_search"] = ef_search
+        if nprobe is not None:
+            params["nprobe"] = nprobe
+        IndexMetadataHandler.update(session_dir, {"search_params": params})
+
+        version = IndexMetadataHandler.get_version(session_dir)
+        cached = self.index_cache.get(self._session_key(session_path), version)
+        if cached:
+            apply_search_params(cached.retriever.vectorstore.index, params)
+
+    def _split_for_retriever(
+        self, retriever: ParentDocumentRetriever, documents: List[Document]
+    ) -> Tuple[List[Document], List[Tuple[str, Document]]]:
+        """
+        Divide los documentos en padres (con id estable) e hijos, igual que
+        ParentDocumentRetriever.add_documents, pero exponiendo los ids de los padres
+        para poder indexarlos incrementalmente.
+        """
+        if retriever.parent_splitter is not None:
+            parents = retriever.parent_splitter.split_documents(documents)
+        else:
+            parents = list(documents)
+        children: List[Document] = []
+        full_docs: List[Tuple[str, Document]] = []
+        for parent in parents:
+            parent_id = str(uuid.uuid4())
+            for child in retriever.child_splitter.split_documents([parent]):
+                child.metadata[retriever.id_key] = parent_id
+                children.append(child)
+            full_docs.append((parent_id, parent))
+        return children, full_docs
+
+    def _load_bm25_index(self, session_dir: Path, store: Any) -> BM25InvertedIndex:
+        """Carga el índice BM25 persistido o lo construye una vez desde el docstore."""
+        bm25_dir = session_dir / DIR_VECTOR_STORE / DIR_BM25_INDEX
+        if BM25InvertedIndex.exists(bm25_dir):
+            return BM25InvertedIndex.load(bm25_dir)
+
+        # Migración de sesiones previas: indexar el docstore existente y persistir
+        index = BM25InvertedIndex(bm25_dir)
+        index.add_documents(
+            (key, doc.page_content) for key, doc in store.iter_documents()
+        )
+        if index.num_docs:
+            index.compact()
+            logger.info(
+                "Índice BM25 construido desde el docstore "
+                f"({index.num_docs} documentos)"
+            )
+        return index
+
+    def _create_bm25_retriever(
+        self,
+        index: BM25InvertedIndex,
+        store: Any,
+        previous_matrix: Optional[SparseBM25Matrix] = None
+    ) -> Optional[SparseBM25Retriever]:
+        """
+        Helper para crear el retriever BM25 vectorizado a partir del índice invertido.
+        Con `previous_matrix` (la de la versión anterior a una ingesta) sólo se
+        agregan las columnas de los documentos nuevos.
+        """
+        if not index.num_docs:
             return None
+        if previous_matrix is not None:
+            matrix = previous_matrix.extend(index)
+        else:
+            matrix = SparseBM25Matrix.from_index(index)
+        return SparseBM25Retriever(
+            matrix=matrix, docstore=store, k=settings.RETRIEVER_K_BM25
+        )
 
     def clear_index(self, session_path: str) -> bool:
         """
         Elimina físicamente los directorios del índice vectorial y docstore.
         """
+        session_key = self._session_key(session_path)
         try:
-            session_dir = Path(session_path)
-            vectorstore_path = session_dir / DIR_VECTOR_STORE
-            docstore_path = session_dir / DIR_DOC_STORE
-
-            if vectorstore_path.exists():
-                shutil.rmtree(vectorstore_path)
-                logger.info(f"Eliminado índice vectorial en {vectorstore_path}")
-            
-            if docstore_path.exists():
-                shutil.rmtree(docstore_path)
-                logger.info(f"Eliminado docstore en {docstore_path}")
-
-            # Recrear directorios vacíos
-            vectorstore_path.mkdir(parents=True, exist_ok=True)
-            docstore_path.mkdir(parents=True, exist_ok=True)
-            
-            return True
+            with self.index_cache.session_lock(session_key):
+                return self._clear_index_files(Path(session_path), session_key)
         except Exception as e:
             logger.error(f"Error limpiando índice para sesión {session_path}: {e}")
             return False
+
+    def copy_index(self, source_path: str, target_path: str) -> None:
+        """
+        Copia el índice de una sesión a otra: directorio del índice vectorial
+        (FAISS, manifiesto, log BM25 y copia exacta de vectores), docstore y
+        `index_meta.json`. Se hace con el lock de la sesión de origen y tras volcar
+        el WAL del docstore, así la copia es un estado consistente.
+        """
+        source_dir, target_dir = Path(source_path), Path(target_path)
+        with self.index_cache.session_lock(self._session_key(source_path)):
+            docstore_path = source_dir / DIR_DOC_STORE
+            if (docstore_path / FILE_DOCSTORE_DB).exists():
+                store = self._open_docstore(docstore_path)
+                store.checkpoint()
+                store.close()
+            for dirname in (DIR_VECTOR_STORE, DIR_DOC_STORE):
+                if (source_dir / dirname).exists():
+                    shutil.copytree(
+                        source_dir / dirname, target_dir / dirname, dirs_exist_ok=True,
+                        # Tras el checkpoint todo está en el fichero principal de SQLite
+                        ignore=shutil.ignore_patterns("*-wal", "*-shm")
+                    )
+            if (source_dir / FILE_INDEX_META).exists():
+                shutil.copy2(source_dir / FILE_INDEX_META, target_dir / FILE_INDEX_META)
+        logger.info(f"Índice de {source_path} copiado a {target_path}")
+
+    def _clear_index_files(self, session_dir: Path, session_key: str) -> bool:
+        """Borra los directorios del índice e invalida la versión cacheada."""
+        vectorstore_path = session_dir / DIR_VECTOR_STORE
+        docstore_path = session_dir / DIR_DOC_STORE
+
+        if vectorstore_path.exists():
+            shutil.rmtree(vectorstore_path)
+            logger.info(f"Eliminado índice vectorial en {vectorstore_path}")
+
+        if docstore_path.exists():
+            shutil.rmtree(docstore_path)
+            logger.info(f"Eliminado docstore en {docstore_path}")
+
+        # Recrear directorios vacíos
+        vectorstore_path.mkdir(parents=True, exist_ok=True)
+        docstore_path.mkdir(parents=True, exist_ok=True)
+
+        # Nueva versión: ninguna entrada previa del caché vuelve a ser válida
+        IndexMetadataHandler.bump_version(session_dir)
+        self.index_cache.invalidate(session_key)
+
+        return True
@@ -0,0 +1,307 @@
+import logging
+import threading
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from config.settings import settings
+from core.domain.models import RetrievalCandidate
+from infrastructure.vector_store.bm25_index import tokenize
+from infrastructure.vector_store.parent_map import ParentMap
+
+logger = logging.getLogger(__name__)
+
+_retrieval_executor: Optional[ThreadPoolExecutor] = None
+_retrieval_executor_lock = threading.Lock()
+
+def get_retrieval_executor() -> ThreadPoolExecutor:
+    """Pool acotado, compartido por el proceso, para las ramas de recuperación."""
+    global _retrieval_executor
+    with _retrieval_executor_lock:
+        if _retrieval_executor is None:
+            _retrieval_executor = ThreadPoolExecutor(
+                max_workers=settings.RETRIEVAL_MAX_WORKERS,
+                thread_name_prefix="retrieval"
+            )
+        return _retrieval_executor
+
+class HybridRetriever(BaseRetriever):
+    """
+    Recuperación híbrida (BM25 + denso) con Reciprocal Rank Fusion ponderado.
+
+    Sustituye al `EnsembleRetriever` por consulta: ambas ramas devuelven arrays de
+    ordinales de padre, la fusión se hace con NumPy sobre esos enteros y sólo los
+    candidatos finales se leen del docstore como `Document`.
+
+    Los ordinales son los de `parent_map` (una vez por versión del índice):
+    primero las columnas de la matriz BM25 (columna == ordinal) y después los
+    padres que sólo tengan hijos en FAISS. Se construye en la primera consulta a
+    la versión y se comparte con las siguientes.
+
+    Las dos ramas (cada una con la lectura de sus padres) se ejecutan en paralelo
+    en un pool acotado. Una rama que supera `branch_timeout` se descarta y la
+    respuesta se construye sólo con la otra.
+    """
+    vector_store: Any
+    docstore: Any
+    parent_map: Any
+    matrix: Optional[Any] = None
+    id_key: str = "doc_id"
+    k_dense: int = 60
+    k_sparse: int = 30
+    weight_dense: float = 0.6
+    weight_sparse: float = 0.4
+    rrf_c: int = 60
+    k: Optional[int] = None
+    branch_timeout: float = 5.0
+    passages_per_parent: int = 3
+    executor: Optional[Executor] = None
+    # Versión del índice y caché de resultados de la sesión (ver
+    # ChatService._retrieve_documents)
+    version: int = 0
+    result_cache: Optional[Any] = None
+
+    def _dense_ranking(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Ordinales de padre en orden de primera aparición entre los hijos más
+        cercanos, junto con las posiciones de esos hijos.
+        """
+        child_parent = self.parent_map.child_parent
+        embedding = self.vector_store.embedding_function.embed_query(query)
+        positions, _ = self.vector_store.search_positions(embedding, self.k_dense)
+        positions = positions[child_parent[positions] >= 0]
+        parents = child_parent[positions]
+        _, first = np.unique(parents, return_index=True)
+        return parents[np.sort(first)], positions
+
+    def _sparse_ranking(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        empty = np.zeros(0, dtype=np.int64)
+        if self.matrix is None:
+            return empty, empty
+        cols, _ = self.matrix.top_k(query, self.k_sparse)
+        return cols, empty
+
+    def fuse(self, dense: np.ndarray, sparse: np.ndarray) -> List[RetrievalCandidate]:
+        """RRF ponderado: score = sum(w / (rank + c)), con rank empezando en 1."""
+        parent_ids = self.parent_map.parent_ids
+        ords = np.concatenate([sparse, dense]).astype(np.int64)
+        if ords.size == 0:
+            return []
+        contributions = np.concatenate([
+            self.weight_sparse / (np.arange(1, sparse.size + 1) + self.rrf_c),
+            self.weight_dense / (np.arange(1, dense.size + 1) + self.rrf_c),
+        ])
+        unique_ords, first, inverse = np.unique(
+            ords, return_index=True, return_inverse=True
+        )
+        scores = np.bincount(inverse, weights=contributions)
+        # Empates: primero el que apareció antes (BM25 y luego denso), como
+        # EnsembleRetriever
+        order = np.lexsort((first, -scores))
+        if self.k is not None:
+            order = order[:self.k]
+
+        # Rango (1..n) de cada candidato en cada rama; 0 = ausente
+        sparse_rank = np.zeros(unique_ords.size, dtype=np.int64)
+        sparse_rank[inverse[:sparse.size]] = np.arange(1, sparse.size + 1)
+        dense_rank = np.zeros(unique_ords.size, dtype=np.int64)
+        dense_rank[inverse[sparse.size:]] = np.arange(1, dense.size + 1)
+        return [
+            RetrievalCandidate(
+                doc_id=parent_ids[ord_],
+                score=score,
+                dense_rank=d_rank or None,
+                sparse_rank=s_rank or None
+            )
+            for ord_, score, d_rank, s_rank in zip(
+                unique_ords[order].tolist(), scores[order].tolist(),
+                dense_rank[order].tolist(), sparse_rank[order].tolist()
+            )
+        ]
+
+    def _fetch(self, ords: np.ndarray) -> Dict[str, Document]:
+        """Lee del docstore los padres de una rama (en el mismo hilo de la rama)."""
+        parent_ids = self.parent_map.parent_ids
+        ids = [parent_ids[o] for o in ords.tolist()]
+        docs = self.docstore.mget(ids)
+        return {doc_id: doc for doc_id, doc in zip(ids, docs) if doc is not None}
+
+    def _run_branch(
+        self, ranking, query: str, fetch: bool
+    ) -> Tuple[np.ndarray, np.ndarray, Dict[str, Document]]:
+        ords, hits = ranking(query)
+        return ords, hits, self._fetch(ords) if fetch else {}
+
+    def _run_branches(
+        self, query: str, fetch: bool
+    ) -> Tuple[np.ndarray, np.ndarray, Dict[str, Document], np.ndarray]:
+        """
+        Ejecuta ambas ramas en paralelo; una rama lenta o fallida queda vacía.
+        Retorna (ranking denso, ranking BM25, padres precargados, hijos densos).
+        """
+        executor = self.executor or get_retrieval_executor()
+        run = self._run_branch
+        futures = {
+            "densa": executor.submit(run, self._dense_ranking, query, fetch),
+            "BM25": executor.submit(run, self._sparse_ranking, query, fetch),
+        }
+        deadline = time.monotonic() + self.branch_timeout
+        rankings: Dict[str, np.ndarray] = {}
+        hits: Dict[str, np.ndarray] = {}
+        docs: Dict[str, Document] = {}
+        empty = np.zeros(0, dtype=np.int64)
+        for name, future in futures.items():
+            try:
+                timeout = max(0.0, deadline - time.monotonic())
+                ords, branch_hits, branch_docs = future.result(timeout=timeout)
+            except FutureTimeoutError:
+                # El hilo no se puede interrumpir: termina en segundo plano y se ignora
+                future.cancel()
+                logger.warning(
+                    f"Rama {name} superó {self.branch_timeout}s; se responde sin ella."
+                )
+                ords, branch_hits, branch_docs = empty, empty, {}
+            except Exception as e:
+                logger.error(f"Error en la rama {name} de recuperación: {e}")
+                ords, branch_hits, branch_docs = empty, empty, {}
+            rankings[name] = ords
+            hits[name] = branch_hits
+            docs.update(branch_docs)
+        return rankings["densa"], rankings["BM25"], docs, hits["densa"]
+
+    def search(
+        self, query: str, with_passages: bool = False
+    ) -> List[RetrievalCandidate]:
+        """
+        Ejecuta ambas ramas y retorna los candidatos fusionados (sin Documents).
+        Con `with_passages`, cada candidato lleva los fragmentos hijos que coincidieron.
+        """
+        dense, sparse, _, dense_hits = self._run_branches(query, fetch=False)
+        candidates = self.fuse(dense, sparse)
+        if with_passages:
+            self._attach_passages(query, candidates, dense_hits)
+            self._fill_missing_passages(candidates)
+        return candidates
+
+    def _fill_missing_passages(self, candidates: List[RetrievalCandidate]) -> None:
+        """
+        Los candidatos sin hijos asignados (padres sin hijos en FAISS) usan el
+        texto del padre como pasaje.
+        """
+        missing = [c for c in candidates if not c.passages]
+        if not missing:
+            return
+        docs_by_id = {doc.id: doc for doc in self.materialize(missing)}
+        for candidate in missing:
+            doc = docs_by_id.get(candidate.doc_id)
+            if doc is not None:
+                candidate.passages = [doc.page_content]
+
+    def _child_text(self, position: int) -> str:
+        child_id = self.vector_store.index_to_docstore_id[position]
+        child = self.vector_store.docstore.search(child_id)
+        return child.page_content if isinstance(child, Document) else ""
+
+    def _attach_passages(
+        self,
+        query: str,
+        candidates: List[RetrievalCandidate],
+        dense_hits: np.ndarray
+    ) -> None:
+        """
+        Asigna a cada candidato sus hijos encontrados por la rama densa (en orden de
+        similitud). Los padres que sólo encontró BM25 usan los hijos con más términos
+        de la consulta.
+        """
+        parent_map = self.parent_map
+        child_parent = parent_map.child_parent
+        hits_by_parent: Dict[int, List[int]] = {}
+        for position in dense_hits.tolist():
+            hits_by_parent.setdefault(int(child_parent[position]), []).append(position)
+
+        query_terms = set(tokenize(query))
+        sorted_parents = child_parent[parent_map.children_sorted]
+        for candidate in candidates:
+            ord_ = parent_map.parent_index.get(candidate.doc_id)
+            if ord_ is None:
+                continue
+            positions = hits_by_parent.get(ord_, [])[:self.passages_per_parent]
+            if positions:
+                candidate.passages = [self._child_text(p) for p in positions]
+                continue
+            start, end = np.searchsorted(sorted_parents, [ord_, ord_ + 1])
+            children = parent_map.children_sorted[start:end]
+            texts = [self._child_text(int(p)) for p in children]
+            overlap = [len(query_terms.intersection(tokenize(text))) for text in texts]
+            ranked = sorted(range(len(texts)), key=lambda i: -overlap[i])
+            best = ranked[:self.passages_per_parent]
+            candidate.passages = [texts[i] for i in sorted(best)]
+
+    def materialize(
+        self,
+        candidates: List[RetrievalCandidate],
+        prefetched: Optional[Dict[str, Document]] = None
+    ) -> List[Document]:
+        """Documentos padre de los candidatos; del docstore sólo los no precargados."""
+        if not candidates:
+            return []
+        prefetched = prefetched or {}
+        missing = [c.doc_id for c in candidates if c.doc_id not in prefetched]
+        if missing:
+            docs = self.docstore.mget(missing)
+            prefetched = {**prefetched, **{
+                doc_id: doc for doc_id, doc in zip(missing, docs) if doc is not None
+            }}
+        return [prefetched[c.doc_id] for c in candidates if c.doc_id in prefetched]
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        dense, sparse, docs, _ = self._run_branches(query, fetch=True)
+        return self.materialize(self.fuse(dense, sparse), docs)
+
+def build_hybrid_retriever(
+    retriever: Any,
+    bm25_retriever: Optional[Any],
+    version: int = 0,
+    result_cache: Optional[Any] = None,
+    parent_map: Optional[ParentMap] = None
+) -> HybridRetriever:
+    """
+    Crea el retriever híbrido de una sesión a partir de sus componentes cargados.
+    `parent_map` debe estar construido con las columnas de esa matriz BM25; si no
+    se pasa, se construye aquí.
+    """
+    matrix = bm25_retriever.matrix if bm25_retriever is not None else None
+    if parent_map is None:
+        parent_map = ParentMap.build(
+            retriever.vectorstore,
+            retriever.id_key,
+            matrix.doc_ids if matrix is not None else ()
+        )
+    return HybridRetriever(
+        vector_store=retriever.vectorstore,
+        docstore=retriever.docstore,
+        parent_map=parent_map,
+        matrix=matrix,
+        id_key=retriever.id_key,
+        k_dense=retriever.search_kwargs.get("k", settings.RETRIEVER_K_PARENT),
+        k_sparse=(
+            bm25_retriever.k
+            if bm25_retriever is not None
+            else settings.RETRIEVER_K_BM25
+        ),
+        weight_dense=settings.HYBRID_WEIGHT_DENSE,
+        weight_sparse=settings.HYBRID_WEIGHT_SPARSE,
+        rrf_c=settings.HYBRID_RRF_C,
+        branch_timeout=settings.RETRIEVAL_BRANCH_TIMEOUT_S,
+        passages_per_parent=settings.RERANK_CHILDREN_PER_PARENT,
+        version=version,
+        result_cache=result_cache
+    )
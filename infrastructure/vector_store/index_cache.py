@@ -0,0 +1,168 @@
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class CachedSessionIndex:
+    """Componentes ya cargados del índice de una sesión."""
+    retriever: Any
+    bm25_retriever: Any
+    version: int
+    size_bytes: int
+    hybrid_retriever: Any = None
+    result_cache: Any = None
+    # Relación hijo -> padre e índice de metadatos: se construyen en la primera
+    # consulta que los necesita (ver `FAISSRepository._child_maps`)
+    metadata_index: Any = None
+    parent_map: Any = None
+    lock: Any = field(default_factory=threading.Lock, repr=False)
+
+    def close(self) -> None:
+        """Cierra la conexión del docstore de padres (la comparten ambos retrievers)."""
+        docstore = getattr(self.retriever, "docstore", None)
+        if docstore is not None and hasattr(docstore, "close"):
+            docstore.close()
+
+class SessionIndexCache:
+    """
+    Caché LRU de índices de sesión compartido por todo el proceso.
+
+    Las entradas se indexan por (ruta de sesión, versión del índice), de modo que
+    una escritura que incrementa la versión deja obsoleta la entrada anterior.
+    El tamaño total se acota con un presupuesto de memoria aproximado. Las
+    entradas que salen del caché (reemplazadas, invalidadas o expulsadas) cierran
+    su docstore.
+    """
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, int], CachedSessionIndex]" = (
+            OrderedDict()
+        )
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+        self._session_locks: Dict[str, threading.RLock] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def session_lock(self, session_key: str) -> threading.RLock:
+        """Lock por sesión para serializar cargas y escrituras del mismo índice."""
+        with self._lock:
+            lock = self._session_locks.get(session_key)
+            if lock is None:
+                lock = threading.RLock()
+                self._session_locks[session_key] = lock
+            return lock
+
+    def get(self, session_key: str, version: int) -> Optional[CachedSessionIndex]:
+        with self._lock:
+            entry = self._entries.get((session_key, version))
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((session_key, version))
+            self.hits += 1
+            return entry
+
+    def peek(self, session_key: str, version: int) -> Optional[CachedSessionIndex]:
+        """Entrada de esa versión sin contar acierto ni refrescar su posición LRU."""
+        with self._lock:
+            return self._entries.get((session_key, version))
+
+    def contains(self, session_key: str, version: int) -> bool:
+        with self._lock:
+            return (session_key, version) in self._entries
+
+    def find_by_retriever(self, retriever: Any) -> Optional[CachedSessionIndex]:
+        """Entrada cuyo retriever denso es `retriever` (no cuenta como acierto)."""
+        with self._lock:
+            for entry in self._entries.values():
+                if entry.retriever is retriever:
+                    return entry
+            return None
+
+    def put(self, session_key: str, entry: CachedSessionIndex) -> None:
+        with self._lock:
+            # Una sesión sólo mantiene su versión más reciente
+            dropped = self._drop_session(session_key)
+            self._entries[(session_key, entry.version)] = entry
+            self._total_bytes += entry.size_bytes
+            dropped += self._evict()
+        self._close(dropped, keep=entry)
+
+    def add_size(self, entry: CachedSessionIndex, nbytes: int) -> None:
+        """Suma `nbytes` a una entrada que creció después de `put`."""
+        dropped: List[CachedSessionIndex] = []
+        with self._lock:
+            entry.size_bytes += nbytes
+            if any(cached is entry for cached in self._entries.values()):
+                self._total_bytes += nbytes
+                dropped = self._evict()
+        self._close(dropped)
+
+    def invalidate(self, session_key: str) -> None:
+        with self._lock:
+            dropped = self._drop_session(session_key)
+        self._close(dropped)
+
+    def clear(self) -> None:
+        with self._lock:
+            dropped = list(self._entries.values())
+            self._entries.clear()
+            self._total_bytes = 0
+        self._close(dropped)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "size_mb": round(self._total_bytes / (1024 * 1024), 2),
+                "max_mb": round(self.max_bytes / (1024 * 1024), 2),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def _drop_session(self, session_key: str) -> List[CachedSessionIndex]:
+        dropped = []
+        for key in [k for k in self._entries if k[0] == session_key]:
+            entry = self._entries.pop(key)
+            self._total_bytes -= entry.size_bytes
+            dropped.append(entry)
+        return dropped
+
+    def _evict(self) -> List[CachedSessionIndex]:
+        # Siempre se conserva la entrada más reciente, aunque supere el presupuesto
+        evicted = []
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            (session_key, version), entry = self._entries.popitem(last=False)
+            self._total_bytes -= entry.size_bytes
+            evicted.append(entry)
+            logger.info(f"Índice expulsado del caché: {session_key} (v{version})")
+        return evicted
+
+    @staticmethod
+    def _close(
+        entries: List[CachedSessionIndex], keep: Optional[CachedSessionIndex] = None
+    ) -> None:
+        """Cierra los docstores de las entradas que salieron (fuera del lock)."""
+        kept = getattr(keep.retriever, "docstore", None) if keep else None
+        for entry in entries:
+            # Una escritura puede volver a cachear el mismo docstore
+            if kept is None or getattr(entry.retriever, "docstore", None) is not kept:
+                entry.close()
+
+_shared_cache: Optional[SessionIndexCache] = None
+_shared_cache_lock = threading.Lock()
+
+def get_shared_index_cache() -> SessionIndexCache:
+    """Retorna la instancia única del caché de índices para el proceso."""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = SessionIndexCache(settings.INDEX_CACHE_MAX_MB * 1024 * 1024)
+        return _shared_cache
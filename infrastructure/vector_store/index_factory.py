@@ -0,0 +1,203 @@
+import logging
+import math
+from typing import Any, Dict, Optional
+
+import faiss
+import numpy as np
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Modos de índice vectorial soportados por sesión
+INDEX_MODE_AUTO = "auto"
+INDEX_MODE_FLAT = "flat"
+INDEX_MODE_HNSW = "hnsw"
+INDEX_MODE_IVF_FLAT = "ivf_flat"
+INDEX_MODE_IVF_PQ = "ivf_pq"
+INDEX_MODES = [
+    INDEX_MODE_AUTO,
+    INDEX_MODE_FLAT,
+    INDEX_MODE_HNSW,
+    INDEX_MODE_IVF_FLAT,
+    INDEX_MODE_IVF_PQ,
+]
+
+# Almacenamiento de los vectores dentro del índice
+STORAGE_FLOAT32 = "float32"
+STORAGE_FP16 = "fp16"
+STORAGE_SQ8 = "sq8"
+STORAGE_PQ = "pq"  # Implícito en ivf_pq, no seleccionable
+VECTOR_STORAGES = [STORAGE_FLOAT32, STORAGE_FP16, STORAGE_SQ8]
+
+_SQ_TYPES: Dict[str, Any] = {
+    STORAGE_FP16: faiss.ScalarQuantizer.QT_fp16,
+    STORAGE_SQ8: faiss.ScalarQuantizer.QT_8bit,
+}
+
+# Puntos de entrenamiento por centroide recomendados por FAISS
+_TRAINING_POINTS_PER_CENTROID = 39
+
+def ivf_nlist(num_vectors: int) -> int:
+    """Número de listas IVF razonable para el tamaño del corpus."""
+    nlist = int(4 * math.sqrt(max(num_vectors, 1)))
+    nlist = min(nlist, num_vectors // _TRAINING_POINTS_PER_CENTROID)
+    return max(1, min(nlist, 65536))
+
+def min_vectors_for_mode(mode: str) -> int:
+    """Vectores mínimos para poder entrenar el modo (0 si no requiere entrenamiento)."""
+    if mode == INDEX_MODE_IVF_FLAT:
+        return settings.IVF_MIN_LISTS * _TRAINING_POINTS_PER_CENTROID
+    if mode == INDEX_MODE_IVF_PQ:
+        # El codebook PQ necesita 2^nbits * 39 puntos
+        centroids = max(settings.IVF_MIN_LISTS, 2 ** settings.IVF_PQ_NBITS)
+        return centroids * _TRAINING_POINTS_PER_CENTROID
+    return 0
+
+def detect_mode(index: Any) -> str:
+    """Infiere el modo a partir del tipo concreto del índice FAISS."""
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexHNSW):
+        return INDEX_MODE_HNSW
+    if isinstance(index, faiss.IndexIVFPQ):
+        return INDEX_MODE_IVF_PQ
+    if isinstance(index, faiss.IndexIVF):
+        return INDEX_MODE_IVF_FLAT
+    return INDEX_MODE_FLAT
+
+def resolve_mode(requested: str, num_vectors: int) -> str:
+    """
+    Traduce el modo solicitado al modo efectivo para `num_vectors`.
+    `auto` se promociona a `VECTOR_INDEX_AUTO_TARGET` al superar el umbral, y los
+    modos IVF se quedan en flat hasta tener suficientes vectores para entrenar.
+    """
+    mode = requested
+    if requested == INDEX_MODE_AUTO:
+        if num_vectors < settings.ANN_PROMOTION_THRESHOLD:
+            return INDEX_MODE_FLAT
+        mode = settings.VECTOR_INDEX_AUTO_TARGET
+    if num_vectors < min_vectors_for_mode(mode):
+        return INDEX_MODE_FLAT
+    return mode
+
+def detect_storage(index: Any) -> str:
+    """Infiere cómo se almacenan los vectores (float32, fp16, sq8 o pq)."""
+    base = faiss.downcast_index(index)
+    if isinstance(base, faiss.IndexIVFPQ):
+        return STORAGE_PQ
+    if isinstance(base, faiss.IndexHNSW):
+        base = faiss.downcast_index(base.storage)
+    if isinstance(base, (faiss.IndexScalarQuantizer, faiss.IndexIVFScalarQuantizer)):
+        for storage, qtype in _SQ_TYPES.items():
+            if base.sq.qtype == qtype:
+                return storage
+    return STORAGE_FLOAT32
+
+def resolve_storage(requested: str, mode: str, num_vectors: int) -> str:
+    """Almacenamiento efectivo: sq8 necesita datos para entrenar sus rangos."""
+    if mode == INDEX_MODE_IVF_PQ:
+        return STORAGE_PQ
+    if requested == STORAGE_SQ8 and num_vectors < settings.SQ8_MIN_TRAIN:
+        return STORAGE_FP16
+    return requested
+
+def create_index(
+    mode: str, dim: int, num_vectors: int = 0,
+    metric: int = faiss.METRIC_L2, storage: str = STORAGE_FLOAT32
+) -> Any:
+    """Crea un índice vacío (sin entrenar) del modo y almacenamiento indicados."""
+    qtype = _SQ_TYPES.get(storage)
+    if mode == INDEX_MODE_HNSW:
+        index: Any
+        if qtype is not None:
+            index = faiss.IndexHNSWSQ(dim, qtype, settings.HNSW_M, metric)
+        else:
+            index = faiss.IndexHNSWFlat(dim, settings.HNSW_M, metric)
+        index.hnsw.efConstruction = settings.HNSW_EF_CONSTRUCTION
+        return index
+    if mode in (INDEX_MODE_IVF_FLAT, INDEX_MODE_IVF_PQ):
+        nlist = max(settings.IVF_MIN_LISTS, ivf_nlist(num_vectors))
+        quantizer = faiss.IndexFlat(dim, metric)
+        if mode == INDEX_MODE_IVF_PQ:
+            return faiss.IndexIVFPQ(
+                quantizer, dim, nlist, settings.IVF_PQ_M, settings.IVF_PQ_NBITS, metric
+            )
+        if qtype is not None:
+            return faiss.IndexIVFScalarQuantizer(quantizer, dim, nlist, qtype, metric)
+        return faiss.IndexIVFFlat(quantizer, dim, nlist, metric)
+    if qtype is not None:
+        return faiss.IndexScalarQuantizer(dim, qtype, metric)
+    return faiss.IndexFlat(dim, metric)
+
+def build_index(
+    mode: str, vectors: np.ndarray,
+    metric: int = faiss.METRIC_L2, storage: str = STORAGE_FLOAT32
+) -> Any:
+    """Crea, entrena si hace falta y rellena un índice con `vectors` (en orden)."""
+    num_vectors, dim = vectors.shape
+    index = create_index(mode, dim, num_vectors, metric, storage)
+    if not index.is_trained:
+        logger.info(f"Entrenando índice {mode} con {num_vectors} vectores...")
+        index.train(vectors)
+    index.add(vectors)
+    return index
+
+def estimate_index_bytes(index: Any) -> int:
+    """Memoria aproximada del índice según el tamaño de código por vector."""
+    base = faiss.downcast_index(index)
+    overhead = 0
+    if isinstance(base, faiss.IndexHNSW):
+        overhead = index.ntotal * settings.HNSW_M * 2 * 4
+        base = faiss.downcast_index(base.storage)
+    elif isinstance(base, faiss.IndexIVF):
+        overhead = index.ntotal * 8  # ids de las listas invertidas
+    code_size = getattr(base, "code_size", index.d * 4)
+    return index.ntotal * code_size + overhead
+
+def reconstruct_all(index: Any) -> np.ndarray:
+    """Recupera todos los vectores almacenados, en orden de posición."""
+    if index.ntotal == 0:
+        return np.zeros((0, index.d), dtype=np.float32)
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        # IVF necesita el mapa directo posición -> lista para reconstruir
+        ivf.make_direct_map()
+    return index.reconstruct_n(0, index.ntotal)
+
+def mmap_io_flags(mode: str) -> int:
+    """
+    Flags de `faiss.read_index` para mapear el índice en memoria (sólo lectura).
+    IVF mapea sus listas invertidas; flat/SQ/HNSW mapean el array de códigos.
+    """
+    if mode in (INDEX_MODE_IVF_FLAT, INDEX_MODE_IVF_PQ):
+        return faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+    return faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY
+
+def apply_search_params(index: Any, params: Optional[Dict[str, Any]] = None) -> None:
+    """Aplica efSearch / nprobe (valores de sesión o los globales por defecto)."""
+    params = params or {}
+    base = faiss.downcast_index(index)
+    if isinstance(base, faiss.IndexHNSW):
+        base.hnsw.efSearch = int(params.get("ef_search", settings.HNSW_EF_SEARCH))
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = min(int(params.get("nprobe", settings.IVF_NPROBE)), ivf.nlist)
+
+def filtered_search_params(index: Any, selector: Any) -> Any:
+    """
+    Parámetros de búsqueda con un selector de ids, conservando el efSearch /
+    nprobe vigentes del índice (los parámetros por búsqueda los reemplazan).
+    """
+    # Los kwargs del wrapper de faiss conservan la referencia al selector; sus
+    # stubs no los declaran (ni a SearchParametersHNSW)
+    base = faiss.downcast_index(index)
+    if isinstance(base, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(  # type: ignore[attr-defined]
+            sel=selector, efSearch=base.hnsw.efSearch
+        )
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        return faiss.SearchParametersIVF(  # type: ignore[call-arg]
+            sel=selector, nprobe=ivf.nprobe
+        )
+    return faiss.SearchParameters(sel=selector)  # type: ignore[call-arg]
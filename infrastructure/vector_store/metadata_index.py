@@ -0,0 +1,114 @@
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from infrastructure.vector_store.source_manifest import source_key
+
+logger = logging.getLogger(__name__)
+
+# Campos con un bitmap por valor; "page" se indexa aparte como array de enteros
+BITMAP_FIELDS = ("source_file", "parser", "type")
+FIELD_PAGE = "page"
+
+class MetadataIndex:
+    """
+    Índice de metadatos de los hijos de una sesión sobre las posiciones de FAISS.
+
+    Por cada campo de `BITMAP_FIELDS` y cada valor se guarda un bitmap empaquetado
+    (1 bit por vector, orden de bits de `faiss.IDSelectorBitmap`), y la página de
+    cada vector en un array int32 (-1 si no tiene). `mask` combina los filtros
+    (OR dentro de un campo, AND entre campos) sin tocar el docstore.
+
+    "source_file" usa el mismo criterio que el manifiesto de archivos: las notas
+    de usuario quedan bajo su `source` ("user_note").
+    """
+    def __init__(
+        self,
+        num_vectors: int,
+        bitmaps: Dict[str, Dict[str, np.ndarray]],
+        pages: np.ndarray
+    ):
+        self.num_vectors = num_vectors
+        self.bitmaps = bitmaps
+        self.pages = pages
+
+    @classmethod
+    def from_children(
+        cls, num_vectors: int, children: Iterable[Tuple[int, Document]]
+    ) -> "MetadataIndex":
+        """
+        Construye el índice a partir de (posición, Document) de los hijos, una vez
+        por versión (ver `parent_map.build_child_maps`, que los lee del docstore).
+        """
+        masks: Dict[str, Dict[str, np.ndarray]] = {field: {} for field in BITMAP_FIELDS}
+        pages = np.full(num_vectors, -1, dtype=np.int32)
+        for position, child in children:
+            for field, value in cls._field_values(child.metadata):
+                mask = masks[field].get(value)
+                if mask is None:
+                    mask = masks[field][value] = np.zeros(num_vectors, dtype=bool)
+                mask[position] = True
+            page = child.metadata.get(FIELD_PAGE)
+            if isinstance(page, int):
+                pages[position] = page
+
+        bitmaps = {
+            field: {
+                value: np.packbits(mask, bitorder="little")
+                for value, mask in values.items()
+            }
+            for field, values in masks.items()
+        }
+        logger.info(
+            f"Índice de metadatos: {num_vectors} vectores, "
+            f"{sum(len(values) for values in bitmaps.values())} bitmaps"
+        )
+        return cls(num_vectors, bitmaps, pages)
+
+    @staticmethod
+    def _field_values(metadata: Dict[str, Any]) -> Iterable[Tuple[str, str]]:
+        yield "source_file", source_key(metadata)
+        for field in ("parser", "type"):
+            if metadata.get(field):
+                yield field, str(metadata[field])
+
+    def values(self, field: str) -> List[str]:
+        """Valores distintos de un campo indexado."""
+        return sorted(self.bitmaps.get(field, {}))
+
+    def _unpack(self, bitmap: np.ndarray) -> np.ndarray:
+        bits = np.unpackbits(bitmap, count=self.num_vectors, bitorder="little")
+        return bits.astype(bool)
+
+    def mask(self, filters: Dict[str, Any]) -> np.ndarray:
+        """
+        Máscara booleana (por posición) de los vectores que cumplen `filters`.
+        Cada filtro es un valor o lista de valores; "page" admite (desde, hasta).
+        """
+        selected = np.ones(self.num_vectors, dtype=bool)
+        for field, value in filters.items():
+            if field == FIELD_PAGE:
+                is_range = isinstance(value, (tuple, list))
+                first, last = value if is_range else (value, value)
+                selected &= (self.pages >= first) & (self.pages <= last)
+                continue
+            if field not in self.bitmaps:
+                raise ValueError(f"Campo de metadatos no indexado: {field}")
+            wanted = value if isinstance(value, (list, tuple, set)) else [value]
+            packed: Optional[np.ndarray] = None
+            for item in wanted:
+                bitmap = self.bitmaps[field].get(str(item))
+                if bitmap is not None:
+                    packed = bitmap if packed is None else np.bitwise_or(packed, bitmap)
+            if packed is None:
+                return np.zeros(self.num_vectors, dtype=bool)
+            selected &= self._unpack(packed)
+        return selected
+
+    def estimated_bytes(self) -> int:
+        bitmaps = sum(
+            b.nbytes for values in self.bitmaps.values() for b in values.values()
+        )
+        return bitmaps + self.pages.nbytes
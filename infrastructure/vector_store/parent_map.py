@@ -0,0 +1,107 @@
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from infrastructure.vector_store.metadata_index import MetadataIndex
+
+logger = logging.getLogger(__name__)
+
+class ParentMap:
+    """
+    Relación hijo -> padre de una versión del índice, con enteros.
+
+    `child_parent[posición]` es el ordinal del padre del hijo en esa posición de
+    FAISS (-1 si no tiene) y `parent_ids[ordinal]` su id en el docstore. Los
+    primeros ordinales son los ids recibidos en `seed_parent_ids` (las columnas de
+    la matriz BM25, así columna == ordinal); después, los padres que sólo tienen
+    hijos en FAISS. `children_sorted` agrupa las posiciones de hijos por padre
+    (padre -> hijos por búsqueda binaria).
+
+    Se construye una vez por versión y la comparten el retriever de padres, el
+    híbrido y el índice de metadatos (`build_child_maps` recorre los hijos una vez).
+    """
+    def __init__(self, parent_ids: List[str], child_parent: np.ndarray):
+        self.parent_ids = parent_ids
+        self.parent_index: Dict[str, int] = {
+            doc_id: i for i, doc_id in enumerate(parent_ids)
+        }
+        self.child_parent = child_parent
+        self.children_sorted = np.argsort(child_parent, kind="stable")
+
+    @property
+    def num_vectors(self) -> int:
+        return len(self.child_parent)
+
+    @classmethod
+    def from_children(
+        cls,
+        num_vectors: int,
+        children: Sequence[Tuple[int, Document]],
+        id_key: str,
+        seed_parent_ids: Sequence[str] = ()
+    ) -> "ParentMap":
+        parent_ids: List[str] = list(seed_parent_ids)
+        parent_index: Dict[str, int] = {
+            doc_id: i for i, doc_id in enumerate(parent_ids)
+        }
+        child_parent = np.full(num_vectors, -1, dtype=np.int32)
+        for position, child in children:
+            parent_id = child.metadata.get(id_key)
+            if parent_id is None:
+                continue
+            ord_ = parent_index.get(parent_id)
+            if ord_ is None:
+                ord_ = parent_index[parent_id] = len(parent_ids)
+                parent_ids.append(parent_id)
+            child_parent[position] = ord_
+        return cls(parent_ids, child_parent)
+
+    @classmethod
+    def build(
+        cls, vector_store: Any, id_key: str, seed_parent_ids: Sequence[str] = ()
+    ) -> "ParentMap":
+        """Construye sólo la relación hijo -> padre (sin índice de metadatos)."""
+        return cls.from_children(
+            vector_store.index.ntotal,
+            child_documents(vector_store),
+            id_key,
+            seed_parent_ids
+        )
+
+    def estimated_bytes(self) -> int:
+        ids_bytes = sum(len(p) for p in self.parent_ids) * 2
+        return self.child_parent.nbytes + self.children_sorted.nbytes + ids_bytes
+
+def child_documents(vector_store: Any) -> List[Tuple[int, Document]]:
+    """
+    (posición, Document) de los hijos del vector store: un único recorrido del
+    docstore.
+    """
+    child_docs = vector_store.docstore
+    children = []
+    for position, child_id in vector_store.index_to_docstore_id.items():
+        child = child_docs.search(child_id)
+        if isinstance(child, Document):
+            children.append((position, child))
+    return children
+
+def build_child_maps(
+    vector_store: Any, id_key: str, seed_parent_ids: Optional[Sequence[str]] = None
+) -> Tuple[ParentMap, MetadataIndex]:
+    """
+    Relación hijo -> padre e índice de metadatos a partir de un solo recorrido de
+    los hijos.
+    """
+    num_vectors = vector_store.index.ntotal
+    children = child_documents(vector_store)
+    parent_map = ParentMap.from_children(
+        num_vectors, children, id_key, seed_parent_ids or ()
+    )
+    metadata_index = MetadataIndex.from_children(num_vectors, children)
+    logger.info(
+        f"Mapas de hijos construidos: {num_vectors} vectores, "
+        f"{len(parent_map.parent_ids)} padres"
+    )
+    return parent_map, metadata_index
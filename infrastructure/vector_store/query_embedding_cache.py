@@ -0,0 +1,178 @@
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from config.settings import settings
+from infrastructure.vector_store.embedding_cache import embedding_model_name
+
+logger = logging.getLogger(__name__)
+
+class QueryEmbeddingCache(Embeddings):
+    """
+    Modelo de embeddings con caché LRU de vectores de consulta.
+
+    La misma consulta se embebe en la rama densa, en `generate_quiz` y en cada
+    regeneración del resumen de contexto. Aquí cada texto se embebe una vez: los
+    vectores viven en una matriz float32 de capacidad fija (una fila por entrada)
+    y el LRU sólo guarda texto -> fila.
+
+    Las consultas que no están en caché se encolan y un hilo las agrupa en un solo
+    lote (espera como máximo `max_wait_ms` o hasta `max_batch` textos). Una misma
+    consulta pedida a la vez por varios usuarios se embebe una sola vez.
+    `embed_documents` (ingesta) pasa directo al modelo.
+    """
+    def __init__(
+        self,
+        embeddings: Any,
+        max_entries: Optional[int] = None,
+        max_batch: Optional[int] = None,
+        max_wait_ms: Optional[float] = None
+    ):
+        self.embeddings = embeddings
+        self.max_entries = max_entries or settings.QUERY_EMBEDDING_CACHE_SIZE
+        self.max_batch = max_batch or settings.QUERY_EMBEDDING_MAX_BATCH
+        self.max_wait_ms = (
+            max_wait_ms
+            if max_wait_ms is not None
+            else settings.QUERY_EMBEDDING_MAX_WAIT_MS
+        )
+        self._lock = threading.Lock()
+        self._slots: "OrderedDict[str, int]" = OrderedDict()
+        self._free_slots: List[int] = []
+        self._vectors: Optional[np.ndarray] = None
+        self._in_flight: Dict[str, Future] = {}
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._worker = threading.Thread(
+            target=self._batch_loop, name="query-embedder", daemon=True
+        )
+        self._worker.start()
+        self.hits = 0
+        self.misses = 0
+        self.batches = 0
+
+    @property
+    def model_name(self) -> str:
+        return embedding_model_name(self.embeddings)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    # --- API Embeddings ---
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_queries([text])[0].tolist()
+
+    def embed_queries(self, texts: Sequence[str]) -> np.ndarray:
+        """Vectores de varias consultas (matriz float32 en el mismo orden)."""
+        found: Dict[str, np.ndarray] = {}
+        waiting: Dict[str, Future] = {}
+        with self._lock:
+            for text in texts:
+                if text in found or text in waiting:
+                    continue
+                slot = self._slots.get(text)
+                vectors = self._vectors
+                if slot is not None and vectors is not None:
+                    self._slots.move_to_end(text)
+                    found[text] = vectors[slot].copy()
+                    self.hits += 1
+                    continue
+                self.misses += 1
+                future = self._in_flight.get(text)
+                if future is None:
+                    future = Future()
+                    self._in_flight[text] = future
+                    self._queue.put((text, future))
+                waiting[text] = future
+
+        for text, future in waiting.items():
+            found[text] = future.result()
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack([found[text] for text in texts])
+
+    # --- Lotes ---
+
+    def _collect_batch(self) -> List[Tuple[str, Future]]:
+        requests = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait_ms / 1000
+        while len(requests) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                requests.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return requests
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        # HuggingFaceEmbeddings sin kwargs propios de consulta embebe igual ambas rutas:
+        # entonces el lote completo es una sola llamada al modelo
+        if (
+            len(texts) > 1
+            and type(self.embeddings).__name__ == "HuggingFaceEmbeddings"
+            and not self.embeddings.query_encode_kwargs
+        ):
+            return np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+        return np.asarray(
+            [self.embeddings.embed_query(text) for text in texts], dtype=np.float32
+        )
+
+    def _batch_loop(self) -> None:
+        while True:
+            requests = self._collect_batch()
+            texts = [text for text, _ in requests]
+            try:
+                vectors = self._embed_batch(texts)
+            except Exception as e:
+                logger.error(f"Error embebiendo {len(texts)} consultas: {e}")
+                with self._lock:
+                    for text, future in requests:
+                        self._in_flight.pop(text, None)
+                        future.set_exception(e)
+                continue
+
+            with self._lock:
+                self.batches += 1
+                for (text, future), vector in zip(requests, vectors):
+                    self._store(text, vector)
+                    self._in_flight.pop(text, None)
+                    future.set_result(vector.copy())
+            if len(texts) > 1:
+                logger.debug(f"Lote de embeddings de consulta: {len(texts)} textos")
+
+    def _store(self, text: str, vector: np.ndarray) -> None:
+        if self._vectors is None:
+            self._vectors = np.empty(
+                (self.max_entries, vector.shape[0]), dtype=np.float32
+            )
+            self._free_slots = list(range(self.max_entries - 1, -1, -1))
+        if text in self._slots:
+            slot = self._slots[text]
+        elif self._free_slots:
+            slot = self._free_slots.pop()
+        else:
+            _, slot = self._slots.popitem(last=False)
+        self._vectors[slot] = vector
+        self._slots[text] = slot
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._slots),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "batches": self.batches,
+        }
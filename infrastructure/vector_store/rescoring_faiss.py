@@ -0,0 +1,326 @@
+import logging
+import os
+import pickle
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+from config.settings import settings
+from infrastructure.constants import EXACT_VECTORS_GLOB, FILE_EXACT_VECTORS_VERSIONED
+from infrastructure.vector_store.index_factory import filtered_search_params
+
+logger = logging.getLogger(__name__)
+
+_GENERATION_PATTERN = re.compile(r"vectors\.(\d+)\.f32")
+
+class ExactVectorFile:
+    """
+    Copia float32 de los vectores en disco (fila = posición en el índice FAISS).
+
+    Se usa para re-puntuar de forma exacta la lista corta de un índice
+    cuantizado y como fuente sin pérdida al reconstruir un índice PQ; se lee con
+    `np.memmap`, así que no ocupa RAM del proceso.
+
+    Cada reescritura (borrados, reconstrucciones) crea un fichero de generación
+    nueva (`vectors.<n>.f32`) en lugar de reemplazar el vigente: otros procesos
+    pueden tenerlo mapeado con las posiciones de su versión del índice. Dentro de
+    una generación sólo se agregan filas al final. Sólo se ven las primeras
+    `num_rows` filas (las del índice asociado), aunque el fichero tenga más.
+    """
+    def __init__(self, path: Path, dim: int, num_rows: Optional[int] = None):
+        self.path = Path(path)
+        self.dim = dim
+        self.num_rows = self.file_rows() if num_rows is None else num_rows
+        self._memmap: Optional[np.memmap] = None
+
+    @staticmethod
+    def generation_of(path: Path) -> int:
+        match = _GENERATION_PATTERN.fullmatch(Path(path).name)
+        return int(match.group(1)) if match else 0
+
+    @classmethod
+    def next_path(cls, directory: Path) -> Path:
+        """Ruta de la siguiente generación en `directory`."""
+        generations = [
+            cls.generation_of(path) for path in Path(directory).glob(EXACT_VECTORS_GLOB)
+        ]
+        generation = max(generations, default=0) + 1
+        return Path(directory) / FILE_EXACT_VECTORS_VERSIONED.format(
+            generation=generation
+        )
+
+    @classmethod
+    def create(cls, directory: Path, vectors: np.ndarray) -> "ExactVectorFile":
+        """Escribe `vectors` en un fichero de generación nueva."""
+        path = cls.next_path(directory)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        os.replace(tmp_path, path)
+        return cls(path, vectors.shape[1], len(vectors))
+
+    def file_rows(self) -> int:
+        if not self.path.exists():
+            return 0
+        return self.path.stat().st_size // (self.dim * 4)
+
+    def _view(self) -> np.ndarray:
+        # Sólo se vuelve a mapear si faltan filas: el mapeo sigue siendo válido
+        # aunque el fichero se haya borrado tras publicarse una generación nueva
+        if self._memmap is None or self._memmap.shape[0] < self.num_rows:
+            self._memmap = np.memmap(
+                self.path, dtype=np.float32, mode="r", shape=(self.num_rows, self.dim)
+            )
+        return self._memmap[:self.num_rows]
+
+    def append(self, vectors: np.ndarray) -> None:
+        with open(self.path, "ab") as f:
+            # Filas sobrantes de una escritura que no llegó a publicarse
+            if f.tell() > self.num_rows * self.dim * 4:
+                f.truncate(self.num_rows * self.dim * 4)
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        self.num_rows += len(vectors)
+
+    def rewrite(self, vectors: np.ndarray) -> "ExactVectorFile":
+        """Copia con `vectors` en una generación nueva (este fichero no cambia)."""
+        return ExactVectorFile.create(self.path.parent, vectors)
+
+    def read_all(self) -> np.ndarray:
+        if self.num_rows == 0:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.array(self._view())
+
+    def rows(self, positions: np.ndarray) -> np.ndarray:
+        return np.asarray(self._view()[positions])
+
+class RescoringFAISS(FAISS):
+    """
+    FAISS de langchain con re-puntuación exacta opcional.
+
+    Con un índice cuantizado (SQfp16/SQ8/PQ) se recupera una lista corta de
+    `k * RESCORE_CANDIDATE_FACTOR` candidatos y se re-ordena con el score exacto
+    (producto interno o L2) leído de `ExactVectorFile`. Sin fichero exacto se
+    comporta igual que `FAISS`.
+
+    Con `load_mapped` el índice se mapea en memoria y el mapeo de ids
+    (`index.pkl`) se deserializa en el primer acceso, no al abrir la sesión.
+    """
+    exact_vectors: Optional[ExactVectorFile] = None
+    _mapping_path: Optional[Path] = None
+    _mapping_lock: Optional[threading.Lock] = None
+
+    @classmethod
+    def load_mapped(
+        cls, folder_path: str, embeddings: Any, io_flags: int, index_name: str = "index"
+    ) -> "RescoringFAISS":
+        """Abre un índice en modo sólo lectura: mmap del `.faiss` y `.pkl` diferido."""
+        path = Path(folder_path)
+        index = faiss.read_index(str(path / f"{index_name}.faiss"), io_flags)
+        # Docstore y mapeo provisionales: se reemplazan al cargar el `.pkl`
+        vector_store = cls(embeddings, index, InMemoryDocstore(), {})
+        vector_store._mapping_path = path / f"{index_name}.pkl"
+        vector_store._mapping_lock = threading.Lock()
+        return vector_store
+
+    @property
+    def mapping_loaded(self) -> bool:
+        return self._mapping_path is None
+
+    def _ensure_mapping(self) -> None:
+        lock = self._mapping_lock
+        if self._mapping_path is None or lock is None:
+            return
+        with lock:
+            if self._mapping_path is None:
+                return
+            with open(self._mapping_path, "rb") as f:
+                self._docstore, self._index_to_docstore_id = pickle.load(f)
+            logger.info(f"Mapeo de ids cargado desde {self._mapping_path}")
+            self._mapping_path = None
+
+    @property
+    def docstore(self) -> Any:
+        self._ensure_mapping()
+        return self._docstore
+
+    @docstore.setter
+    def docstore(self, value: Any) -> None:
+        self._docstore = value
+
+    @property
+    def index_to_docstore_id(self) -> Dict[int, str]:
+        self._ensure_mapping()
+        return self._index_to_docstore_id
+
+    @index_to_docstore_id.setter
+    def index_to_docstore_id(self, value: Dict[int, str]) -> None:
+        self._index_to_docstore_id = value
+
+    def estimated_mapping_bytes(self) -> int:
+        """Memoria aproximada del docstore de hijos (sin forzar su carga)."""
+        if self._mapping_path is not None:
+            return self._mapping_path.stat().st_size * 2
+        child_docs = getattr(self._docstore, "_dict", {})
+        return sum(len(doc.page_content) for doc in child_docs.values()) * 2
+
+    def save_local(self, folder_path: str, index_name: str = "index") -> None:
+        # Escritura a fichero temporal + rename: otros procesos pueden tener
+        # mapeado el índice anterior y una reescritura in situ lo corrompería
+        path = Path(folder_path)
+        path.mkdir(exist_ok=True, parents=True)
+        index_path = path / f"{index_name}.faiss"
+        mapping_path = path / f"{index_name}.pkl"
+        faiss.write_index(self.index, str(index_path) + ".tmp")
+        with open(str(mapping_path) + ".tmp", "wb") as f:
+            pickle.dump((self.docstore, self.index_to_docstore_id), f)
+        os.replace(str(index_path) + ".tmp", index_path)
+        os.replace(str(mapping_path) + ".tmp", mapping_path)
+
+    def _prepare(self, embeddings: Iterable[List[float]]) -> np.ndarray:
+        vectors = np.array(list(embeddings), dtype=np.float32)
+        if self._normalize_L2:
+            faiss.normalize_L2(vectors)
+        return vectors
+
+    def add_embeddings(
+        self,
+        text_embeddings: Iterable[Tuple[str, List[float]]],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        text_embeddings = list(text_embeddings)
+        if self.exact_vectors is not None and text_embeddings:
+            self.exact_vectors.append(self._prepare(e for _, e in text_embeddings))
+        return super().add_embeddings(
+            text_embeddings, metadatas=metadatas, ids=ids, **kwargs
+        )
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        embeddings = self._embed_documents(texts)
+        return self.add_embeddings(
+            zip(texts, embeddings), metadatas=metadatas, ids=ids, **kwargs
+        )
+
+    def delete(
+        self, ids: Optional[List[str]] = None, **kwargs: Any
+    ) -> Optional[bool]:
+        # Mantener alineada la copia exacta con las posiciones que quedan en el índice
+        if self.exact_vectors is not None and ids:
+            reversed_index = {
+                id_: pos for pos, id_ in self.index_to_docstore_id.items()
+            }
+            keep = np.ones(self.index.ntotal, dtype=bool)
+            keep[[reversed_index[id_] for id_ in ids if id_ in reversed_index]] = False
+            exact = self.exact_vectors
+            self.exact_vectors = exact.rewrite(exact.read_all()[keep])
+        return super().delete(ids, **kwargs)
+
+    @property
+    def rescoring(self) -> bool:
+        """La lista corta se re-ordena con la copia exacta (si existe y se activó)."""
+        return self.exact_vectors is not None and settings.VECTOR_EXACT_RESCORE
+
+    def _rank_exact(
+        self, vectors: np.ndarray, query: np.ndarray, positions: np.ndarray, k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Ordena `positions` por su score exacto según la métrica del índice."""
+        if self.index.metric_type == faiss.METRIC_INNER_PRODUCT:
+            scores = vectors @ query
+            order = np.argsort(-scores)[:k]
+        else:
+            scores = ((vectors - query) ** 2).sum(axis=1)
+            order = np.argsort(scores)[:k]
+        return positions[order], scores[order].astype(np.float32)
+
+    def _scan_positions(
+        self, query: np.ndarray, positions: np.ndarray, k: int
+    ) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Búsqueda exacta sobre `positions` (None si el índice no reconstruye)."""
+        if self.exact_vectors is not None:
+            vectors = self.exact_vectors.rows(positions)
+        else:
+            try:
+                vectors = self.index.reconstruct_batch(positions)
+            except RuntimeError:
+                return None
+        return self._rank_exact(vectors, query, positions, k)
+
+    def search_positions(
+        self, embedding: List[float], k: int, allowed: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Búsqueda a nivel de índice: retorna (posiciones, scores) sin construir
+        Documents. Con re-puntuación, los scores son los exactos de la métrica del
+        índice (producto interno o distancia L2).
+
+        `allowed` (máscara booleana por posición) restringe la búsqueda: si quedan
+        pocos vectores se puntúan directamente; si no, FAISS los filtra con un
+        `IDSelectorBitmap` durante la búsqueda en lugar de sobre-recuperar.
+        """
+        empty = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32))
+        if self.index.ntotal == 0:
+            return empty
+        query = self._prepare([embedding])
+        params = None
+        if allowed is not None:
+            positions = np.flatnonzero(allowed)
+            if len(positions) == 0:
+                return empty
+            if len(positions) <= settings.METADATA_FILTER_SCAN_MAX:
+                scanned = self._scan_positions(query[0], positions, k)
+                if scanned is not None:
+                    return scanned
+            # El selector no copia el bitmap: debe seguir vivo durante la búsqueda
+            bitmap = np.packbits(allowed, bitorder="little")
+            selector = faiss.IDSelectorBitmap(len(allowed), faiss.swig_ptr(bitmap))
+            params = filtered_search_params(self.index, selector)
+
+        exact = self.exact_vectors if self.rescoring else None
+        if exact is None:
+            scores, indices = self.index.search(
+                query, min(k, self.index.ntotal), params=params
+            )
+            valid = indices[0] >= 0
+            return indices[0][valid], scores[0][valid]
+
+        shortlist = min(k * settings.RESCORE_CANDIDATE_FACTOR, self.index.ntotal)
+        _, indices = self.index.search(query, shortlist, params=params)
+        positions = indices[0][indices[0] >= 0]
+        return self._rank_exact(exact.rows(positions), query[0], positions, k)
+
+    def similarity_search_with_score_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Any] = None,
+        fetch_k: int = 20,
+        **kwargs: Any,
+    ) -> List[Tuple[Document, float]]:
+        if not self.rescoring or filter is not None:
+            return super().similarity_search_with_score_by_vector(
+                embedding, k=k, filter=filter, fetch_k=fetch_k, **kwargs
+            )
+
+        positions, scores = self.search_positions(embedding, k)
+        results = []
+        for position, score in zip(positions, scores):
+            doc = self.docstore.search(self.index_to_docstore_id[int(position)])
+            if isinstance(doc, Document):
+                results.append((doc, float(score)))
+        return results
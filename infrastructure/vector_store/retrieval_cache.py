@@ -0,0 +1,59 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+# Top K de una consulta: (id del padre, score)
+CachedResults = List[Tuple[str, Optional[float]]]
+
+class RetrievalResultCache:
+    """
+    Caché LRU de resultados de recuperación de una sesión: clave de consulta
+    normalizada -> top K final como (id del padre, score).
+
+    Cada resultado se guarda con la versión del índice con la que se calculó;
+    al consultar con una versión más reciente se descarta todo el contenido, así
+    que nunca se sirve un resultado de un índice ya modificado.
+    """
+    def __init__(self, max_entries: int, version: int = 0):
+        self.max_entries = max_entries
+        self.version = version
+        self._entries: "OrderedDict[str, CachedResults]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _sync_version(self, version: int) -> bool:
+        if version > self.version:
+            self._entries.clear()
+            self.version = version
+        return version == self.version
+
+    def get(self, key: str, version: int) -> Optional[CachedResults]:
+        with self._lock:
+            results = self._entries.get(key) if self._sync_version(version) else None
+            if results is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return results
+
+    def put(self, key: str, version: int, results: CachedResults) -> None:
+        with self._lock:
+            if not self._sync_version(version):
+                return
+            self._entries[key] = results
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "version": self.version,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            }
@@ -0,0 +1,89 @@
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from infrastructure.constants import FILE_SOURCE_MANIFEST
+
+logger = logging.getLogger(__name__)
+
+_MANIFEST_FORMAT = 1
+
+def source_key(metadata: Dict[str, Any]) -> str:
+    """Archivo de origen de un fragmento (las notas de usuario sólo tienen `source`)."""
+    return metadata.get("source_file") or metadata.get("source") or "unknown"
+
+class SourceManifest:
+    """
+    Manifiesto archivo -> ids de una sesión: ids de los padres (docstore y BM25)
+    y de los hijos (docstore de FAISS). Permite borrar un archivo tocando sólo sus
+    entradas. Se guarda junto al índice vectorial (`clear_index` lo elimina).
+    """
+    def __init__(
+        self, path: Path, sources: Optional[Dict[str, Dict[str, List[str]]]] = None
+    ):
+        self.path = Path(path)
+        self.sources: Dict[str, Dict[str, List[str]]] = sources or {}
+
+    @classmethod
+    def exists(cls, vectorstore_path: Path) -> bool:
+        return (Path(vectorstore_path) / FILE_SOURCE_MANIFEST).exists()
+
+    @classmethod
+    def load(cls, vectorstore_path: Path) -> "SourceManifest":
+        path = Path(vectorstore_path) / FILE_SOURCE_MANIFEST
+        if not path.exists():
+            return cls(path)
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("format") != _MANIFEST_FORMAT:
+            raise ValueError(
+                f"Formato de manifiesto no soportado: {data.get('format')}"
+            )
+        return cls(path, data["sources"])
+
+    @classmethod
+    def from_children(
+        cls,
+        vectorstore_path: Path,
+        children: Iterable[Tuple[str, Document]],
+        id_key: str
+    ) -> "SourceManifest":
+        """Reconstruye el manifiesto de una sesión antigua desde los hijos indexados."""
+        manifest = cls(Path(vectorstore_path) / FILE_SOURCE_MANIFEST)
+        for child_id, child in children:
+            entry = manifest._entry(source_key(child.metadata))
+            entry["children"].append(child_id)
+            parent_id = child.metadata.get(id_key)
+            if parent_id and parent_id not in entry["parents"]:
+                entry["parents"].append(parent_id)
+        return manifest
+
+    def save(self) -> None:
+        """Guarda el manifiesto de forma atómica."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"format": _MANIFEST_FORMAT, "sources": self.sources},
+                f,
+                ensure_ascii=False
+            )
+        os.replace(tmp_path, self.path)
+
+    def _entry(self, source: str) -> Dict[str, List[str]]:
+        return self.sources.setdefault(source, {"parents": [], "children": []})
+
+    def add(
+        self, source: str, parent_ids: Iterable[str] = (), child_ids: Iterable[str] = ()
+    ) -> None:
+        entry = self._entry(source)
+        entry["parents"].extend(parent_ids)
+        entry["children"].extend(child_ids)
+
+    def pop(self, source: str) -> Optional[Dict[str, List[str]]]:
+        """Quita un archivo del manifiesto y retorna sus ids (None si no estaba)."""
+        return self.sources.pop(source, None)
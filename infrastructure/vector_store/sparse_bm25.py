@@ -0,0 +1,222 @@
+import logging
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from scipy.sparse import csr_matrix
+
+from config.settings import settings
+from infrastructure.vector_store.bm25_index import BM25InvertedIndex, tokenize
+
+logger = logging.getLogger(__name__)
+
+class SparseBM25Matrix:
+    """
+    Matriz CSR término-documento con las frecuencias de cada documento vivo.
+
+    Las frecuencias se guardan en segmentos de columnas inmutables: una ingesta
+    agrega un segmento con sus documentos nuevos (`extend`) en lugar de recorrer
+    otra vez todos los postings. Los pesos BM25 dependen de estadísticas globales
+    (idf, longitud media), así que se calculan al consultar y sólo para las filas
+    de los términos de la consulta: una búsqueda se reduce a un slicing de filas
+    por segmento, una suma vectorizada y un `argpartition` para el top-k.
+    """
+    def __init__(
+        self,
+        vocabulary: Dict[str, int],
+        segments: List[csr_matrix],
+        doc_ids: List[str],
+        doc_lengths: np.ndarray,
+        df: np.ndarray,
+        source_ords: int = 0,
+        source_deleted: int = 0
+    ):
+        self.vocabulary = vocabulary
+        self.segments = segments
+        self.doc_ids = doc_ids
+        self.doc_lengths = doc_lengths
+        self.df = df
+        # Estado del índice invertido del que sale la matriz (para `extend`)
+        self.source_ords = source_ords
+        self.source_deleted = source_deleted
+
+        k1, b = settings.BM25_K1, settings.BM25_B
+        avgdl = float(doc_lengths.sum() / len(doc_lengths)) if len(doc_lengths) else 0.0
+        length_norm = k1 * (1 - b + b * doc_lengths / (avgdl or 1.0))
+        self.length_norm = length_norm.astype(np.float32)
+        self.segment_starts = np.cumsum([0] + [s.shape[1] for s in segments])
+
+    @property
+    def num_docs(self) -> int:
+        return len(self.doc_ids)
+
+    def estimated_bytes(self) -> int:
+        """Memoria aproximada de la matriz y del vocabulario."""
+        matrix = sum(
+            segment.data.nbytes + segment.indices.nbytes + segment.indptr.nbytes
+            for segment in self.segments
+        )
+        columns = self.doc_lengths.nbytes + self.length_norm.nbytes + self.df.nbytes
+        return matrix + columns + len(self.vocabulary) * 64 + len(self.doc_ids) * 80
+
+    @classmethod
+    def from_index(cls, index: BM25InvertedIndex) -> "SparseBM25Matrix":
+        """Construye la matriz desde el índice invertido (sin documentos borrados)."""
+        # Columnas densas sólo para documentos vivos
+        col_of_ord = np.full(len(index.doc_ids), -1, dtype=np.int64)
+        doc_ids: List[str] = []
+        for ord_, doc_id in enumerate(index.doc_ids):
+            if doc_id is not None:
+                col_of_ord[ord_] = len(doc_ids)
+                doc_ids.append(doc_id)
+        n_docs = len(doc_ids)
+        all_lengths = np.frombuffer(index.doc_lengths, dtype=np.uint32)
+        doc_lengths = all_lengths.astype(np.float32)[col_of_ord >= 0]
+        source = {
+            "source_ords": len(index.doc_ids), "source_deleted": index.num_deleted
+        }
+
+        vocabulary: Dict[str, int] = {}
+        ords_parts, tfs_parts, rows_parts = [], [], []
+        for term, (term_ords, term_tfs) in index.postings.items():
+            row = len(vocabulary)
+            vocabulary[term] = row
+            ords_parts.append(np.frombuffer(term_ords, dtype=np.uint32))
+            tfs_parts.append(np.frombuffer(term_tfs, dtype=np.uint32))
+            rows_parts.append(np.full(len(term_ords), row, dtype=np.int32))
+
+        if not vocabulary or not n_docs:
+            empty_df = np.zeros(0, dtype=np.float32)
+            return cls({}, [], doc_ids, doc_lengths, empty_df, **source)
+
+        ords = np.concatenate(ords_parts)
+        tfs = np.concatenate(tfs_parts).astype(np.float32)
+        rows = np.concatenate(rows_parts)
+
+        live = col_of_ord[ords] >= 0
+        ords, tfs, rows = ords[live], tfs[live], rows[live]
+        cols = col_of_ord[ords]
+
+        df = np.bincount(rows, minlength=len(vocabulary)).astype(np.float32)
+        segment = csr_matrix((tfs, (rows, cols)), shape=(len(vocabulary), n_docs))
+        return cls(vocabulary, [segment], doc_ids, doc_lengths, df, **source)
+
+    def extend(self, index: BM25InvertedIndex) -> "SparseBM25Matrix":
+        """
+        Matriz para `index` tras una ingesta, agregando como columnas nuevas las
+        altas registradas en `index.recent_additions`; los segmentos existentes se
+        comparten con esta matriz. Si hubo bajas o una compactación (los ordinales
+        ya no corresponden) o hay demasiados segmentos, se reconstruye completa.
+        """
+        new_ords = range(self.source_ords, len(index.doc_ids))
+        additions = [
+            (ord_, tf)
+            for ord_, tf in index.recent_additions
+            if ord_ >= self.source_ords
+        ]
+        if (
+            index.num_deleted != self.source_deleted
+            or [ord_ for ord_, _ in additions] != list(new_ords)
+            or len(self.segments) >= settings.BM25_MAX_SEGMENTS
+        ):
+            return SparseBM25Matrix.from_index(index)
+        if not additions:
+            return self
+
+        vocabulary = dict(self.vocabulary)
+        rows: List[int] = []
+        cols: List[int] = []
+        tfs: List[int] = []
+        for col, (_, tf) in enumerate(additions):
+            for term, count in tf.items():
+                row = vocabulary.get(term)
+                if row is None:
+                    row = len(vocabulary)
+                    vocabulary[term] = row
+                rows.append(row)
+                cols.append(col)
+                tfs.append(count)
+
+        rows_array = np.asarray(rows, dtype=np.int32)
+        cols_array = np.asarray(cols, dtype=np.int32)
+        segment = csr_matrix(
+            (np.asarray(tfs, dtype=np.float32), (rows_array, cols_array)),
+            shape=(len(vocabulary), len(additions))
+        )
+        df = np.zeros(len(vocabulary), dtype=np.float32)
+        df[:len(self.df)] = self.df
+        df += np.bincount(rows_array, minlength=len(vocabulary)).astype(np.float32)
+        new_lengths = [sum(tf.values()) for _, tf in additions]
+        doc_lengths = np.concatenate([
+            self.doc_lengths, np.asarray(new_lengths, dtype=np.float32)
+        ])
+        # Sin bajas desde la matriz anterior: todos los ordinales nuevos están vivos
+        new_ids = [doc_id for doc_id in index.doc_ids[self.source_ords:] if doc_id]
+        return SparseBM25Matrix(
+            vocabulary,
+            self.segments + [segment],
+            self.doc_ids + new_ids,
+            doc_lengths,
+            df,
+            source_ords=len(index.doc_ids),
+            source_deleted=index.num_deleted
+        )
+
+    def score(self, query: str) -> np.ndarray:
+        """Vector de scores BM25 (uno por documento) para la consulta."""
+        terms = {self.vocabulary[t] for t in tokenize(query) if t in self.vocabulary}
+        rows = np.array(sorted(terms), dtype=np.int64)
+        scores = np.zeros(self.num_docs, dtype=np.float32)
+        if not rows.size:
+            return scores
+        k1 = settings.BM25_K1
+        df = self.df[rows]
+        idf = np.log((self.num_docs - df + 0.5) / (df + 0.5) + 1.0)
+
+        for segment, start in zip(self.segments, self.segment_starts):
+            # Un segmento sólo tiene filas para los términos conocidos al crearlo
+            present = rows < segment.shape[0]
+            if not present.any():
+                continue
+            block = segment[rows[present]]
+            row_of_entry = np.repeat(np.flatnonzero(present), np.diff(block.indptr))
+            cols = block.indices
+            tfs = block.data
+            norm = self.length_norm[start + cols]
+            weights = idf[row_of_entry] * tfs * (k1 + 1) / (tfs + norm)
+            scores[start:start + segment.shape[1]] += np.bincount(
+                cols, weights=weights, minlength=segment.shape[1]
+            ).astype(np.float32)
+        return scores
+
+    def top_k(self, query: str, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Retorna (columnas, scores) de los k mejores documentos con score > 0."""
+        scores = self.score(query)
+        candidates = np.flatnonzero(scores > 0)
+        if candidates.size > k:
+            part = np.argpartition(scores[candidates], -k)[-k:]
+            candidates = candidates[part]
+        order = np.argsort(-scores[candidates], kind="stable")
+        top = candidates[order]
+        return top, scores[top]
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        cols, scores = self.top_k(query, k)
+        return [(self.doc_ids[c], float(s)) for c, s in zip(cols, scores)]
+
+class SparseBM25Retriever(BaseRetriever):
+    """Retriever léxico vectorizado; reemplaza directamente al BM25Retriever."""
+    matrix: Any
+    docstore: Any
+    k: int = 4
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        hits = self.matrix.search(query, self.k)
+        if not hits:
+            return []
+        docs = self.docstore.mget([doc_id for doc_id, _ in hits])
+        return [doc for doc in docs if doc is not None]
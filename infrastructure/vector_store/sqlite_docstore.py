@@ -0,0 +1,218 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.stores import BaseStore
+
+logger = logging.getLogger(__name__)
+
+# Límite conservador de parámetros por sentencia en SQLite
+_MAX_SQL_PARAMS = 500
+
+_CODEC_NONE = 0
+_CODEC_ZSTD = 1
+
+class SQLiteDocStore(BaseStore[str, Document]):
+    """
+    Docstore de documentos padre en un único fichero SQLite (modo WAL).
+
+    Sustituye a `LocalFileStore` + `create_kv_docstore`, que escribe un fichero por
+    padre: aquí `mget`/`mset` son una sola sentencia por lote, la iteración es
+    paginada y copiar la sesión implica copiar un solo fichero. Compresión zstd
+    opcional (requiere el paquete `zstandard`).
+
+    `close` libera la conexión; si el docstore se vuelve a usar (un retriever que
+    sobrevivió a su entrada del caché) se reabre en la siguiente operación.
+    """
+    def __init__(self, db_path: Path, compression: Optional[str] = None):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        with self._lock:
+            self._connection()
+        self._compressor, self._decompressor = self._init_codec(compression)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Conexión abierta (con el lock tomado); la abre si hace falta."""
+        if self._conn is None:
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS docs ("
+                "key TEXT PRIMARY KEY, codec INTEGER NOT NULL, value BLOB NOT NULL)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _init_codec(compression: Optional[str]):
+        if not compression:
+            return None, None
+        if compression != "zstd":
+            raise ValueError(f"Compresión de docstore no soportada: {compression}")
+        try:
+            import zstandard
+        except ImportError:
+            logger.warning(
+                "zstandard no está instalado; el docstore se guardará sin comprimir."
+            )
+            return None, None
+        return zstandard.ZstdCompressor(level=3), zstandard.ZstdDecompressor()
+
+    # --- Serialización ---
+
+    def _encode(self, doc: Document) -> Tuple[int, bytes]:
+        if not isinstance(doc, Document):
+            raise TypeError("Expected a Document instance")
+        payload = json.dumps(
+            {"page_content": doc.page_content, "metadata": doc.metadata},
+            ensure_ascii=False,
+            default=str
+        ).encode("utf-8")
+        if self._compressor is not None:
+            return _CODEC_ZSTD, self._compressor.compress(payload)
+        return _CODEC_NONE, payload
+
+    def _decode(self, codec: int, value: bytes, key: Optional[str] = None) -> Document:
+        if codec == _CODEC_ZSTD:
+            if self._decompressor is None:
+                import zstandard
+                self._decompressor = zstandard.ZstdDecompressor()
+            value = self._decompressor.decompress(value)
+        data = json.loads(value)
+        return Document(
+            id=key, page_content=data["page_content"], metadata=data["metadata"]
+        )
+
+    # --- API BaseStore ---
+
+    def mget(self, keys: Sequence[str]) -> List[Optional[Document]]:
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), _MAX_SQL_PARAMS):
+                chunk = list(keys[start:start + _MAX_SQL_PARAMS])
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._connection().execute(
+                    f"SELECT key, codec, value FROM docs WHERE key IN ({placeholders})",
+                    chunk
+                ).fetchall()
+                for key, codec, value in rows:
+                    found[key] = (codec, value)
+        return [
+            self._decode(*found[key], key=key) if key in found else None
+            for key in keys
+        ]
+
+    def mset(self, key_value_pairs: Sequence[Tuple[str, Document]]) -> None:
+        rows = [(key, *self._encode(doc)) for key, doc in key_value_pairs]
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO docs (key, codec, value) VALUES (?, ?, ?)",
+                    rows
+                )
+
+    def mdelete(self, keys: Sequence[str]) -> None:
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                for start in range(0, len(keys), _MAX_SQL_PARAMS):
+                    chunk = list(keys[start:start + _MAX_SQL_PARAMS])
+                    placeholders = ",".join("?" * len(chunk))
+                    conn.execute(
+                        f"DELETE FROM docs WHERE key IN ({placeholders})", chunk
+                    )
+
+    def yield_keys(self, prefix: Optional[str] = None) -> Iterator[str]:
+        for key, _ in self._iter_rows(prefix, with_values=False):
+            yield key
+
+    # --- Extras ---
+
+    def iter_documents(self, batch_size: int = 500) -> Iterator[Tuple[str, Document]]:
+        """Itera (id, documento) en páginas, sin cargar todo el docstore en memoria."""
+        for key, row in self._iter_rows(None, with_values=True, batch_size=batch_size):
+            codec, value = row
+            yield key, self._decode(codec, value, key=key)
+
+    def _iter_rows(
+        self, prefix: Optional[str], with_values: bool, batch_size: int = 500
+    ) -> Iterator[Tuple[str, Any]]:
+        # Paginación por rowid: el lock sólo se mantiene durante cada página
+        columns = "rowid, key, codec, value" if with_values else "rowid, key"
+        where = "rowid > ?"
+        params: List = []
+        if prefix:
+            where += " AND key >= ? AND key < ?"
+            params = [prefix, prefix + "\uffff"]
+        last_rowid = 0
+        while True:
+            with self._lock:
+                rows = self._connection().execute(
+                    f"SELECT {columns} FROM docs WHERE {where} ORDER BY rowid LIMIT ?",
+                    [last_rowid, *params, batch_size]
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield row[1], (row[2], row[3]) if with_values else None
+            last_rowid = rows[-1][0]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._connection().execute(
+                "SELECT COUNT(*) FROM docs"
+            ).fetchone()[0]
+
+    def checkpoint(self) -> None:
+        """Vuelca el WAL al fichero principal (útil antes de copiar la sesión)."""
+        with self._lock:
+            self._connection().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def migrate_legacy_files(self, legacy_dir: Path) -> int:
+        """
+        Importa un doc_store antiguo (un fichero por padre, LocalFileStore) y
+        elimina esos ficheros. Retorna el número de documentos migrados.
+        """
+        from langchain_classic.storage import LocalFileStore
+        from langchain_classic.storage._lc_store import create_kv_docstore
+
+        legacy_files = [
+            p for p in Path(legacy_dir).iterdir()
+            if p.is_file() and not p.name.startswith((self.db_path.name, "."))
+        ]
+        if not legacy_files:
+            return 0
+
+        legacy_store = create_kv_docstore(LocalFileStore(str(legacy_dir)))
+        keys = [p.name for p in legacy_files]
+        migrated = 0
+        for start in range(0, len(keys), _MAX_SQL_PARAMS):
+            chunk = keys[start:start + _MAX_SQL_PARAMS]
+            pairs = [
+                (key, doc) for key, doc in zip(chunk, legacy_store.mget(chunk)) if doc
+            ]
+            self.mset(pairs)
+            migrated += len(pairs)
+
+        for path in legacy_files:
+            os.remove(path)
+        logger.info(
+            f"Docstore migrado a SQLite: {migrated} documentos desde {legacy_dir}"
+        )
+        return migrated
@@ -32,6 +32,8 @@ router = st.session_state.components["router_repo"]
 doc_service = st.session_state.components["doc_service"]
 feedback_logger = st.session_state.components["feedback_logger"]
 prompt_manager = st.session_state.components["prompt_manager"]
+reranker = st.session_state.components.get("reranker")
+ingestion_jobs = st.session_state.components.get("ingestion_jobs")
 
 # Estado de la sesión
 if "session_id" not in st.session_state:
@@ -66,23 +68,19 @@ if not st.session_state.active_chat_id:
 
 # Inicialización del ChatService (Necesario para el Dashboard)
 try:
-    # --- OPTIMIZACIÓN: Caching de Retrievers en Session State ---
-    cache_key = f"retrievers_{session_path}"
-    
-    if "active_retrievers_key" not in st.session_state or \
-       st.session_state.active_retrievers_key != cache_key or \
-       st.session_state.get("force_refresh_retrievers", False):
-        
+    # --- OPTIMIZACIÓN: Caché de índices compartido por todas las pestañas ---
+    # get_vector_db sólo lee de disco si la versión vigente no está en memoria
+    if vector_repo.is_cached(session_path):
+        retriever, bm25 = vector_repo.get_vector_db(session_path)
+    else:
         with st.spinner("Cargando base de conocimientos..."):
             retriever, bm25 = vector_repo.get_vector_db(session_path)
-            st.session_state.cached_retriever = retriever
-            st.session_state.cached_bm25 = bm25
-            st.session_state.active_retrievers_key = cache_key
-            st.session_state.force_refresh_retrievers = False 
     
-    chat_service = ChatService(llm_provider, vector_repo, doc_loader, router, prompt_manager)
-    chat_service.vector_store = st.session_state.cached_retriever
-    chat_service.bm25_retriever = st.session_state.cached_bm25
+    chat_service = ChatService(
+        llm_provider, vector_repo, doc_loader, router, prompt_manager, reranker=reranker
+    )
+    chat_service.vector_store = retriever
+    chat_service.bm25_retriever = bm25
     
 except Exception as e:
     st.error(f"Error inicializando servicios: {e}")
@@ -91,7 +89,10 @@ except Exception as e:
 # --- Sidebar: Gestión del Proyecto Activo ---
 # Renderizar sidebar DESPUÉS de cargar datos para sincronizar la UI
 from app.ui.components.sidebar import render_sidebar
-render_sidebar(session_manager, doc_service, vector_repo, session_path, is_draft, chat_service=chat_service)
+render_sidebar(
+    session_manager, doc_service, vector_repo, session_path, is_draft,
+    chat_service=chat_service, ingestion_jobs=ingestion_jobs
+)
 
 # Cargar Historial
 if not st.session_state.chat_history and st.session_state.active_chat_id:
@@ -112,6 +113,8 @@ if st.session_state.current_view == "Chat":
     render_chat_view(chat_service, doc_service, vector_repo, feedback_logger, session_path)
 elif st.session_state.current_view == "Cuestionarios":
     from app.ui.views.quiz_view import render_quiz_view
-    render_quiz_view(chat_service)
+    render_quiz_view(
+        chat_service, session_manager.get_session_files(st.session_state.session_id)
+    )
 
 
@@ -0,0 +1,85 @@
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from config.settings import settings
+from infrastructure.constants import DIR_DOC_STORE, DIR_VECTOR_STORE
+
+DIM = 256
+
+class FakeEmbeddings(Embeddings):
+    """
+    Embeddings deterministas sin modelo: bolsa de palabras donde cada palabra
+    nueva recibe su propia dimensión (sin colisiones mientras haya dimensiones).
+    """
+    model_name = "fake-embeddings"
+
+    def __init__(self):
+        self.calls = 0
+        self.texts = 0
+        self._vocabulary: Dict[str, int] = {}
+
+    def _vector(self, text: str) -> List[float]:
+        vector = np.full(DIM, 0.01, dtype=np.float32)
+        for word in text.lower().split():
+            slot = self._vocabulary.setdefault(word, len(self._vocabulary))
+            vector[slot % DIM] += 1.0
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        self.texts += len(texts)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._vector(text)
+
+@pytest.fixture(autouse=True)
+def isolated_data_dirs(tmp_path, monkeypatch):
+    """Los cachés en disco de cada prueba viven en su directorio temporal."""
+    monkeypatch.setattr(
+        settings, "EMBEDDING_CACHE_DIR", str(tmp_path / "embedding_cache")
+    )
+    monkeypatch.setattr(settings, "PARSE_CACHE_DIR", str(tmp_path / "parse_cache"))
+    monkeypatch.setattr(settings, "RERANK_CACHE_DIR", str(tmp_path / "rerank_cache"))
+    monkeypatch.setattr(settings, "INGEST_JOBS_DIR", str(tmp_path / "jobs"))
+
+@pytest.fixture
+def embeddings():
+    return FakeEmbeddings()
+
+@pytest.fixture
+def make_session(tmp_path):
+    """Crea directorios de sesión vacíos como los de SessionManager."""
+    def make(name: str = "session") -> Path:
+        session_dir = tmp_path / "sessions" / name
+        (session_dir / DIR_VECTOR_STORE).mkdir(parents=True)
+        (session_dir / DIR_DOC_STORE).mkdir()
+        return session_dir
+    return make
+
+@pytest.fixture
+def repo(embeddings):
+    from infrastructure.vector_store.faiss_repository import FAISSRepository
+    from infrastructure.vector_store.index_cache import SessionIndexCache
+
+    return FAISSRepository(embeddings, index_cache=SessionIndexCache(10**9))
+
+@pytest.fixture
+def make_documents():
+    """Páginas de un archivo fuente con contenido distinto cada una."""
+    def make(
+        source_file: str, count: int, text: str = "auditoría interna"
+    ) -> List[Document]:
+        return [
+            Document(
+                page_content=f"{text} {source_file} registro {i}",
+                metadata={"source_file": source_file}
+            )
+            for i in range(count)
+        ]
+    return make
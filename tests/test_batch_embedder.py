@@ -0,0 +1,25 @@
+import numpy as np
+
+from infrastructure.vector_store.batch_embedder import BatchEmbedder, length_buckets
+
+def test_length_buckets_group_similar_lengths():
+    texts = ["a " * n for n in (5, 1, 9, 3, 7, 2)]
+    buckets = length_buckets(texts, 2)
+
+    assert sorted(i for bucket in buckets for i in bucket) == list(range(6))
+    assert buckets == [[1, 5], [3, 0], [4, 2]]
+
+def test_embeddings_come_back_in_input_order(embeddings):
+    texts = [("palabra " * (i % 7)) + f"texto{i}" for i in range(50)]
+    embedder = BatchEmbedder(embeddings, batch_size=8, workers=4)
+    vectors = embedder.embed_documents(texts)
+
+    expected = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+    np.testing.assert_array_equal(vectors, expected)
+    # Un modelo que no es HuggingFace no se reparte en procesos
+    assert embedder.last_run["workers"] == 1
+    assert embedder.last_run["batches"] == 7
+    assert embedder.last_run["chunks"] == 50
+
+def test_empty_input(embeddings):
+    assert BatchEmbedder(embeddings).embed_documents([]).shape == (0, 0)
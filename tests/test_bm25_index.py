@@ -0,0 +1,95 @@
+import numpy as np
+
+from config.settings import settings
+from infrastructure.constants import FILE_BM25_LOG, FILE_BM25_SNAPSHOT
+from infrastructure.vector_store.bm25_index import BM25InvertedIndex
+from infrastructure.vector_store.sparse_bm25 import SparseBM25Matrix
+
+DOCS = [
+    ("a", "control de documentos y aprobación"),
+    ("b", "auditoría interna del sistema de gestión"),
+    ("c", "quién aprueba los documentos del laboratorio"),
+]
+
+def test_log_replay_restores_additions_and_removals(tmp_path):
+    index = BM25InvertedIndex(tmp_path / "bm25")
+    index.add_documents(DOCS)
+    index.remove_documents(["c"])
+
+    loaded = BM25InvertedIndex.load(tmp_path / "bm25")
+    assert loaded.num_docs == 2
+    assert "c" not in loaded and "a" in loaded
+    assert loaded.total_length == index.total_length
+
+def test_truncated_log_line_is_ignored(tmp_path):
+    index = BM25InvertedIndex(tmp_path / "bm25")
+    index.add_documents(DOCS)
+    with open(tmp_path / "bm25" / FILE_BM25_LOG, "a", encoding="utf-8") as f:
+        f.write('{"op": "add", "id": "d", "tf": {"aud')
+
+    assert BM25InvertedIndex.load(tmp_path / "bm25").num_docs == 3
+
+def test_compaction_drops_deleted_documents(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "BM25_COMPACT_LOG_ENTRIES", 4)
+    index = BM25InvertedIndex(tmp_path / "bm25")
+    index.add_documents(DOCS)
+    index.remove_documents(["a"])
+
+    assert (tmp_path / "bm25" / FILE_BM25_SNAPSHOT).exists()
+    assert not (tmp_path / "bm25" / FILE_BM25_LOG).exists()
+    loaded = BM25InvertedIndex.load(tmp_path / "bm25")
+    assert loaded.doc_ids == ["b", "c"]
+    assert loaded.num_deleted == 0
+
+def test_readding_a_document_replaces_it(tmp_path):
+    index = BM25InvertedIndex(tmp_path / "bm25")
+    index.add_documents(DOCS)
+    index.add_documents([("a", "calibración de equipos")])
+
+    matrix = SparseBM25Matrix.from_index(BM25InvertedIndex.load(tmp_path / "bm25"))
+    assert [doc_id for doc_id, _ in matrix.search("calibración", 3)] == ["a"]
+    assert matrix.search("aprobación", 3) == []
+
+def test_extend_matches_full_rebuild(tmp_path):
+    index_dir = tmp_path / "bm25"
+    BM25InvertedIndex(index_dir).add_documents(DOCS)
+    matrix = SparseBM25Matrix.from_index(BM25InvertedIndex.load(index_dir))
+
+    for batch in range(3):
+        index = BM25InvertedIndex.load(index_dir)
+        index.add_documents(
+            (f"n{batch}-{i}", f"registro {i} de calibración lote{batch} documentos")
+            for i in range(5)
+        )
+        extended = matrix.extend(index)
+        assert len(extended.segments) == len(matrix.segments) + 1
+        full = SparseBM25Matrix.from_index(index)
+        assert extended.doc_ids == full.doc_ids
+        for query in ("calibración documentos", "lote1 registro", "auditoría"):
+            np.testing.assert_allclose(
+                extended.score(query), full.score(query), rtol=1e-5
+            )
+        matrix = extended
+
+def test_extend_rebuilds_after_removal(tmp_path):
+    index_dir = tmp_path / "bm25"
+    BM25InvertedIndex(index_dir).add_documents(DOCS)
+    matrix = SparseBM25Matrix.from_index(BM25InvertedIndex.load(index_dir))
+
+    index = BM25InvertedIndex.load(index_dir)
+    assert matrix.extend(index) is matrix
+    index.remove_documents(["b"])
+    rebuilt = matrix.extend(index)
+    assert len(rebuilt.segments) == 1
+    assert rebuilt.doc_ids == ["a", "c"]
+
+def test_repository_extends_cached_matrix_on_ingest(repo, make_session, make_documents):
+    session = make_session()
+    for i, name in enumerate(["a.pdf", "b.pdf", "c.pdf"]):
+        _, bm25 = repo.add_documents(str(session), make_documents(name, 4))
+        assert len(bm25.matrix.segments) == i + 1
+
+    repo.delete_documents_by_source(str(session), "b.pdf")
+    _, bm25 = repo.get_vector_db(str(session))
+    assert len(bm25.matrix.segments) == 1
+    assert bm25.matrix.num_docs == 8
@@ -0,0 +1,74 @@
+from core.domain.models import RetrievalCandidate
+from core.services.cascade_reranker import CascadeReranker
+
+class ScoreTable:
+    def __init__(self, scores):
+        self.scores = scores
+        self.calls = []
+
+    def score(self, query, passages):
+        self.calls.append(list(passages))
+        return [self.scores[p] for p in passages]
+
+def _candidates(fusion_scores):
+    return [
+        RetrievalCandidate(doc_id=f"d{i}", score=score, passages=[f"p{i}"])
+        for i, score in enumerate(fusion_scores)
+    ]
+
+def _cascade(reranker, top_k=2, **attributes):
+    cascade = CascadeReranker(reranker, top_k=top_k)
+    for name, value in attributes.items():
+        setattr(cascade, name, value)
+    return cascade
+
+def test_prune_keeps_top_k_and_cuts_on_ratio():
+    cascade = _cascade(None, min_ratio=0.5, max_gap=0.0, max_candidates=10)
+    kept = cascade.prune(_candidates([1.0, 0.2, 0.9, 0.6, 0.4, 0.8]))
+
+    # Los top K se conservan siempre; después se corta en el primero bajo el ratio
+    assert [c.doc_id for c in kept] == ["d0", "d1", "d2", "d3"]
+
+def test_prune_cuts_on_score_gap_and_max_candidates():
+    gap = _cascade(None, min_ratio=0.0, max_gap=0.3, max_candidates=10)
+    assert len(gap.prune(_candidates([1.0, 0.95, 0.9, 0.5, 0.45]))) == 3
+
+    capped = _cascade(None, min_ratio=0.0, max_gap=0.0, max_candidates=4)
+    assert len(capped.prune(_candidates([1.0] * 10))) == 4
+
+def test_early_exit_when_a_chunk_cannot_enter_top_k():
+    scores = {f"p{i}": 10.0 - i for i in range(4)}
+    scores.update({f"p{i}": 0.0 for i in range(4, 12)})
+    reranker = ScoreTable(scores)
+    cascade = _cascade(
+        reranker,
+        min_ratio=0.0,
+        max_gap=0.0,
+        max_candidates=20,
+        chunk_size=4,
+        margin=1.0,
+    )
+
+    top, stats = cascade.rerank("q", _candidates([1.0] * 12))
+    assert [c.doc_id for _, c in top] == ["d0", "d1"]
+    assert stats.early_exit
+    assert stats.chunks == 2 and stats.scored_candidates == 8
+    assert len(reranker.calls) == 2
+
+def test_no_early_exit_when_later_chunk_changes_top_k():
+    scores = {f"p{i}": 1.0 for i in range(8)}
+    scores["p6"] = 50.0
+    reranker = ScoreTable(scores)
+    cascade = _cascade(
+        reranker,
+        min_ratio=0.0,
+        max_gap=0.0,
+        max_candidates=20,
+        chunk_size=2,
+        margin=1.0,
+    )
+
+    top, stats = cascade.rerank("q", _candidates([1.0] * 8))
+    assert top[0][1].doc_id == "d6"
+    assert not stats.early_exit
+    assert stats.scored_candidates == 8
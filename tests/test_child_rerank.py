@@ -0,0 +1,105 @@
+import pytest
+from langchain_core.documents import Document
+
+from config.settings import settings
+from core.domain.models import RetrievalCandidate
+from core.services.cascade_reranker import CascadeReranker
+from core.services.chat_service import ChatService
+
+class ScoreTable:
+    """Reranker falso: score fijo por pasaje; registra lo que se le pide."""
+    def __init__(self, scores):
+        self.scores = scores
+        self.requested = []
+
+    def score(self, query, passages):
+        self.requested.extend(passages)
+        return [self.scores[p] for p in passages]
+
+def _cascade(reranker, top_k=3, **overrides):
+    cascade = CascadeReranker(reranker, top_k=top_k)
+    cascade.min_ratio = 0.0
+    cascade.max_gap = 0.0
+    for name, value in overrides.items():
+        setattr(cascade, name, value)
+    return cascade
+
+def _candidate(doc_id, score, passages):
+    return RetrievalCandidate(doc_id=doc_id, score=score, passages=passages)
+
+@pytest.mark.parametrize(
+    "aggregation,expected", [("max", ["b", "a"]), ("sum", ["a", "b"])]
+)
+def test_parent_score_aggregates_its_children(monkeypatch, aggregation, expected):
+    monkeypatch.setattr(settings, "RERANK_CHILD_AGGREGATION", aggregation)
+    reranker = ScoreTable({"a1": 2.0, "a2": 2.0, "b1": 3.0})
+    cascade = _cascade(reranker, top_k=2)
+
+    top, _ = cascade.rerank(
+        "q", [_candidate("a", 1.0, ["a1", "a2"]), _candidate("b", 0.9, ["b1"])]
+    )
+    assert [c.doc_id for _, c in top] == expected
+
+def test_shared_passages_are_scored_once():
+    reranker = ScoreTable({"p": 1.0, "q": 2.0})
+    cascade = _cascade(reranker)
+
+    _, stats = cascade.rerank(
+        "q", [_candidate("a", 1.0, ["p", "q"]), _candidate("b", 0.9, ["q", "p"])]
+    )
+    assert sorted(reranker.requested) == ["p", "q"]
+    assert stats.pairs_scored == 2
+
+def test_candidates_without_passages_are_kept_last():
+    reranker = ScoreTable({"a1": -5.0, "c1": 1.0})
+    cascade = _cascade(reranker)
+
+    top, _ = cascade.rerank(
+        "q",
+        [
+            _candidate("a", 1.0, ["a1"]),
+            _candidate("b", 0.9, []),
+            _candidate("c", 0.8, ["c1"]),
+        ],
+    )
+    assert [c.doc_id for _, c in top] == ["c", "a", "b"]
+    assert top[-1][0] == float("-inf")
+
+class FakeHybrid:
+    """Fusión híbrida falsa: candidatos fijos y padres con contenido propio."""
+    def __init__(self, candidates, contents):
+        self.candidates = candidates
+        self.contents = contents
+
+    def search(self, query, with_passages=True):
+        return [
+            _candidate(c.doc_id, c.score, list(c.passages)) for c in self.candidates
+        ]
+
+    def materialize(self, candidates):
+        return [
+            Document(page_content=self.contents[c.doc_id], id=c.doc_id)
+            for c in candidates
+        ]
+
+def test_parent_rerank_prunes_once(monkeypatch):
+    reranker = ScoreTable({"padre a": 1.0, "padre b": 3.0, "padre c": 2.0})
+    cascade = _cascade(reranker, top_k=2, min_ratio=0.5)
+    prune_calls = []
+    prune = cascade.prune
+
+    def counting_prune(candidates):
+        prune_calls.append(len(candidates))
+        return prune(candidates)
+
+    monkeypatch.setattr(cascade, "prune", counting_prune)
+    hybrid = FakeHybrid(
+        [_candidate("a", 1.0, []), _candidate("b", 0.9, []), _candidate("c", 0.6, [])],
+        {"a": "padre a", "b": "padre b", "c": "padre c"},
+    )
+    service = ChatService(None, None, None, None, None, reranker)
+
+    docs = service._rerank_candidates("q", hybrid, cascade, use_children=False)
+    assert prune_calls == [3]
+    assert [doc.id for doc in docs] == ["b", "c"]
+    assert service.last_rerank_stats.after_pruning == 3
@@ -0,0 +1,58 @@
+import threading
+from typing import List
+
+import pytest
+
+from infrastructure.ai.cross_encoder_reranker import CrossEncoderReranker
+
+class FakeCrossEncoder:
+    """Score = longitud del pasaje; registra el tamaño de cada lote."""
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.batch_sizes: List[int] = []
+
+    def predict(self, pairs):
+        self.batch_sizes.append(len(pairs))
+        if self.fail:
+            raise RuntimeError("modelo caído")
+        return [float(len(passage)) for _, passage in pairs]
+
+def test_scores_follow_passage_order():
+    reranker = CrossEncoderReranker(model=FakeCrossEncoder(), max_wait_ms=0)
+
+    assert reranker.score("consulta", ["aa", "a", "aaa"]) == [2.0, 1.0, 3.0]
+    assert reranker.score("consulta", []) == []
+
+def test_concurrent_requests_share_a_batch():
+    model = FakeCrossEncoder()
+    reranker = CrossEncoderReranker(model=model, max_wait_ms=200, max_batch_pairs=1000)
+    results = {}
+    barrier = threading.Barrier(4)
+
+    def request(i):
+        barrier.wait()
+        results[i] = reranker.score(f"consulta {i}", ["x" * i, "y" * (i + 10)])
+
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {i: [float(i), float(i + 10)] for i in range(4)}
+    assert sum(model.batch_sizes) == 8
+    assert len(model.batch_sizes) < 4
+    assert reranker.stats()["pairs_scored"] == 8
+
+def test_batch_is_capped_by_pairs():
+    model = FakeCrossEncoder()
+    reranker = CrossEncoderReranker(model=model, max_wait_ms=1000, max_batch_pairs=3)
+
+    reranker.score("consulta", ["a", "b", "c"])
+    assert model.batch_sizes == [3]
+
+def test_model_errors_reach_the_caller():
+    reranker = CrossEncoderReranker(model=FakeCrossEncoder(fail=True), max_wait_ms=0)
+
+    with pytest.raises(RuntimeError, match="modelo caído"):
+        reranker.score("consulta", ["a"])
@@ -0,0 +1,109 @@
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from infrastructure.constants import FILE_EMBEDDING_CACHE_RECORDS
+from infrastructure.vector_store.embedding_cache import EmbeddingCache
+
+DIM = 8
+
+def fake_embed(texts):
+    return [
+        [float(sum(map(ord, text)) % 997 + i) for i in range(DIM)] for text in texts
+    ]
+
+class CountingEmbed:
+    def __init__(self):
+        self.texts = []
+
+    def __call__(self, texts):
+        self.texts.extend(texts)
+        return fake_embed(texts)
+
+def _expected(texts):
+    return np.asarray(fake_embed(texts), dtype=np.float32)
+
+def test_only_missing_texts_are_embedded(tmp_path):
+    cache = EmbeddingCache(tmp_path, "modelo")
+    embed = CountingEmbed()
+    cache.embed_documents(["a", "b", "a"], embed)
+    vectors = cache.embed_documents(["b", "c", "a"], embed)
+
+    assert embed.texts == ["a", "b", "c"]
+    np.testing.assert_array_equal(vectors, _expected(["b", "c", "a"]))
+    assert cache.stats()["hits"] == 3
+
+def test_persists_across_instances_and_is_keyed_by_model(tmp_path):
+    EmbeddingCache(tmp_path, "modelo").embed_documents(["a", "b"], fake_embed)
+
+    embed = CountingEmbed()
+    assert len(EmbeddingCache(tmp_path, "modelo")) == 2
+    EmbeddingCache(tmp_path, "modelo").embed_documents(["a", "b"], embed)
+    EmbeddingCache(tmp_path, "otro-modelo").embed_documents(["a"], embed)
+    assert embed.texts == ["a"]
+
+def test_partial_trailing_record_is_discarded(tmp_path):
+    cache = EmbeddingCache(tmp_path, "modelo")
+    cache.embed_documents(["a", "b"], fake_embed)
+    with open(cache.cache_dir / FILE_EMBEDDING_CACHE_RECORDS, "ab") as f:
+        f.write(b"\x01" * 10)
+
+    reopened = EmbeddingCache(tmp_path, "modelo")
+    assert len(reopened) == 2
+    reopened.embed_documents(["c"], fake_embed)
+    vectors = EmbeddingCache(tmp_path, "modelo").embed_documents(["a", "c"], fake_embed)
+    np.testing.assert_array_equal(vectors, _expected(["a", "c"]))
+
+def test_size_limit_keeps_newest_records(tmp_path):
+    record_bytes = 16 + DIM * 4
+    cache = EmbeddingCache(tmp_path, "modelo", max_bytes=100 * record_bytes)
+    texts = [f"t{i}" for i in range(150)]
+    vectors = cache.embed_documents(texts, fake_embed)
+    np.testing.assert_array_equal(vectors, _expected(texts))
+
+    assert len(cache) <= 100
+    records_path = cache.cache_dir / FILE_EMBEDDING_CACHE_RECORDS
+    assert records_path.stat().st_size <= 100 * record_bytes
+    embed = CountingEmbed()
+    cache.embed_documents(texts[-10:], embed)
+    assert embed.texts == []
+
+def test_hits_survive_eviction_in_the_same_call(tmp_path):
+    record_bytes = 16 + DIM * 4
+    cache = EmbeddingCache(tmp_path, "modelo", max_bytes=10 * record_bytes)
+    cache.embed_documents([f"t{i}" for i in range(8)], fake_embed)
+
+    texts = ["t0"] + [f"nuevo{i}" for i in range(5)] + ["t7"]
+    embed = CountingEmbed()
+    vectors = cache.embed_documents(texts, embed)
+
+    assert embed.texts == [f"nuevo{i}" for i in range(5)]
+    np.testing.assert_array_equal(vectors, _expected(texts))
+    assert len(cache) <= 10
+
+def _worker(cache_dir, seed):
+    cache = EmbeddingCache(cache_dir, "modelo")
+    for i in range(20):
+        texts = [f"t{(seed * 7 + i * 3 + j) % 120}" for j in range(10)]
+        vectors = cache.embed_documents(texts, fake_embed)
+        np.testing.assert_array_equal(vectors, _expected(texts))
+
+@pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(), reason="requiere fork"
+)
+def test_concurrent_processes_share_one_file(tmp_path):
+    context = multiprocessing.get_context("fork")
+    processes = [
+        context.Process(target=_worker, args=(str(tmp_path), seed)) for seed in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    assert [process.exitcode for process in processes] == [0] * 4
+    cache = EmbeddingCache(tmp_path, "modelo")
+    texts = [f"t{i}" for i in range(120)]
+    vectors = cache.embed_documents(texts, fake_embed)
+    np.testing.assert_array_equal(vectors, _expected(texts))
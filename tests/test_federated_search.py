@@ -0,0 +1,100 @@
+from core.services.federated_search_service import FederatedSearchService
+
+class FakeSessions:
+    """Repositorio de sesiones mínimo: id -> (nombre, ruta, archivos)."""
+    def __init__(self, sessions):
+        self.sessions = sessions
+
+    def list_sessions(self):
+        return [
+            {"id": session_id, "name": name, "files": files}
+            for session_id, (name, _, files) in self.sessions.items()
+        ]
+
+    def get_session_path(self, session_id):
+        return self.sessions[session_id][1]
+
+class PassageLength:
+    def score(self, query, passages):
+        return [float(len(passage)) for passage in passages]
+
+def _ingest(repo, session_dir, documents):
+    repo.add_documents(str(session_dir), documents)
+    # Que la búsqueda federada tenga que leer el índice desde disco
+    repo.index_cache.clear()
+
+def _service(repo, sessions, **kwargs):
+    return FederatedSearchService(FakeSessions(sessions), repo, **kwargs)
+
+def test_merges_projects_and_tags_each_result(repo, make_session, make_documents):
+    calidad, compras = make_session("calidad"), make_session("compras")
+    _ingest(repo, calidad, make_documents("calidad.pdf", 3, text="política calidad"))
+    _ingest(repo, compras, make_documents("compras.pdf", 3, text="evalúa proveedores"))
+    service = _service(repo, {
+        "s1": ("Calidad", str(calidad), ["calidad.pdf"]),
+        "s2": ("Compras", str(compras), ["compras.pdf"]),
+        "s3": ("Vacío", str(make_session("vacio")), []),
+    })
+
+    results = service.search("evalúa proveedores", top_k=4)
+    assert results[0].session_id == "s2" and results[0].session_name == "Compras"
+    assert results[0].document.source_file == "compras.pdf"
+    assert {r.session_id for r in results} <= {"s1", "s2"}
+    scores = [r.score for r in results]
+    assert scores == sorted(scores, reverse=True)
+    # Los índices no cacheados se leen sin entrar al caché de sesiones
+    assert not repo.is_cached(str(calidad)) and not repo.is_cached(str(compras))
+
+def test_transient_indexes_close_their_docstore(
+    repo, make_session, make_documents, monkeypatch
+):
+    calidad = make_session("calidad")
+    _ingest(repo, calidad, make_documents("calidad.pdf", 3, text="política calidad"))
+    loaded = []
+    get_vector_db = repo.get_vector_db
+
+    def tracking_get_vector_db(session_path, transient=False):
+        components = get_vector_db(session_path, transient=transient)
+        loaded.append(components[0])
+        return components
+
+    monkeypatch.setattr(repo, "get_vector_db", tracking_get_vector_db)
+    service = _service(repo, {"s1": ("Calidad", str(calidad), ["calidad.pdf"])})
+
+    assert service.search("política calidad", top_k=2)
+    assert loaded and all(r.docstore._conn is None for r in loaded)
+
+    # Un índice en caché sigue abierto después de la búsqueda
+    retriever, _ = get_vector_db(str(calidad))
+    loaded.clear()
+    assert service.search("política calidad", top_k=2)
+    assert loaded == [retriever] and retriever.docstore._conn is not None
+
+def test_session_filter_and_failing_projects(repo, make_session, make_documents):
+    calidad = make_session("calidad")
+    _ingest(repo, calidad, make_documents("calidad.pdf", 3, text="política calidad"))
+    sessions = {
+        "s1": ("Calidad", str(calidad), ["calidad.pdf"]),
+        "rota": ("Rota", str(calidad.parent / "no-existe"), ["x.pdf"]),
+    }
+    service = _service(repo, sessions)
+
+    results = service.search("política calidad", top_k=2)
+    assert len(results) == 2 and {r.session_id for r in results} == {"s1"}
+    assert service.search("política calidad", session_ids=["rota"]) == []
+
+def test_reranker_scores_candidates_of_all_projects(
+    repo, make_session, make_documents
+):
+    a, b = make_session("a"), make_session("b")
+    _ingest(repo, a, make_documents("a.pdf", 2, text="registro"))
+    _ingest(repo, b, make_documents("b.pdf", 2, text="registro de una auditoría larga"))
+    service = _service(
+        repo,
+        {"a": ("A", str(a), ["a.pdf"]), "b": ("B", str(b), ["b.pdf"])},
+        reranker=PassageLength(),
+    )
+
+    results = service.search("registro", top_k=4)
+    assert [r.session_id for r in results] == ["b", "b", "a", "a"]
+    assert results[0].score == float(len(results[0].document.page_content))
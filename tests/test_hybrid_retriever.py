@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from infrastructure.vector_store.hybrid_retriever import HybridRetriever
+from infrastructure.vector_store.parent_map import ParentMap
+
+def _retriever(**fields) -> HybridRetriever:
+    parent_map = ParentMap([f"p{i}" for i in range(6)], np.zeros(0, dtype=np.int32))
+    defaults = dict(
+        vector_store=None,
+        docstore=None,
+        parent_map=parent_map,
+        weight_dense=0.6,
+        weight_sparse=0.4,
+        rrf_c=60,
+    )
+    return HybridRetriever(**{**defaults, **fields})
+
+def test_fuse_applies_weighted_reciprocal_rank():
+    retriever = _retriever()
+    dense = np.array([2, 0, 4])
+    sparse = np.array([0, 3])
+    candidates = retriever.fuse(dense, sparse)
+
+    expected = {
+        "p0": 0.6 / 62 + 0.4 / 61,
+        "p2": 0.6 / 61,
+        "p3": 0.4 / 62,
+        "p4": 0.6 / 63,
+    }
+    assert [c.doc_id for c in candidates] == sorted(
+        expected, key=lambda doc_id: -expected[doc_id]
+    )
+    for candidate in candidates:
+        assert candidate.score == pytest.approx(expected[candidate.doc_id])
+    by_id = {c.doc_id: c for c in candidates}
+    assert (by_id["p0"].dense_rank, by_id["p0"].sparse_rank) == (2, 1)
+    assert (by_id["p3"].dense_rank, by_id["p3"].sparse_rank) == (None, 2)
+
+def test_fuse_breaks_ties_by_first_appearance_and_truncates():
+    retriever = _retriever(weight_dense=0.5, weight_sparse=0.5, k=2)
+    candidates = retriever.fuse(np.array([1, 5]), np.array([3, 4]))
+
+    # Mismo rango en ambas ramas: BM25 aparece antes
+    assert [c.doc_id for c in candidates] == ["p3", "p1"]
+
+def test_fuse_with_no_results():
+    assert (
+        _retriever().fuse(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+        == []
+    )
+
+def test_hybrid_search_over_repository(repo, make_session, make_documents):
+    session = make_session()
+    repo.add_documents(
+        str(session), make_documents("a.pdf", 10, text="control de documentos")
+    )
+    repo.add_documents(
+        str(session), make_documents("b.pdf", 10, text="calibración de equipos")
+    )
+    retriever, bm25 = repo.get_vector_db(str(session))
+    hybrid = repo.get_hybrid_retriever(retriever, bm25)
+
+    docs = hybrid.invoke("calibración de equipos b.pdf registro 3")
+    assert docs[0].page_content == "calibración de equipos b.pdf registro 3"
+    candidates = hybrid.search(
+        "calibración de equipos b.pdf registro 3", with_passages=True
+    )
+    assert candidates[0].dense_rank == 1 and candidates[0].sparse_rank == 1
+    assert candidates[0].passages == ["calibración de equipos b.pdf registro 3"]
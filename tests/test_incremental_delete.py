@@ -0,0 +1,55 @@
+from infrastructure.constants import DIR_BM25_INDEX, DIR_VECTOR_STORE
+from infrastructure.vector_store.bm25_index import BM25InvertedIndex
+from infrastructure.vector_store.faiss_repository import FAISSRepository
+from infrastructure.vector_store.index_cache import SessionIndexCache
+from infrastructure.vector_store.source_manifest import SourceManifest
+
+def _sources(vector_store):
+    return {
+        vector_store.docstore.search(doc_id).metadata["source_file"]
+        for doc_id in vector_store.index_to_docstore_id.values()
+    }
+
+def test_delete_removes_only_that_source(
+    repo, make_session, make_documents, embeddings
+):
+    session = make_session()
+    for name in ("a.pdf", "b.pdf", "c.pdf"):
+        repo.add_documents(str(session), make_documents(name, 10))
+    embedded = embeddings.texts
+
+    assert repo.delete_documents_by_source(str(session), "b.pdf")
+    # Sin reconstrucción: no se vuelve a embeber nada
+    assert embeddings.texts == embedded
+
+    retriever, bm25 = repo.get_vector_db(str(session))
+    vector_store = retriever.vectorstore
+    assert vector_store.index.ntotal == len(vector_store.index_to_docstore_id) == 20
+    assert _sources(vector_store) == {"a.pdf", "c.pdf"}
+    vectorstore_path = session / DIR_VECTOR_STORE
+    assert sorted(SourceManifest.load(vectorstore_path).sources) == ["a.pdf", "c.pdf"]
+    assert retriever.docstore.count() == 20
+    assert BM25InvertedIndex.load(vectorstore_path / DIR_BM25_INDEX).num_docs == 20
+    assert all("b.pdf" not in doc.page_content for doc in bm25.invoke("b.pdf registro"))
+
+def test_deleted_source_stays_deleted_after_reload(
+    repo, make_session, make_documents, embeddings
+):
+    session = make_session()
+    repo.add_documents(str(session), make_documents("a.pdf", 5))
+    repo.add_documents(str(session), make_documents("b.pdf", 5))
+    assert repo.delete_documents_by_source(str(session), "a.pdf")
+
+    fresh = FAISSRepository(embeddings, index_cache=SessionIndexCache(10**9))
+    retriever, _ = fresh.get_vector_db(str(session))
+    assert _sources(retriever.vectorstore) == {"b.pdf"}
+    query = "auditoría interna a.pdf registro 1"
+    docs = fresh.similarity_search(retriever, query, k=10)
+    assert docs and all(doc.metadata["source_file"] == "b.pdf" for doc in docs)
+
+def test_deleting_unknown_source_is_a_no_op(repo, make_session, make_documents):
+    session = make_session()
+    repo.add_documents(str(session), make_documents("a.pdf", 5))
+
+    assert repo.delete_documents_by_source(str(session), "missing.pdf")
+    assert repo.get_vector_db(str(session))[0].vectorstore.index.ntotal == 5
@@ -0,0 +1,105 @@
+from infrastructure.storage.handlers.index_metadata_handler import IndexMetadataHandler
+from infrastructure.vector_store.faiss_repository import FAISSRepository
+from infrastructure.vector_store.index_cache import (
+    CachedSessionIndex,
+    SessionIndexCache,
+)
+
+def _entry(version: int, size: int) -> CachedSessionIndex:
+    return CachedSessionIndex(
+        retriever=object(), bm25_retriever=None, version=version, size_bytes=size
+    )
+
+def test_lru_evicts_least_recently_used_over_budget():
+    cache = SessionIndexCache(max_bytes=100)
+    cache.put("a", _entry(1, 40))
+    cache.put("b", _entry(1, 40))
+    assert cache.get("a", 1) is not None
+    cache.put("c", _entry(1, 40))
+
+    assert cache.contains("a", 1)
+    assert not cache.contains("b", 1)
+    assert cache.contains("c", 1)
+
+def test_new_version_replaces_previous_entry_of_session():
+    cache = SessionIndexCache(max_bytes=100)
+    cache.put("a", _entry(1, 10))
+    cache.put("a", _entry(2, 10))
+
+    assert cache.get("a", 1) is None
+    assert cache.get("a", 2) is not None
+    assert cache.stats()["entries"] == 1
+
+def test_peek_does_not_count_or_refresh():
+    cache = SessionIndexCache(max_bytes=100)
+    cache.put("a", _entry(1, 40))
+    cache.put("b", _entry(1, 40))
+    assert cache.peek("a", 1) is not None
+    cache.put("c", _entry(1, 40))
+
+    # `peek` no refrescó "a": es la expulsada
+    assert not cache.contains("a", 1)
+    assert cache.hits == 0 and cache.misses == 0
+
+def test_added_size_counts_towards_the_budget():
+    cache = SessionIndexCache(max_bytes=100)
+    first = _entry(1, 40)
+    cache.put("a", first)
+    cache.put("b", _entry(1, 40))
+    cache.add_size(first, 30)
+
+    assert first.size_bytes == 70
+    assert not cache.contains("a", 1)
+    assert cache.contains("b", 1)
+
+def test_repository_closes_docstores_dropped_from_cache(
+    make_session, make_documents, embeddings
+):
+    repo = FAISSRepository(embeddings, index_cache=SessionIndexCache(max_bytes=1))
+    first, second = str(make_session("uno")), str(make_session("dos"))
+    repo.add_documents(first, make_documents("a.pdf", 3))
+    old_retriever, _ = repo.get_vector_db(first)
+    old_docstore = old_retriever.docstore
+
+    # Una escritura reemplaza la entrada de la sesión
+    repo.add_documents(first, make_documents("b.pdf", 3))
+    assert old_docstore._conn is None
+    retriever, _ = repo.get_vector_db(first)
+    assert retriever.docstore._conn is not None
+
+    # Otra sesión expulsa la entrada por presupuesto
+    repo.add_documents(second, make_documents("c.pdf", 3))
+    assert retriever.docstore._conn is None
+    # Un retriever que sobrevivió a su entrada sigue respondiendo
+    assert len(retriever.invoke("auditoría interna b.pdf registro 1")) > 0
+
+def test_repository_serves_cached_version_until_write(
+    repo, make_session, make_documents
+):
+    session = make_session()
+    repo.add_documents(str(session), make_documents("a.pdf", 5))
+    retriever, bm25 = repo.get_vector_db(str(session))
+    assert repo.get_vector_db(str(session)) == (retriever, bm25)
+
+    version = IndexMetadataHandler.get_version(session)
+    repo.add_documents(str(session), make_documents("b.pdf", 5))
+    assert IndexMetadataHandler.get_version(session) == version + 1
+    new_retriever, _ = repo.get_vector_db(str(session))
+    assert new_retriever is not retriever
+    assert not repo.index_cache.contains(repo._session_key(str(session)), version)
+
+def test_copy_index_produces_loadable_session(
+    repo, make_session, make_documents, embeddings
+):
+    source, target = make_session("source"), make_session("target")
+    repo.add_documents(str(source), make_documents("a.pdf", 20))
+    repo.copy_index(str(source), str(target))
+
+    other = FAISSRepository(embeddings, index_cache=SessionIndexCache(10**9))
+    retriever, bm25 = other.get_vector_db(str(target))
+    original, _ = repo.get_vector_db(str(source))
+    assert retriever.vectorstore.index.ntotal == original.vectorstore.index.ntotal
+    assert bm25 is not None
+    get_version = IndexMetadataHandler.get_version
+    assert get_version(target) == get_version(source)
+    assert other.delete_documents_by_source(str(target), "a.pdf")
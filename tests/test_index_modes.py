@@ -0,0 +1,87 @@
+import faiss
+import numpy as np
+import pytest
+
+from config.settings import settings
+from infrastructure.storage.handlers.index_metadata_handler import IndexMetadataHandler
+from infrastructure.vector_store.index_factory import (
+    INDEX_MODE_FLAT,
+    INDEX_MODE_HNSW,
+    INDEX_MODE_IVF_FLAT,
+    INDEX_MODE_IVF_PQ,
+    build_index,
+    detect_mode,
+    reconstruct_all,
+    resolve_mode,
+)
+
+def _vectors(n: int, dim: int = 16, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+
+def test_auto_mode_promotes_over_threshold(monkeypatch):
+    monkeypatch.setattr(settings, "ANN_PROMOTION_THRESHOLD", 100)
+    monkeypatch.setattr(settings, "VECTOR_INDEX_AUTO_TARGET", INDEX_MODE_HNSW)
+
+    assert resolve_mode("auto", 99) == INDEX_MODE_FLAT
+    assert resolve_mode("auto", 100) == INDEX_MODE_HNSW
+
+def test_ivf_modes_stay_flat_until_trainable(monkeypatch):
+    monkeypatch.setattr(settings, "IVF_MIN_LISTS", 4)
+
+    assert resolve_mode(INDEX_MODE_IVF_FLAT, 4 * 39 - 1) == INDEX_MODE_FLAT
+    assert resolve_mode(INDEX_MODE_IVF_FLAT, 4 * 39) == INDEX_MODE_IVF_FLAT
+
+@pytest.mark.parametrize(
+    "mode", [INDEX_MODE_FLAT, INDEX_MODE_HNSW, INDEX_MODE_IVF_FLAT]
+)
+def test_built_index_finds_stored_vectors(monkeypatch, mode):
+    monkeypatch.setattr(settings, "IVF_MIN_LISTS", 2)
+    monkeypatch.setattr(settings, "IVF_NPROBE", 2)
+    vectors = _vectors(400)
+    index = build_index(mode, vectors)
+
+    assert detect_mode(index) == mode
+    np.testing.assert_allclose(reconstruct_all(index), vectors, atol=1e-6)
+    _, ids = index.search(vectors[:10], 1)
+    assert ids.ravel().tolist() == list(range(10))
+
+def test_ivf_pq_keeps_exact_copy_across_deletes(
+    monkeypatch, repo, make_session, make_documents, embeddings
+):
+    monkeypatch.setattr(settings, "VECTOR_INDEX_MODE", INDEX_MODE_IVF_PQ)
+    monkeypatch.setattr(settings, "IVF_PQ_NBITS", 4)
+    monkeypatch.setattr(settings, "IVF_PQ_M", 8)
+    monkeypatch.setattr(settings, "IVF_MIN_LISTS", 2)
+    session = make_session()
+    for name in ("a.pdf", "b.pdf", "c.pdf"):
+        documents = make_documents(name, 400, text="auditoría interna calidad")
+        repo.add_documents(str(session), documents)
+
+    retriever, _ = repo.get_vector_db(str(session))
+    assert detect_mode(retriever.vectorstore.index) == INDEX_MODE_IVF_PQ
+    assert repo.delete_documents_by_source(str(session), "a.pdf")
+
+    vector_store = repo.get_vector_db(str(session))[0].vectorstore
+    assert detect_mode(vector_store.index) == INDEX_MODE_IVF_PQ
+    texts = [
+        vector_store.docstore.search(vector_store.index_to_docstore_id[i]).page_content
+        for i in range(vector_store.index.ntotal)
+    ]
+    expected = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+    if vector_store._normalize_L2:
+        expected /= np.linalg.norm(expected, axis=1, keepdims=True)
+    np.testing.assert_allclose(
+        vector_store.exact_vectors.read_all(), expected, atol=1e-6
+    )
+    assert not any("a.pdf" in text for text in texts)
+
+def test_session_mode_can_be_changed(monkeypatch, repo, make_session, make_documents):
+    monkeypatch.setattr(settings, "IVF_MIN_LISTS", 2)
+    session = make_session()
+    repo.add_documents(str(session), make_documents("a.pdf", 100))
+
+    assert repo.set_index_mode(str(session), INDEX_MODE_IVF_FLAT) == INDEX_MODE_IVF_FLAT
+    retriever, _ = repo.get_vector_db(str(session))
+    assert detect_mode(retriever.vectorstore.index) == INDEX_MODE_IVF_FLAT
+    assert IndexMetadataHandler.load(session)["index_mode"] == INDEX_MODE_IVF_FLAT
+    assert retriever.vectorstore.index.metric_type == faiss.METRIC_L2
@@ -0,0 +1,202 @@
+import threading
+import time
+
+import pytest
+
+from core.domain.models import IngestionProgress, JobStatus
+from core.services.ingestion_job_service import IngestionJobService
+from infrastructure.storage.ingestion_job_store import SQLiteIngestionJobStore
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteIngestionJobStore(tmp_path / "jobs.db")
+
+class Upload:
+    def __init__(self, name):
+        self.name = name
+
+def _create(store, session_id, *filenames):
+    return store.create_job(
+        session_id, f"/sesiones/{session_id}", list(filenames),
+        [f"/sesiones/{session_id}/{name}" for name in filenames]
+    )
+
+def test_claims_oldest_job_one_per_session(store):
+    first = _create(store, "s1", "a.pdf")
+    second = _create(store, "s1", "b.pdf")
+    other = _create(store, "s2", "c.pdf")
+
+    claimed = store.claim_next_job("w1")
+    assert claimed.id == first.id
+    assert claimed.status == JobStatus.PARSING.value and claimed.attempts == 1
+    assert claimed.worker_id == "w1" and claimed.lease_expires_at > time.time()
+    # s1 ya tiene un trabajo en curso: se toma el de s2
+    assert store.claim_next_job("w1").id == other.id
+    assert store.claim_next_job("w1") is None
+
+    store.update_job(first.id, status=JobStatus.DONE.value)
+    assert store.claim_next_job("w1").id == second.id
+
+def test_concurrent_claims_never_share_a_job(tmp_path):
+    path = tmp_path / "jobs.db"
+    stores = [SQLiteIngestionJobStore(path) for _ in range(4)]
+    for i in range(20):
+        _create(stores[0], f"s{i}", "a.pdf")
+
+    claimed = []
+    lock = threading.Lock()
+
+    def worker(store):
+        while (job := store.claim_next_job("w")) is not None:
+            with lock:
+                claimed.append(job.id)
+
+    threads = [threading.Thread(target=worker, args=(s,)) for s in stores]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    assert len(claimed) == len(set(claimed)) == 20
+
+def test_only_expired_leases_are_requeued(tmp_path):
+    path = tmp_path / "jobs.db"
+    store = SQLiteIngestionJobStore(path, lease_seconds=60)
+    job = _create(store, "s1", "a.pdf", "b.pdf")
+    store.claim_next_job("w1")
+    store.update_job(job.id, status=JobStatus.EMBEDDING.value, failed_files=["b.pdf"])
+    assert store.requeue_expired() == 0
+
+    # Otro proceso con un lease más corto: el de w1 ya venció para él
+    expired = SQLiteIngestionJobStore(path, lease_seconds=0)
+    expired.renew_leases("w1")
+    assert store.requeue_expired() == 1
+    requeued = store.get_job(job.id)
+    assert requeued.status == JobStatus.QUEUED.value and requeued.is_active
+    assert requeued.failed_files == ["b.pdf"] and requeued.worker_id is None
+    assert store.claim_next_job("w2").attempts == 2
+
+    with pytest.raises(ValueError):
+        store.update_job(job.id, session_id="otra")
+    assert [j.id for j in store.list_jobs("s1")] == [job.id]
+
+class FakeDocService:
+    def __init__(self, pages=3, failed=(), error=None):
+        self.pages = pages
+        self.failed = list(failed)
+        self.error = error
+
+    def save_uploaded_files(self, uploaded_files, session_path):
+        return [f"{session_path}/{f.name}" for f in uploaded_files]
+
+    def ingest_files(self, file_paths, session_path, vector_repo, on_progress):
+        if self.error:
+            raise self.error
+        on_progress(IngestionProgress(
+            stage=JobStatus.EMBEDDING.value,
+            files_total=len(file_paths),
+            files_done=len(file_paths),
+            failed_files=self.failed,
+            file_errors={name: "ilegible" for name in self.failed},
+        ))
+        return None, None, self.pages
+
+class FakeSessionRepo:
+    def __init__(self):
+        self.files = {}
+
+    def get_session_path(self, session_id):
+        return f"/sesiones/{session_id}"
+
+    def add_files_to_session(self, session_id, filenames):
+        self.files.setdefault(session_id, []).extend(filenames)
+
+class FakeVectorRepo:
+    def __init__(self):
+        self.deleted = []
+
+    def delete_documents_by_source(self, session_path, filename):
+        self.deleted.append(filename)
+
+def _service(store, doc_service):
+    return IngestionJobService(
+        store, doc_service, FakeVectorRepo(), FakeSessionRepo(), max_workers=2
+    )
+
+def test_run_job_registers_only_loaded_files(store):
+    service = _service(store, FakeDocService(failed=["b.pdf"]))
+    _create(store, "s1", "a.pdf", "b.pdf")
+    job = store.claim_next_job(service.worker_id)
+
+    service._run_job(job)
+    done = store.get_job(job.id)
+    assert done.status == JobStatus.DONE.value and "b.pdf: ilegible" in done.error
+    assert service.session_repo.files == {"s1": ["a.pdf"]}
+    assert service.vector_repo.deleted == []
+
+def test_run_job_failures(store):
+    empty = _service(store, FakeDocService(pages=0, failed=["a.pdf"]))
+    _create(store, "s1", "a.pdf")
+    job = store.claim_next_job(empty.worker_id)
+    empty._run_job(job)
+    failed = store.get_job(job.id)
+    assert failed.status == JobStatus.FAILED.value and "a.pdf: ilegible" in failed.error
+
+    broken = _service(store, FakeDocService(error=RuntimeError("disco lleno")))
+    _create(store, "s2", "c.pdf")
+    job = store.claim_next_job(broken.worker_id)
+    broken._run_job(job)
+    assert store.get_job(job.id).error == "disco lleno"
+
+def test_retry_removes_partial_files_first(tmp_path):
+    store = SQLiteIngestionJobStore(tmp_path / "jobs.db", lease_seconds=0)
+    service = _service(store, FakeDocService())
+    _create(store, "s1", "a.pdf", "b.pdf")
+    store.claim_next_job("caido")
+    assert store.requeue_expired() == 1
+
+    job = store.claim_next_job(service.worker_id)
+    service._run_job(job)
+    assert service.vector_repo.deleted == ["a.pdf", "b.pdf"]
+
+def _wait_for_jobs(service, session_id):
+    deadline = time.monotonic() + 5
+    while service.has_active_jobs(session_id) and time.monotonic() < deadline:
+        time.sleep(0.02)
+
+def test_workers_process_submitted_uploads(store):
+    service = _service(store, FakeDocService())
+    service.start()
+    job = service.submit("s1", [Upload("a.pdf")])
+
+    _wait_for_jobs(service, "s1")
+    assert service.get_job(job.id).status == JobStatus.DONE.value
+    assert service.session_repo.files == {"s1": ["a.pdf"]}
+
+def test_second_service_leaves_running_jobs_alone(tmp_path):
+    path = tmp_path / "jobs.db"
+    started, release = threading.Event(), threading.Event()
+
+    class SlowDocService(FakeDocService):
+        def ingest_files(self, *args):
+            started.set()
+            release.wait(timeout=5)
+            return super().ingest_files(*args)
+
+    first = _service(SQLiteIngestionJobStore(path), SlowDocService())
+    first.start()
+    job = first.submit("s1", [Upload("a.pdf")])
+    assert started.wait(timeout=5)
+
+    # Otro proceso (o un servicio recreado) arranca sobre la misma base
+    second = _service(SQLiteIngestionJobStore(path), FakeDocService())
+    second.start()
+    time.sleep(0.1)
+    assert second.get_job(job.id).worker_id == first.worker_id
+
+    release.set()
+    _wait_for_jobs(first, "s1")
+    done = first.get_job(job.id)
+    assert done.status == JobStatus.DONE.value and done.attempts == 1
+    assert second.vector_repo.deleted == []
+    assert first.session_repo.files == {"s1": ["a.pdf"]}
+    assert second.session_repo.files == {}
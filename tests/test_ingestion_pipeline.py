@@ -0,0 +1,130 @@
+import threading
+import time
+
+import pytest
+
+from config.settings import settings
+from core.domain.models import FileLoadResult
+from core.services.ingestion_pipeline import (
+    STAGE_DONE,
+    STAGE_EMBEDDING,
+    STAGE_PARSING,
+    IngestionPipeline,
+    prefetch,
+)
+from infrastructure.constants import DIR_BM25_INDEX, DIR_VECTOR_STORE
+from infrastructure.vector_store.bm25_index import BM25InvertedIndex
+from infrastructure.vector_store.faiss_repository import FAISSRepository
+from infrastructure.vector_store.index_cache import SessionIndexCache
+from infrastructure.vector_store.source_manifest import SourceManifest
+
+class FakeLoader:
+    """Cargador con páginas ya armadas por archivo (o un error)."""
+    def __init__(self, pages_by_file):
+        self.pages_by_file = pages_by_file
+
+    def iter_files(self, file_paths):
+        for path in file_paths:
+            pages = self.pages_by_file[path]
+            if isinstance(pages, str):
+                yield FileLoadResult(file_path=path, filename=path, error=pages)
+            else:
+                yield FileLoadResult(
+                    file_path=path, filename=path, documents=list(pages)
+                )
+
+def test_prefetch_keeps_order_and_bounds_the_buffer():
+    produced = []
+
+    def items():
+        for i in range(10):
+            produced.append(i)
+            yield i
+
+    consumer = prefetch(items(), maxsize=2)
+    assert next(consumer) == 0
+    time.sleep(0.3)
+    # Uno entregado, dos en la cola y uno esperando lugar
+    assert len(produced) <= 4
+    assert list(consumer) == list(range(1, 10))
+
+def test_prefetch_reraises_producer_errors_and_releases_it():
+    def failing():
+        yield 1
+        raise ValueError("archivo dañado")
+
+    consumer = prefetch(failing(), maxsize=1)
+    assert next(consumer) == 1
+    with pytest.raises(ValueError, match="archivo dañado"):
+        next(consumer)
+
+    before = threading.active_count()
+    endless = prefetch(iter(range(10**9)), maxsize=1)
+    next(endless)
+    endless.close()
+    time.sleep(0.3)
+    assert threading.active_count() <= before
+
+def test_pipeline_batches_pages_and_reports_progress(
+    repo, make_session, make_documents, monkeypatch
+):
+    loader = FakeLoader({
+        "a.pdf": make_documents("a.pdf", 5),
+        "roto.pdf": "No se pudo extraer contenido",
+        "b.pdf": make_documents("b.pdf", 2),
+    })
+    batches = []
+    stream = repo.add_documents_stream
+
+    def recording_stream(session_path, pages, on_progress=None):
+        def recorded():
+            for batch in pages:
+                batches.append(len(batch))
+                yield batch
+        return stream(session_path, recorded(), on_progress=on_progress)
+
+    monkeypatch.setattr(repo, "add_documents_stream", recording_stream)
+    events = []
+    session = str(make_session())
+    _, bm25_retriever, pages = IngestionPipeline(loader, batch_pages=3).run(
+        ["a.pdf", "roto.pdf", "b.pdf"], session, repo, events.append
+    )
+
+    assert pages == 7 and batches == [3, 3, 1]
+    assert bm25_retriever.matrix.num_docs == 7
+    last = events[-1]
+    assert last.stage == STAGE_DONE and last.files_done == 3
+    assert last.failed_files == ["roto.pdf"] and "roto.pdf" in last.file_errors
+    assert {e.stage for e in events} == {STAGE_PARSING, STAGE_EMBEDDING, STAGE_DONE}
+
+def test_pipeline_without_content_does_not_touch_the_index(repo, make_session):
+    session = str(make_session())
+    loader = FakeLoader({"roto.pdf": "No se pudo extraer contenido"})
+
+    assert IngestionPipeline(loader).run(["roto.pdf"], session, repo) == (None, None, 0)
+    assert not repo.is_cached(session)
+
+def test_interrupted_ingest_keeps_stores_consistent(
+    embeddings, make_session, make_documents, monkeypatch
+):
+    monkeypatch.setattr(settings, "INGEST_COMMIT_CHUNKS", 50)
+    repo = FAISSRepository(embeddings, index_cache=SessionIndexCache(10**9))
+    session = make_session()
+
+    def batches():
+        for b in range(5):
+            yield make_documents("a.pdf", 30, text=f"auditoría lote {b}")
+        raise RuntimeError("corte")
+
+    with pytest.raises(RuntimeError):
+        repo.add_documents_stream(str(session), batches())
+
+    reloaded = FAISSRepository(embeddings, index_cache=SessionIndexCache(10**9))
+    retriever, _ = reloaded.get_vector_db(str(session))
+    entry = SourceManifest.load(session / DIR_VECTOR_STORE).sources["a.pdf"]
+    bm25 = BM25InvertedIndex.load(session / DIR_VECTOR_STORE / DIR_BM25_INDEX)
+
+    # Lo confirmado en el último guardado, igual en todos los almacenes
+    assert 0 < retriever.vectorstore.index.ntotal == len(entry["children"])
+    assert len(list(retriever.docstore.yield_keys())) == len(entry["parents"])
+    assert bm25.num_docs == len(entry["parents"]) > 0
@@ -0,0 +1,67 @@
+import random
+import threading
+import time
+
+import pytest
+from langchain_core.documents import Document
+
+from config.settings import settings
+from core.domain.models import FileLoadResult
+
+pytest.importorskip("llama_parse")
+
+from infrastructure.files.loader import PARSER_PYPDF, DocumentLoader  # noqa: E402
+
+@pytest.fixture
+def loader(monkeypatch):
+    monkeypatch.setattr(settings, "LLAMA_CLOUD_API_KEY", None)
+    monkeypatch.setattr(settings, "LLAMA_PARSE_MAX_CONCURRENCY", 3)
+    monkeypatch.setattr(settings, "PDF_LOADER_PROCESSES", 1)
+    return DocumentLoader()
+
+def _fake_load_file(tracker):
+    def load(path, parallel=False):
+        with tracker["lock"]:
+            tracker["running"] += 1
+            tracker["started"] += 1
+            tracker["max_running"] = max(tracker["max_running"], tracker["running"])
+        time.sleep(random.uniform(0.0, 0.02))
+        with tracker["lock"]:
+            tracker["running"] -= 1
+        return FileLoadResult(
+            file_path=path, filename=path, documents=[Document(page_content=path)]
+        )
+    return load
+
+def _tracker():
+    return {"lock": threading.Lock(), "running": 0, "started": 0, "max_running": 0}
+
+def test_results_come_back_in_input_order(loader, monkeypatch):
+    tracker = _tracker()
+    monkeypatch.setattr(loader, "_load_file", _fake_load_file(tracker))
+    paths = [f"doc{i}.pdf" for i in range(20)]
+
+    assert [r.filename for r in loader.iter_files(paths)] == paths
+    assert 1 < tracker["max_running"] <= 3
+
+def test_unconsumed_results_are_bounded(loader, monkeypatch):
+    tracker = _tracker()
+    monkeypatch.setattr(loader, "_load_file", _fake_load_file(tracker))
+    results = loader.iter_files([f"doc{i}.pdf" for i in range(50)])
+
+    next(results)
+    time.sleep(0.1)
+    # Ventana de 2 * hilos archivos lanzados y no entregados
+    assert tracker["started"] <= 1 + 2 * 3
+    results.close()
+
+def test_unreadable_file_reports_its_error(loader, tmp_path):
+    broken = tmp_path / "roto.pdf"
+    broken.write_bytes(b"esto no es un PDF")
+    empty = tmp_path / "vacio.pdf"
+    empty.write_bytes(b"")
+
+    results = loader.load_files([str(broken), str(empty)])
+    assert [r.filename for r in results] == ["roto.pdf", "vacio.pdf"]
+    assert all(r.error and not r.documents for r in results)
+    assert results[0].parser == PARSER_PYPDF
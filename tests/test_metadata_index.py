@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from infrastructure.vector_store.metadata_index import MetadataIndex
+
+def _index() -> MetadataIndex:
+    metadata = [
+        {"source_file": "a.pdf", "parser": "llama", "page": 1},
+        {"source_file": "a.pdf", "parser": "llama", "page": 2},
+        {"source_file": "b.pdf", "parser": "pypdf", "page": 1},
+        {"source_file": "b.pdf", "parser": "llama", "page": 5},
+        {"source": "user_note", "type": "note"},
+    ]
+    children = [
+        (i, Document(page_content="x", metadata=m)) for i, m in enumerate(metadata)
+    ]
+    return MetadataIndex.from_children(len(metadata), children)
+
+def _selected(mask: np.ndarray):
+    return np.flatnonzero(mask).tolist()
+
+def test_filters_or_within_a_field_and_across_fields():
+    index = _index()
+    assert _selected(index.mask({"source_file": "a.pdf"})) == [0, 1]
+    assert _selected(index.mask({"source_file": ["a.pdf", "b.pdf"]})) == [0, 1, 2, 3]
+    assert _selected(index.mask({"source_file": "b.pdf", "parser": "llama"})) == [3]
+    assert _selected(index.mask({})) == [0, 1, 2, 3, 4]
+
+def test_page_ranges_and_user_notes():
+    index = _index()
+    assert _selected(index.mask({"page": 1})) == [0, 2]
+    assert _selected(index.mask({"page": (2, 5)})) == [1, 3]
+    assert _selected(index.mask({"source_file": "user_note"})) == [4]
+    assert index.values("source_file") == ["a.pdf", "b.pdf", "user_note"]
+
+def test_unknown_values_and_fields():
+    index = _index()
+    assert not index.mask({"source_file": "otro.pdf"}).any()
+    with pytest.raises(ValueError):
+        index.mask({"autor": "x"})
+
+def test_filtered_search_only_returns_matching_children(
+    repo, make_session, make_documents
+):
+    session = str(make_session())
+    repo.add_documents(
+        session,
+        make_documents("a.pdf", 4, text="control de registros")
+        + make_documents("b.pdf", 4, text="control de registros"),
+    )
+    retriever, _ = repo.get_vector_db(session)
+
+    docs = repo.similarity_search(
+        retriever, "control a.pdf", k=20, filters={"source_file": "b.pdf"}
+    )
+    assert docs and {doc.metadata["source_file"] for doc in docs} == {"b.pdf"}
+    assert repo.similarity_search(
+        retriever, "control", k=5, filters={"source_file": "c.pdf"}
+    ) == []
@@ -0,0 +1,56 @@
+import pytest
+
+from config.settings import settings
+from infrastructure.constants import DIR_VECTOR_STORE
+from infrastructure.vector_store.faiss_repository import FAISSRepository
+from infrastructure.vector_store.index_cache import SessionIndexCache
+from infrastructure.vector_store.index_factory import (
+    INDEX_MODE_FLAT,
+    INDEX_MODE_HNSW,
+    mmap_io_flags,
+)
+from infrastructure.vector_store.rescoring_faiss import RescoringFAISS
+
+@pytest.fixture
+def populated_session(repo, make_session, make_documents):
+    session = make_session()
+    repo.add_documents(str(session), make_documents("a.pdf", 20))
+    return session
+
+def test_mapped_store_defers_id_mapping(populated_session, embeddings):
+    vector_store = RescoringFAISS.load_mapped(
+        str(populated_session / DIR_VECTOR_STORE),
+        embeddings,
+        mmap_io_flags(INDEX_MODE_FLAT)
+    )
+    assert not vector_store.mapping_loaded
+    assert vector_store.index.ntotal == 20
+
+    doc = vector_store.similarity_search("auditoría interna a.pdf registro 4", k=1)[0]
+    assert vector_store.mapping_loaded
+    assert doc.page_content == "auditoría interna a.pdf registro 4"
+
+@pytest.mark.parametrize("mode", [INDEX_MODE_FLAT, INDEX_MODE_HNSW])
+def test_read_only_sessions_open_mapped_and_stay_writable(
+    monkeypatch, mode, make_session, make_documents, embeddings
+):
+    monkeypatch.setattr(settings, "VECTOR_INDEX_MODE", mode)
+    monkeypatch.setattr(settings, "FAISS_MMAP_MIN_MB", 0)
+    session = make_session()
+    writer = FAISSRepository(embeddings, index_cache=SessionIndexCache(10**9))
+    writer.add_documents(str(session), make_documents("a.pdf", 20))
+
+    reader = FAISSRepository(embeddings, index_cache=SessionIndexCache(10**9))
+    retriever, bm25_retriever = reader.get_vector_db(str(session))
+    assert retriever.vectorstore._mapping_lock is not None
+    # Abrir el índice no lee la tabla de ids: los mapas de hijos esperan a la
+    # primera consulta que los necesita
+    assert not retriever.vectorstore.mapping_loaded
+    reader.get_hybrid_retriever(retriever, bm25_retriever)
+    assert retriever.vectorstore.mapping_loaded
+    query = "auditoría interna a.pdf registro 9"
+    assert reader.similarity_search(retriever, query, k=1)[0].page_content == query
+
+    # Las escrituras cargan el índice completo, no el mapeado
+    reader.add_documents(str(session), make_documents("b.pdf", 5))
+    assert reader.get_vector_db(str(session))[0].vectorstore.index.ntotal == 25
@@ -0,0 +1,56 @@
+import numpy as np
+from langchain_core.documents import Document
+
+from infrastructure.vector_store.parent_map import ParentMap
+
+def _child(parent_id):
+    metadata = {"doc_id": parent_id} if parent_id else {}
+    return Document(page_content="x", metadata=metadata)
+
+def test_seed_ids_keep_their_ordinals():
+    children = list(enumerate([_child("p2"), _child("p9"), _child("p2"), _child(None)]))
+    parent_map = ParentMap.from_children(5, children, "doc_id", ["p1", "p2"])
+
+    assert parent_map.parent_ids == ["p1", "p2", "p9"]
+    assert parent_map.child_parent.tolist() == [1, 2, 1, -1, -1]
+    assert parent_map.parent_index["p9"] == 2
+    # Hijos agrupados por padre
+    grouped = parent_map.child_parent[parent_map.children_sorted]
+    assert grouped.tolist() == sorted(grouped.tolist())
+
+def test_retriever_returns_unique_parents_in_child_order(
+    repo, make_session, make_documents, monkeypatch
+):
+    session = str(make_session())
+    repo.add_documents(session, make_documents("a.pdf", 6, text="gestión de riesgos"))
+    retriever, _ = repo.get_vector_db(session)
+    retriever.search_kwargs = {"k": 12}
+
+    ords = retriever.parent_ordinals("gestión de riesgos registro 3")
+    assert len(np.unique(ords)) == len(ords)
+
+    reads = []
+    mget = retriever.docstore.mget
+    monkeypatch.setattr(
+        retriever.docstore, "mget", lambda keys: reads.append(keys) or mget(keys)
+    )
+    docs = retriever.invoke("gestión de riesgos registro 3")
+    assert len(reads) == 1
+    assert docs[0].page_content.endswith("registro 3")
+    assert len({doc.page_content for doc in docs}) == len(docs)
+
+    retriever.max_parents = 2
+    assert len(retriever.invoke("gestión de riesgos")) == 2
+
+def test_loaded_index_shares_one_parent_map(repo, make_session, make_documents):
+    session = str(make_session())
+    repo.add_documents(session, make_documents("a.pdf", 3))
+    repo.index_cache.clear()
+
+    retriever, bm25_retriever = repo.get_vector_db(session)
+    hybrid = repo.get_hybrid_retriever(retriever, bm25_retriever)
+    assert hybrid.parent_map is retriever.parent_map
+    # Las columnas BM25 coinciden con los ordinales de padre
+    assert retriever.parent_map.parent_ids[: bm25_retriever.matrix.num_docs] == (
+        bm25_retriever.matrix.doc_ids
+    )
@@ -0,0 +1,84 @@
+import os
+
+import pytest
+from langchain_core.documents import Document
+
+from config.settings import settings
+from infrastructure.files.parse_cache import ParseCache, file_sha256
+
+def _pages(filename, count=2):
+    return [
+        Document(
+            page_content=f"página {i}",
+            metadata={"source_file": filename, "source": filename, "page": i},
+        )
+        for i in range(count)
+    ]
+
+def test_entries_are_addressed_by_content_and_renamed_on_read(tmp_path):
+    original = tmp_path / "manual.pdf"
+    copy = tmp_path / "copia.pdf"
+    original.write_bytes(b"%PDF contenido")
+    copy.write_bytes(b"%PDF contenido")
+    assert file_sha256(str(original)) == file_sha256(str(copy))
+
+    cache = ParseCache(str(tmp_path / "cache"), 10**6)
+    key = ParseCache.key(file_sha256(str(original)), "PyPDFLoader")
+    cache.put(key, _pages("manual.pdf"))
+
+    docs = cache.get(key, "copia.pdf")
+    assert [d.page_content for d in docs] == ["página 0", "página 1"]
+    assert docs[0].metadata == {
+        "source_file": "copia.pdf", "source": "copia.pdf", "page": 0
+    }
+
+def test_key_depends_on_parser_and_options():
+    base = ParseCache.key("abc", "LlamaParse", {"result_type": "markdown"})
+    assert base == ParseCache.key("abc", "LlamaParse", {"result_type": "markdown"})
+    assert base != ParseCache.key("abc", "LlamaParse", {"result_type": "text"})
+    assert base != ParseCache.key("abc", "PyPDFLoader", {"result_type": "markdown"})
+
+def test_corrupt_entries_are_dropped(tmp_path):
+    cache = ParseCache(str(tmp_path), 10**6)
+    (tmp_path / "roto.json.gz").write_bytes(b"no es gzip")
+
+    assert cache.get("roto", "a.pdf") is None
+    assert not (tmp_path / "roto.json.gz").exists()
+    assert cache.stats()["misses"] == 1
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ParseCache(str(tmp_path), 10**6)
+    for i, key in enumerate(["a", "b", "c"]):
+        cache.put(key, _pages(f"{key}.pdf", 50))
+        os.utime(cache._path(key), (i, i))
+    entry_size = cache._path("a").stat().st_size
+    cache.get("a", "a.pdf")
+
+    cache.max_bytes = 3 * entry_size - 1
+    cache.put("d", _pages("d.pdf", 50))
+    assert cache.get("b", "b.pdf") is None and cache.get("c", "c.pdf") is None
+    assert cache.get("a", "a.pdf") is not None and cache.get("d", "d.pdf") is not None
+
+def test_loader_reuses_parsed_pages(tmp_path, monkeypatch):
+    pytest.importorskip("llama_parse")
+    from infrastructure.files import loader as loader_module
+
+    monkeypatch.setattr(settings, "LLAMA_CLOUD_API_KEY", None)
+    monkeypatch.setattr(settings, "PDF_LOADER_PROCESSES", 1)
+    parsed = []
+
+    def parse(pdf_path, filename):
+        parsed.append(filename)
+        return _pages(filename)
+
+    monkeypatch.setattr(loader_module, "_parse_with_pypdf", parse)
+    pdf = tmp_path / "a.pdf"
+    pdf.write_bytes(b"%PDF contenido")
+    renamed = tmp_path / "b.pdf"
+    renamed.write_bytes(b"%PDF contenido")
+
+    loader = loader_module.DocumentLoader()
+    first, second = loader.load_files([str(pdf)]), loader.load_files([str(renamed)])
+    assert parsed == ["a.pdf"]
+    assert not first[0].cached and second[0].cached
+    assert second[0].documents[0].metadata["source_file"] == "b.pdf"
@@ -0,0 +1,94 @@
+import faiss
+import numpy as np
+import pytest
+
+from config.settings import settings
+from infrastructure.constants import DIR_VECTOR_STORE, EXACT_VECTORS_GLOB
+from infrastructure.storage.handlers.index_metadata_handler import IndexMetadataHandler
+from infrastructure.vector_store.faiss_repository import FAISSRepository
+from infrastructure.vector_store.index_cache import SessionIndexCache
+from infrastructure.vector_store.index_factory import (
+    INDEX_MODE_FLAT,
+    STORAGE_FP16,
+    STORAGE_SQ8,
+    build_index,
+    detect_storage,
+    resolve_storage,
+)
+from infrastructure.vector_store.rescoring_faiss import ExactVectorFile
+
+def test_sq8_falls_back_to_fp16_without_training_data(monkeypatch):
+    monkeypatch.setattr(settings, "SQ8_MIN_TRAIN", 100)
+
+    assert resolve_storage(STORAGE_SQ8, INDEX_MODE_FLAT, 99) == STORAGE_FP16
+    assert resolve_storage(STORAGE_SQ8, INDEX_MODE_FLAT, 100) == STORAGE_SQ8
+
+@pytest.mark.parametrize("storage", [STORAGE_FP16, STORAGE_SQ8])
+def test_quantized_index_approximates_float32(storage):
+    vectors = np.random.default_rng(0).standard_normal((500, 16)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    index = build_index(INDEX_MODE_FLAT, vectors, faiss.METRIC_INNER_PRODUCT, storage)
+
+    assert detect_storage(index) == storage
+    _, ids = index.search(vectors[:20], 1)
+    assert ids.ravel().tolist() == list(range(20))
+
+def test_global_quantized_storage_normalizes_and_rescores(
+    monkeypatch, repo, make_session, make_documents
+):
+    monkeypatch.setattr(settings, "VECTOR_STORAGE", STORAGE_FP16)
+    session = make_session()
+    repo.add_documents(str(session), make_documents("a.pdf", 30))
+
+    vector_store = repo.get_vector_db(str(session))[0].vectorstore
+    assert detect_storage(vector_store.index) == STORAGE_FP16
+    assert vector_store.index.metric_type == faiss.METRIC_INNER_PRODUCT
+    assert vector_store._normalize_L2
+    assert IndexMetadataHandler.load(session)["normalized"]
+    assert vector_store.rescoring and vector_store.exact_vectors.num_rows == 30
+
+    query = "auditoría interna a.pdf registro 7"
+    doc, score = vector_store.similarity_search_with_score(query, k=1)[0]
+    assert doc.page_content == "auditoría interna a.pdf registro 7"
+    assert score == pytest.approx(1.0, abs=1e-5)
+
+def test_delete_writes_new_exact_generation(
+    monkeypatch, make_session, make_documents, embeddings
+):
+    monkeypatch.setattr(settings, "VECTOR_STORAGE", STORAGE_FP16)
+    session = make_session()
+    writer = FAISSRepository(embeddings, index_cache=SessionIndexCache(10**9))
+    reader = FAISSRepository(embeddings, index_cache=SessionIndexCache(10**9))
+    for name in ("a.pdf", "b.pdf"):
+        writer.add_documents(str(session), make_documents(name, 20))
+
+    old_store = reader.get_vector_db(str(session))[0].vectorstore
+    query = "auditoría interna b.pdf registro 3"
+    before = old_store.similarity_search_with_score(query, k=3)
+    assert writer.delete_documents_by_source(str(session), "a.pdf")
+
+    vectorstore_path = session / DIR_VECTOR_STORE
+    files = sorted(p.name for p in vectorstore_path.glob(EXACT_VECTORS_GLOB))
+    assert files == [IndexMetadataHandler.load(session)["exact_vectors_file"]]
+    assert ExactVectorFile.generation_of(vectorstore_path / files[0]) >= 2
+    # Quien ya tenía mapeada la generación anterior sigue leyendo sus posiciones
+    after = old_store.similarity_search_with_score(query, k=3)
+    assert [(d.page_content, round(float(s), 5)) for d, s in before] == [
+        (d.page_content, round(float(s), 5)) for d, s in after
+    ]
+
+    new_store = reader.get_vector_db(str(session))[0].vectorstore
+    assert new_store.exact_vectors.num_rows == new_store.index.ntotal == 20
+
+def test_exact_vector_file_ignores_unpublished_tail(tmp_path):
+    vectors = np.arange(12, dtype=np.float32).reshape(3, 4)
+    exact = ExactVectorFile.create(tmp_path, vectors)
+    # Filas escritas por una ingesta que no llegó a publicarse
+    with open(exact.path, "ab") as f:
+        f.write(np.ones((2, 4), dtype=np.float32).tobytes())
+
+    reopened = ExactVectorFile(exact.path, 4, num_rows=3)
+    np.testing.assert_array_equal(reopened.read_all(), vectors)
+    reopened.append(np.full((1, 4), 7, dtype=np.float32))
+    assert reopened.file_rows() == 4
+    np.testing.assert_array_equal(reopened.rows(np.array([3])), np.full((1, 4), 7))
@@ -0,0 +1,83 @@
+import threading
+
+import numpy as np
+import pytest
+
+from infrastructure.vector_store.query_embedding_cache import QueryEmbeddingCache
+
+class RecordingEmbeddings:
+    """Embeddings que registran cada consulta; `released` permite retener al modelo."""
+    model_name = "recording-embeddings"
+
+    def __init__(self):
+        self.queries = []
+        self.released = threading.Event()
+        self.released.set()
+
+    def embed_query(self, text):
+        self.released.wait()
+        self.queries.append(text)
+        return [float(len(text)), 1.0]
+
+    def embed_documents(self, texts):
+        return [[0.0, 0.0] for _ in texts]
+
+def test_repeated_queries_hit_the_cache():
+    model = RecordingEmbeddings()
+    cache = QueryEmbeddingCache(model, max_entries=4, max_wait_ms=0)
+
+    assert cache.embed_query("abc") == [3.0, 1.0]
+    assert cache.embed_query("abc") == [3.0, 1.0]
+    assert model.queries == ["abc"]
+    assert cache.stats()["hits"] == 1 and cache.model_name == "recording-embeddings"
+
+def test_embed_queries_keeps_order_and_deduplicates():
+    model = RecordingEmbeddings()
+    cache = QueryEmbeddingCache(model, max_entries=8, max_wait_ms=20)
+
+    vectors = cache.embed_queries(["a", "bbb", "a", "cc"])
+    np.testing.assert_array_equal(vectors[:, 0], [1.0, 3.0, 1.0, 2.0])
+    assert sorted(model.queries) == ["a", "bbb", "cc"]
+    assert cache.stats()["batches"] == 1
+
+def test_lru_reuses_the_oldest_slot():
+    model = RecordingEmbeddings()
+    cache = QueryEmbeddingCache(model, max_entries=2, max_wait_ms=0)
+    cache.embed_query("a")
+    cache.embed_query("bb")
+    cache.embed_query("a")
+    cache.embed_query("ccc")
+
+    assert len(cache) == 2
+    cache.embed_query("a")
+    cache.embed_query("bb")
+    assert model.queries == ["a", "bb", "ccc", "bb"]
+
+def test_concurrent_identical_queries_are_embedded_once():
+    model = RecordingEmbeddings()
+    model.released.clear()
+    cache = QueryEmbeddingCache(model, max_entries=4, max_wait_ms=0)
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.embed_query("norma")))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    model.released.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert results == [[5.0, 1.0]] * 5
+    assert model.queries == ["norma"]
+
+def test_model_errors_reach_every_waiter_and_are_not_cached():
+    class Failing(RecordingEmbeddings):
+        def embed_query(self, text):
+            raise RuntimeError("modelo caído")
+
+    cache = QueryEmbeddingCache(Failing(), max_entries=4, max_wait_ms=0)
+    with pytest.raises(RuntimeError, match="modelo caído"):
+        cache.embed_query("q")
+    assert len(cache) == 0
@@ -0,0 +1,59 @@
+from infrastructure.ai.rerank_score_cache import CachedReranker, DiskScoreStore
+
+class CountingReranker:
+    model_name = "fake-cross-encoder"
+
+    def __init__(self):
+        self.calls = []
+
+    def score(self, query, passages):
+        self.calls.append(list(passages))
+        return [float(len(passage)) for passage in passages]
+
+def test_memory_hits_skip_the_model_and_ignore_query_formatting():
+    reranker = CountingReranker()
+    cached = CachedReranker(reranker, max_entries=100)
+
+    first = cached.score("¿Qué es la auditoría?", ["uno", "dos", "uno"])
+    second = cached.score("  que es la AUDITORIA ", ["dos", "uno"])
+
+    assert first == [3.0, 3.0, 3.0] and second == [3.0, 3.0]
+    # Pasajes repetidos se envían una vez; la segunda consulta no llega al modelo
+    assert reranker.calls == [["uno", "dos"]]
+    assert cached.stats()["memory_hits"] == 2
+
+def test_keys_depend_on_the_model_name():
+    reranker = CountingReranker()
+    a = CachedReranker(reranker, model_name="a", max_entries=10)
+    b = CachedReranker(reranker, model_name="b", max_entries=10)
+    assert a._keys("q", ["p"]) != b._keys("q", ["p"])
+
+def test_memory_lru_is_bounded():
+    reranker = CountingReranker()
+    cached = CachedReranker(reranker, max_entries=2)
+    cached.score("q", ["a", "b", "c"])
+    assert len(cached._memory) == 2
+
+    cached.score("q", ["a"])
+    assert reranker.calls[-1] == ["a"]
+
+def test_disk_level_survives_a_new_instance(tmp_path):
+    warm = CachedReranker(CountingReranker(), max_entries=10, cache_dir=str(tmp_path))
+    warm.score("q", ["a", "bb"])
+
+    second = CountingReranker()
+    cached = CachedReranker(second, max_entries=10, cache_dir=str(tmp_path))
+    assert cached.score("q", ["bb", "a", "ccc"]) == [2.0, 1.0, 3.0]
+    assert second.calls == [["ccc"]]
+    stats = cached.stats()
+    assert stats["disk_hits"] == 2 and stats["misses"] == 1
+
+def test_disk_store_trims_oldest_entries(tmp_path):
+    store = DiskScoreStore(tmp_path / "scores.db", max_entries=3)
+    store.mset({bytes([i]): float(i) for i in range(3)})
+    store.mset({bytes([i]): float(i) for i in range(3, 5)})
+
+    assert len(store) == 3
+    assert store.mget([bytes([i]) for i in range(5)]) == {
+        bytes([2]): 2.0, bytes([3]): 3.0, bytes([4]): 4.0
+    }
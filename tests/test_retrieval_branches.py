@@ -0,0 +1,60 @@
+import time
+
+import numpy as np
+
+class _SlowRanking:
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    def __call__(self, query):
+        time.sleep(self.delay)
+        return np.array([0]), np.zeros(0, dtype=np.int64)
+
+def test_slow_branch_is_dropped_after_timeout(repo, make_session, make_documents):
+    session = make_session()
+    repo.add_documents(str(session), make_documents("a.pdf", 10))
+    retriever, bm25 = repo.get_vector_db(str(session))
+    hybrid = repo.get_hybrid_retriever(retriever, bm25).model_copy(
+        update={"branch_timeout": 0.2}
+    )
+    object.__setattr__(hybrid, "_dense_ranking", _SlowRanking(2.0))
+
+    start = time.monotonic()
+    candidates = hybrid.search("auditoría interna a.pdf registro 4")
+    assert time.monotonic() - start < 1.5
+    assert candidates and all(c.dense_rank is None for c in candidates)
+    assert (
+        candidates[0].doc_id
+        == bm25.matrix.search("auditoría interna a.pdf registro 4", 1)[0][0]
+    )
+
+def test_failing_branch_falls_back_to_the_other(repo, make_session, make_documents):
+    session = make_session()
+    repo.add_documents(str(session), make_documents("a.pdf", 10))
+    retriever, bm25 = repo.get_vector_db(str(session))
+    hybrid = repo.get_hybrid_retriever(retriever, bm25).model_copy()
+
+    def broken(query):
+        raise RuntimeError("falla BM25")
+
+    object.__setattr__(hybrid, "_sparse_ranking", broken)
+    candidates = hybrid.search("auditoría interna a.pdf registro 4")
+    assert candidates and all(c.sparse_rank is None for c in candidates)
+
+def test_parent_arrays_are_built_on_the_first_query(
+    repo, make_session, make_documents
+):
+    session = make_session()
+    repo.add_documents(str(session), make_documents("a.pdf", 10))
+    retriever, bm25 = repo.get_vector_db(str(session))
+    entry = repo.index_cache.find_by_retriever(retriever)
+    size_before = entry.size_bytes
+
+    assert entry.parent_map is None and entry.metadata_index is None
+    hybrid = repo.get_hybrid_retriever(retriever, bm25)
+    assert hybrid.parent_map is entry.parent_map is retriever.parent_map
+    assert entry.metadata_index is not None
+    assert entry.size_bytes > size_before
+    assert repo.get_hybrid_retriever(retriever, bm25) is hybrid
+    # Columna BM25 == ordinal del padre
+    assert entry.parent_map.parent_ids[: bm25.matrix.num_docs] == bm25.matrix.doc_ids
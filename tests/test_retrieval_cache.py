@@ -0,0 +1,50 @@
+from core.domain.query import normalize_query
+from infrastructure.vector_store.retrieval_cache import RetrievalResultCache
+
+def test_normalize_query_ignores_case_accents_and_punctuation():
+    assert normalize_query("  ¿Cuál es la Política de CALIDAD?  ") == (
+        "cual es la politica de calidad"
+    )
+    assert normalize_query("no-conformidad,  acción") == "no conformidad accion"
+
+def test_newer_version_invalidates_every_entry():
+    cache = RetrievalResultCache(max_entries=10, version=1)
+    cache.put("q", 1, [("p1", 0.5)])
+    assert cache.get("q", 1) == [("p1", 0.5)]
+
+    assert cache.get("q", 2) is None
+    assert cache.stats()["entries"] == 0 and cache.version == 2
+
+def test_results_from_an_older_version_are_not_stored_or_served():
+    cache = RetrievalResultCache(max_entries=10, version=3)
+    cache.put("q", 2, [("stale", 1.0)])
+    assert cache.get("q", 3) is None
+
+    cache.put("q", 3, [("fresh", 1.0)])
+    assert cache.get("q", 2) is None
+    assert cache.get("q", 3) == [("fresh", 1.0)]
+
+def test_lru_evicts_least_recently_used():
+    cache = RetrievalResultCache(max_entries=2)
+    cache.put("a", 0, [])
+    cache.put("b", 0, [])
+    cache.get("a", 0)
+    cache.put("c", 0, [])
+
+    assert cache.get("b", 0) is None
+    assert cache.get("a", 0) == [] and cache.get("c", 0) == []
+    assert cache.stats()["hits"] == 3
+
+def test_hybrid_retriever_carries_the_cache_of_its_index_version(
+    repo, make_session, make_documents
+):
+    session = str(make_session())
+    repo.add_documents(session, make_documents("a.pdf", 3))
+    first = repo.get_hybrid_retriever(*repo.get_vector_db(session))
+    assert first.result_cache is not None
+    assert repo.get_hybrid_retriever(*repo.get_vector_db(session)) is first
+
+    repo.add_documents(session, make_documents("b.pdf", 3))
+    second = repo.get_hybrid_retriever(*repo.get_vector_db(session))
+    assert second.version > first.version
+    assert second.result_cache is not first.result_cache
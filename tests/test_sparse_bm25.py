@@ -0,0 +1,84 @@
+import math
+
+import numpy as np
+from langchain_core.documents import Document
+
+from config.settings import settings
+from infrastructure.vector_store.bm25_index import BM25InvertedIndex, tokenize
+from infrastructure.vector_store.sparse_bm25 import (
+    SparseBM25Matrix,
+    SparseBM25Retriever,
+)
+
+CORPUS = {
+    "a": "control de documentos control de registros",
+    "b": "auditoría interna del sistema",
+    "c": "aprobación de documentos por la dirección",
+    "d": "calibración de equipos de medición",
+}
+
+def _reference_scores(corpus, query):
+    """BM25 escrito de forma directa, documento por documento."""
+    k1, b = settings.BM25_K1, settings.BM25_B
+    docs = {doc_id: tokenize(text) for doc_id, text in corpus.items()}
+    avgdl = sum(len(tokens) for tokens in docs.values()) / len(docs)
+    scores = {}
+    for doc_id, tokens in docs.items():
+        score = 0.0
+        for term in set(tokenize(query)):
+            df = sum(term in other for other in docs.values())
+            if not df:
+                continue
+            idf = math.log((len(docs) - df + 0.5) / (df + 0.5) + 1.0)
+            tf = tokens.count(term)
+            score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(tokens) / avgdl))
+        scores[doc_id] = score
+    return scores
+
+def _matrix(tmp_path, corpus):
+    index = BM25InvertedIndex(tmp_path / "bm25")
+    index.add_documents(corpus.items())
+    return index, SparseBM25Matrix.from_index(index)
+
+def test_scores_match_reference_formula(tmp_path):
+    _, matrix = _matrix(tmp_path, CORPUS)
+    for query in ("control de documentos", "auditoría", "equipos de medición interna"):
+        expected = _reference_scores(CORPUS, query)
+        np.testing.assert_allclose(
+            matrix.score(query), [expected[d] for d in matrix.doc_ids], rtol=1e-5
+        )
+
+def test_top_k_orders_by_score_and_skips_zero_scores(tmp_path):
+    _, matrix = _matrix(tmp_path, CORPUS)
+    hits = matrix.search("documentos control", 10)
+
+    assert [doc_id for doc_id, _ in hits] == ["a", "c"]
+    assert hits[0][1] > hits[1][1] > 0
+    assert matrix.search("inexistente", 10) == []
+
+def test_deleted_documents_are_not_columns(tmp_path):
+    index, _ = _matrix(tmp_path, CORPUS)
+    index.remove_documents(["a"])
+    matrix = SparseBM25Matrix.from_index(index)
+
+    assert matrix.doc_ids == ["b", "c", "d"]
+    live = {doc_id: text for doc_id, text in CORPUS.items() if doc_id != "a"}
+    expected = _reference_scores(live, "control de documentos")
+    np.testing.assert_allclose(
+        matrix.score("control de documentos"),
+        [expected[doc_id] for doc_id in matrix.doc_ids],
+        rtol=1e-5,
+    )
+
+def test_retriever_returns_documents_from_docstore(tmp_path):
+    _, matrix = _matrix(tmp_path, CORPUS)
+
+    class Store:
+        def mget(self, keys):
+            return [
+                Document(page_content=CORPUS[key], metadata={"id": key}) for key in keys
+            ]
+
+    retriever = SparseBM25Retriever(matrix=matrix, docstore=Store(), k=1)
+    docs = retriever.invoke("calibración")
+    assert [doc.metadata["id"] for doc in docs] == ["d"]
@@ -0,0 +1,68 @@
+import pytest
+from langchain_classic.storage import LocalFileStore
+from langchain_classic.storage._lc_store import create_kv_docstore
+from langchain_core.documents import Document
+
+from infrastructure.constants import FILE_DOCSTORE_DB
+from infrastructure.vector_store.sqlite_docstore import SQLiteDocStore
+
+def _doc(i: int) -> Document:
+    return Document(
+        page_content=f"padre {i} con tildes: auditoría",
+        metadata={"source_file": f"{i % 3}.pdf"},
+    )
+
+@pytest.mark.parametrize("compression", [None, "zstd"])
+def test_round_trip_keeps_order_and_missing_keys(tmp_path, compression):
+    store = SQLiteDocStore(tmp_path / FILE_DOCSTORE_DB, compression=compression)
+    store.mset([(f"k{i}", _doc(i)) for i in range(1200)])
+
+    keys = ["k5", "missing", "k1199", "k0"]
+    docs = store.mget(keys)
+    assert docs[1] is None
+    assert [doc.page_content for doc in (docs[0], docs[2], docs[3])] == [
+        _doc(5).page_content, _doc(1199).page_content, _doc(0).page_content
+    ]
+    assert docs[0].id == "k5" and docs[0].metadata == {"source_file": "2.pdf"}
+    # Más claves que el límite de parámetros por sentencia
+    all_docs = store.mget([f"k{i}" for i in range(1200)])
+    assert sum(doc is not None for doc in all_docs) == 1200
+
+def test_delete_iterate_and_reopen(tmp_path):
+    store = SQLiteDocStore(tmp_path / FILE_DOCSTORE_DB)
+    store.mset([(f"k{i}", _doc(i)) for i in range(30)])
+    store.mdelete([f"k{i}" for i in range(10)])
+    store.close()
+
+    reopened = SQLiteDocStore(tmp_path / FILE_DOCSTORE_DB)
+    assert reopened.count() == 20
+    keys = [key for key, _ in reopened.iter_documents(batch_size=7)]
+    assert keys == [f"k{i}" for i in range(10, 30)]
+    assert sorted(reopened.yield_keys(prefix="k2")) == [f"k{i}" for i in range(20, 30)]
+
+def test_closed_store_reopens_on_use(tmp_path):
+    store = SQLiteDocStore(tmp_path / FILE_DOCSTORE_DB)
+    store.mset([("k0", _doc(0))])
+    store.close()
+    assert store._conn is None
+    store.close()
+
+    assert store.mget(["k0"])[0].page_content == _doc(0).page_content
+    assert store._conn is not None
+
+def test_rejects_unknown_compression(tmp_path):
+    with pytest.raises(ValueError):
+        SQLiteDocStore(tmp_path / FILE_DOCSTORE_DB, compression="lz4")
+
+def test_migrates_one_file_per_parent_layout(tmp_path):
+    legacy_dir = tmp_path / "doc_store"
+    legacy = create_kv_docstore(LocalFileStore(str(legacy_dir)))
+    legacy.mset([(f"id{i}", _doc(i)) for i in range(5)])
+
+    store = SQLiteDocStore(legacy_dir / FILE_DOCSTORE_DB)
+    assert store.migrate_legacy_files(legacy_dir) == 5
+    assert store.mget(["id3"])[0].page_content == _doc(3).page_content
+    leftovers = [
+        p.name for p in legacy_dir.iterdir() if not p.name.startswith(FILE_DOCSTORE_DB)
+    ]
+    assert leftovers == []